@@ -0,0 +1,176 @@
+# coding: utf-8
+
+"""
+Benchmarks of remote workflow internals, i.e., job file creation, the job status polling loop and
+the dumping of job data, using a fake job manager instead of a batch system.
+"""
+
+import os
+import shutil
+import tempfile
+import atexit
+from collections import Counter
+
+# the harness adjusts the path to import law
+from harness import benchmark
+
+import luigi
+import law
+from law.job.base import BaseJobManager
+from law.job.dashboard import NoJobDashboard
+from law.parser import global_cmdline_args
+from law.util import make_list
+
+law.contrib.load("htcondor")
+
+
+# base directory for all temporary files, removed at exit
+tmp_base = tempfile.mkdtemp(prefix="law_bench_")
+atexit.register(shutil.rmtree, tmp_base, True)
+
+
+class FakeJobManager(BaseJobManager):
+    """
+    Job manager that does not interact with any batch system. Submitted jobs are reported as
+    running in the first status query and as finished in all subsequent ones. Status queries are
+    chunked as in most actual job managers and counted in :py:attr:`calls`.
+    """
+
+    chunk_size_query = 100
+
+    def __init__(self, **kwargs):
+        kwargs.pop("constraint", None)
+        super(FakeJobManager, self).__init__(**kwargs)
+
+        self.calls = Counter()
+        self._queried = set()
+
+    def submit(self, job_file, **kwargs):
+        self.calls["submit"] += 1
+        return "fake_{}".format(self.calls["submit"])
+
+    def cancel(self, job_id, **kwargs):
+        self.calls["cancel"] += 1
+        return {job_id: None for job_id in make_list(job_id)}
+
+    def cleanup(self, job_id, **kwargs):
+        self.calls["cleanup"] += 1
+        return {job_id: None for job_id in make_list(job_id)}
+
+    def query(self, job_id, **kwargs):
+        self.calls["query"] += 1
+        data = {}
+        for _job_id in make_list(job_id):
+            if _job_id in self._queried:
+                status, code = self.FINISHED, 0
+            else:
+                status, code = self.RUNNING, None
+                self._queried.add(_job_id)
+            data[_job_id] = self.job_status_dict(job_id=_job_id, status=status, code=code,
+                extra={"log": "/dev/null"})
+        return data if isinstance(job_id, list) else data[job_id]
+
+
+class BenchRemoteWorkflow(law.htcondor.HTCondorWorkflow):
+
+    n_branches = luigi.IntParameter(default=100)
+    tmp_dir = luigi.Parameter(significant=False)
+
+    def create_branch_map(self):
+        return list(range(self.n_branches))
+
+    def output(self):
+        return law.LocalFileTarget(os.path.join(self.tmp_dir, "out_{}.json".format(self.branch)))
+
+    def run(self):
+        return
+
+    def publish_message(self, msg, stdout=None, **kwargs):
+        # do not write polling status lines to stdout
+        return super(BenchRemoteWorkflow, self).publish_message(msg, stdout=stdout, **kwargs)
+
+    def htcondor_output_directory(self):
+        return law.LocalDirectoryTarget(self.tmp_dir)
+
+    def htcondor_create_job_manager(self, **kwargs):
+        return FakeJobManager(**kwargs)
+
+    def htcondor_create_job_file_factory(self, **kwargs):
+        kwargs.setdefault("dir", os.path.join(self.tmp_dir, "job_files"))
+        kwargs.setdefault("mkdtemp", False)
+        return super(BenchRemoteWorkflow, self).htcondor_create_job_file_factory(**kwargs)
+
+
+def create_proxy(size, submitted=False):
+    # create a workflow with one branch per job and return its proxy
+    luigi.task_register.Register.clear_instance_cache()
+    wf = BenchRemoteWorkflow(n_branches=size, tmp_dir=tempfile.mkdtemp(dir=tmp_base),
+        workflow="htcondor", poll_interval=0.0)
+    proxy = wf.workflow_proxy
+    proxy.dashboard = NoJobDashboard()
+
+    # attributes that are forwarded by luigi workers when running tasks
+    wf.scheduler_messages = None
+    wf.set_status_message = lambda msg: None
+    wf.set_progress_percentage = lambda percentage: None
+
+    if submitted:
+        for b in range(size):
+            proxy.job_data.jobs[b + 1] = proxy.job_data_cls.job_data(
+                job_id="fake_{}".format(b + 1),
+                branches=[b],
+                extra={"log": "/dev/null"},
+            )
+
+    return proxy
+
+
+@benchmark("jobs.create_job_file", sizes=(10, 10**2, 10**3), quick_sizes=(10**2,))
+def create_job_file(size):
+    """
+    Creation of htcondor job files including the rendering of the law job script, one per job.
+    """
+    proxy = create_proxy(size)
+    proxy.job_file_factory = proxy.create_job_file_factory()
+
+    # job arguments contain global command line arguments, so mimic a command line invocation once
+    # to fill the cache
+    cmdline_args = ["BenchRemoteWorkflow", "--workflow", "htcondor", "--local-scheduler"]
+    with luigi.cmdline_parser.CmdlineParser.global_instance(cmdline_args):
+        global_cmdline_args()
+
+    def run():
+        for b in range(size):
+            proxy.create_job_file(b + 1, [b])
+
+    return run
+
+
+@benchmark("jobs.poll", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+def poll(size):
+    """
+    Job status polling loop with all jobs running in the first and finished in the second iteration.
+    """
+    proxy = create_proxy(size, submitted=True)
+
+    def run():
+        proxy.poll()
+        return {"queries": proxy.job_manager.calls["query"]}
+
+    return run
+
+
+@benchmark("jobs.dump_job_data", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+def dump_job_data(size):
+    """
+    Dumping of job data of finished jobs to the json submission file.
+    """
+    proxy = create_proxy(size, submitted=True)
+    for data in proxy.job_data.jobs.values():
+        data.update(status=BaseJobManager.FINISHED, code=0)
+    proxy.job_data.branch_runtimes.update((b, 60.0) for b in range(size))
+
+    def run():
+        proxy.dump_job_data()
+
+    return run
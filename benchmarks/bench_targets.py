@@ -0,0 +1,251 @@
+# coding: utf-8
+
+"""
+Benchmarks of target collections on local and (stand-in) remote file systems, the remote cache and
+target formatters.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import atexit
+from collections import Counter
+
+# the harness adjusts the path to import law
+from harness import benchmark
+
+import law
+from law.target.remote import (
+    RemoteFileSystem, RemoteFileInterface, RemoteFileTarget, RemoteCache,
+)
+
+
+# base directory for all temporary files, removed at exit
+tmp_base = tempfile.mkdtemp(prefix="law_bench_")
+atexit.register(shutil.rmtree, tmp_base, True)
+
+
+def make_tmp_dir():
+    return tempfile.mkdtemp(dir=tmp_base)
+
+
+class StandInFileInterface(RemoteFileInterface):
+    """
+    Remote file interface that operates on a local *root* directory, optionally adding a constant
+    *latency* in seconds per call to mimic round trips. All calls are counted per method in
+    :py:attr:`calls`.
+    """
+
+    def __init__(self, root, latency=0.0, **kwargs):
+        kwargs.setdefault("base", "standin://")
+        super(StandInFileInterface, self).__init__(**kwargs)
+
+        self.root = root
+        self.latency = latency
+        self.calls = Counter()
+
+    def _local(self, method, path):
+        self.calls[method] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return os.path.join(self.root, str(path).lstrip("/"))
+
+    def exists(self, path, base=None, stat=False, **kwargs):
+        p = self._local("exists", path)
+        if not stat:
+            return os.path.exists(p)
+        try:
+            return os.stat(p)
+        except OSError:
+            return None
+
+    def stat(self, path, base=None, **kwargs):
+        return os.stat(self._local("stat", path))
+
+    def isdir(self, path, stat=None, base=None, **kwargs):
+        return os.path.isdir(self._local("isdir", path))
+
+    def isfile(self, path, stat=None, base=None, **kwargs):
+        return os.path.isfile(self._local("isfile", path))
+
+    def chmod(self, path, perm, base=None, silent=False, **kwargs):
+        os.chmod(self._local("chmod", path), perm)
+        return True
+
+    def unlink(self, path, base=None, silent=True, **kwargs):
+        os.remove(self._local("unlink", path))
+        return True
+
+    def rmdir(self, path, base=None, silent=True, **kwargs):
+        os.rmdir(self._local("rmdir", path))
+        return True
+
+    def remove(self, path, base=None, silent=True, **kwargs):
+        p = self._local("remove", path)
+        shutil.rmtree(p) if os.path.isdir(p) else os.remove(p)
+        return True
+
+    def mkdir(self, path, perm, base=None, silent=True, **kwargs):
+        os.mkdir(self._local("mkdir", path), perm)
+        return True
+
+    def mkdir_rec(self, path, perm, base=None, **kwargs):
+        p = self._local("mkdir_rec", path)
+        if not os.path.exists(p):
+            os.makedirs(p, perm)
+        return True
+
+    def listdir(self, path, base=None, **kwargs):
+        return os.listdir(self._local("listdir", path))
+
+    def filecopy(self, src, dst, base=None, **kwargs):
+        self.calls["filecopy"] += 1
+        shutil.copy2(src, dst)
+        return src, dst
+
+
+class StandInFileSystem(RemoteFileSystem):
+
+    file_interface_cls = StandInFileInterface
+
+    def __init__(self, root, latency=0.0, **kwargs):
+        file_interface = StandInFileInterface(root, latency=latency)
+        kwargs.setdefault("name", "standin_fs")
+        super(StandInFileSystem, self).__init__(file_interface, **kwargs)
+
+
+def create_files(directory, n, n_existing, size=0):
+    # creates the first n_existing of n files and returns all their basenames
+    basenames = ["file_{}.json".format(i) for i in range(n)]
+    for basename in basenames[:n_existing]:
+        with open(os.path.join(directory, basename), "w") as f:
+            f.write("x" * size)
+    return basenames
+
+
+def collection_case(size, collection_cls, remote):
+    # half of the files exist
+    tmp_dir = make_tmp_dir()
+    basenames = create_files(tmp_dir, size, size // 2)
+
+    if remote:
+        fs = StandInFileSystem(tmp_dir)
+        targets = [RemoteFileTarget("/" + b, fs=fs) for b in basenames]
+    else:
+        fs = None
+        targets = [law.LocalFileTarget(os.path.join(tmp_dir, b)) for b in basenames]
+    collection = collection_cls(targets, threshold=0.5)
+
+    def run():
+        collection.exists()
+        collection.count()
+        if fs is not None:
+            return {"remote_calls": sum(fs.file_interface.calls.values())}
+
+    return run
+
+
+@benchmark("targets.collection_local", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+def collection_local(size):
+    """
+    exists() and count() of a FileCollection of local targets, half of them existing.
+    """
+    return collection_case(size, law.FileCollection, remote=False)
+
+
+@benchmark("targets.sibling_collection_local", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+def sibling_collection_local(size):
+    """
+    exists() and count() of a SiblingFileCollection of local targets, half of them existing.
+    """
+    return collection_case(size, law.SiblingFileCollection, remote=False)
+
+
+@benchmark("targets.collection_remote", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+def collection_remote(size):
+    """
+    exists() and count() of a FileCollection of stand-in remote targets, half of them existing.
+    """
+    return collection_case(size, law.FileCollection, remote=True)
+
+
+@benchmark("targets.sibling_collection_remote", sizes=(10**2, 10**3, 10**4),
+    quick_sizes=(10**3,))
+def sibling_collection_remote(size):
+    """
+    exists() and count() of a SiblingFileCollection of stand-in remote targets, half of them
+    existing.
+    """
+    return collection_case(size, law.SiblingFileCollection, remote=True)
+
+
+@benchmark("remote_cache.allocate", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+def remote_cache_allocate(size):
+    """
+    Allocation in a remote cache holding files of 1 kB each, requiring the removal of 10% of them.
+    """
+    fs = StandInFileSystem(make_tmp_dir())
+    file_size = 1024
+    # max_size is given in MB
+    cache = RemoteCache(fs, root=make_tmp_dir(), max_size=0.9 * size * file_size / 1024.0**2,
+        wait_delay=0.01)
+    create_files(cache.base, size, size, size=file_size)
+
+    def run():
+        cache.allocate(0)
+        return {"removed": size - len(os.listdir(cache.base))}
+
+    return run
+
+
+def formatter_case(size, formatter, data):
+    target = law.LocalFileTarget(os.path.join(make_tmp_dir(), "data"))
+
+    def run():
+        target.dump(data(size), formatter=formatter)
+        target.load(formatter=formatter)
+
+    return run
+
+
+def nested_data(size):
+    entries = [{"index": i, "name": "entry_{}".format(i), "value": 0.5 * i} for i in range(size)]
+    return {"entries": entries}
+
+
+@benchmark("formatter.json", sizes=(10**3, 10**4, 10**5), quick_sizes=(10**4,))
+def formatter_json(size):
+    """
+    Dumping and loading of a nested structure with the json formatter.
+    """
+    return formatter_case(size, "json", nested_data)
+
+
+@benchmark("formatter.pickle", sizes=(10**3, 10**4, 10**5), quick_sizes=(10**4,))
+def formatter_pickle(size):
+    """
+    Dumping and loading of a nested structure with the pickle formatter.
+    """
+    return formatter_case(size, "pickle", nested_data)
+
+
+@benchmark("formatter.text", sizes=(10**3, 10**4, 10**5), quick_sizes=(10**4,))
+def formatter_text(size):
+    """
+    Dumping and loading of multi-line text with the text formatter.
+    """
+    return formatter_case(size, "text", lambda n: "\n".join("line {}".format(i) for i in range(n)))
+
+
+try:
+    import yaml  # noqa
+except ImportError:
+    pass
+else:
+    @benchmark("formatter.yaml", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**3,))
+    def formatter_yaml(size):
+        """
+        Dumping and loading of a nested structure with the yaml formatter.
+        """
+        return formatter_case(size, "yaml", nested_data)
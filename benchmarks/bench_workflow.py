@@ -0,0 +1,106 @@
+# coding: utf-8
+
+"""
+Benchmarks of workflow branch maps, branch task creation and task requirement throughput.
+"""
+
+# the harness adjusts the path to import law
+from harness import benchmark
+
+import luigi
+import law
+
+
+class BenchWorkflow(law.LocalWorkflow):
+
+    n_branches = luigi.IntParameter(default=1000)
+    version = luigi.Parameter(default="v1")
+    dataset = luigi.Parameter(default="data")
+    shift = luigi.Parameter(default="nominal")
+    threshold = luigi.FloatParameter(default=0.5, significant=False)
+
+    def create_branch_map(self):
+        return {b: {"index": b, "file": "file_{}.root".format(b)} for b in range(self.n_branches)}
+
+    def output(self):
+        return law.LocalFileTarget("/tmp/law_bench/{}/out_{}.json".format(self.dataset,
+            self.branch))
+
+    def run(self):
+        return
+
+
+class BenchDependency(law.Task):
+
+    version = luigi.Parameter(default="v1")
+    dataset = luigi.Parameter(default="data")
+
+    def output(self):
+        return law.LocalFileTarget("/tmp/law_bench/{}/dep.json".format(self.dataset))
+
+    def run(self):
+        return
+
+
+def fresh_workflow(size):
+    # clear the instance cache so that tasks are not reused across repetitions
+    luigi.task_register.Register.clear_instance_cache()
+    return BenchWorkflow(n_branches=size)
+
+
+@benchmark("workflow.branch_map", sizes=(10**3, 10**4, 10**5, 10**6), quick_sizes=(10**3, 10**4))
+def branch_map(size):
+    """
+    Creation of the branch map of a workflow.
+    """
+    wf = fresh_workflow(size)
+
+    def run():
+        wf.get_branch_map()
+
+    return run
+
+
+@benchmark("workflow.get_branch_tasks", sizes=(10**3, 10**4, 10**5, 10**6),
+    quick_sizes=(10**3, 10**4))
+def get_branch_tasks(size):
+    """
+    Creation of all branch tasks of a workflow, given an existing branch map.
+    """
+    wf = fresh_workflow(size)
+    wf.get_branch_map()
+
+    def run():
+        wf.get_branch_tasks()
+
+    return run
+
+
+@benchmark("workflow.as_branch", sizes=(10**2, 10**3, 10**4), quick_sizes=(10**2,))
+def as_branch(size):
+    """
+    Individual creation of branch tasks via as_branch, given an existing branch map.
+    """
+    wf = fresh_workflow(size)
+    wf.get_branch_map()
+
+    def run():
+        for b in range(size):
+            wf.as_branch(b)
+
+    return run
+
+
+@benchmark("task.req", sizes=(10**3, 10**4, 10**5), quick_sizes=(10**3,))
+def req(size):
+    """
+    Requirement of a dependency from different branch tasks via req.
+    """
+    wf = fresh_workflow(size)
+    branch_tasks = list(wf.get_branch_tasks().values())
+
+    def run():
+        for task in branch_tasks:
+            BenchDependency.req(task)
+
+    return run
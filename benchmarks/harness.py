@@ -0,0 +1,200 @@
+# coding: utf-8
+
+"""
+Minimal harness for the law benchmark suite. Benchmarks are registered with the :py:func:`benchmark`
+decorator in modules named ``bench_*.py`` and executed by ``run.py``, which writes results in a
+machine-readable json format and optionally compares them against a baseline.
+
+A benchmark function receives a workload *size* and performs all setup steps, returning the
+callable to be timed. This callable may return a dictionary of counters (e.g. the number of remote
+file system calls) that are stored alongside the timings and compared as well, as they are
+independent of the machine the suite runs on.
+"""
+
+__all__ = [
+    "benchmark", "registry", "run_benchmark", "collect", "dump_results", "load_results", "compare",
+]
+
+
+import os
+import sys
+import json
+import time
+import math
+import fnmatch
+import contextlib
+import platform
+import subprocess
+from collections import OrderedDict, namedtuple
+
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(thisdir))
+
+
+Benchmark = namedtuple("Benchmark", ["name", "func", "sizes", "quick_sizes", "description"])
+
+Result = namedtuple("Result", ["name", "size", "repeat", "best", "mean", "stddev", "counters"])
+
+# registered benchmarks, mapped to their names
+registry = OrderedDict()
+
+
+def benchmark(name, sizes=(1,), quick_sizes=None, description=None):
+    """
+    Decorator that registers a benchmark function under *name* that is run for each workload size
+    in *sizes*, or *quick_sizes* in quick mode, which defaults to the smallest size. The
+    *description* defaults to the first line of the function's docstring.
+    """
+    def decorator(func):
+        if name in registry:
+            raise ValueError("benchmark '{}' already registered".format(name))
+        doc = (func.__doc__ or "").strip().split("\n", 1)[0]
+        registry[name] = Benchmark(
+            name=name,
+            func=func,
+            sizes=tuple(sizes),
+            quick_sizes=tuple(quick_sizes or sizes[:1]),
+            description=description or doc,
+        )
+        return func
+
+    return decorator
+
+
+def collect(patterns=None):
+    """
+    Imports all ``bench_*.py`` modules next to this file and returns the registered benchmarks
+    whose names match any of the fnmatch *patterns*.
+    """
+    for elem in sorted(os.listdir(thisdir)):
+        if elem.startswith("bench_") and elem.endswith(".py"):
+            __import__(elem[:-3])
+
+    if not patterns:
+        return list(registry.values())
+
+    return [
+        bm for bm in registry.values()
+        if any(fnmatch.fnmatch(bm.name, pattern) for pattern in patterns)
+    ]
+
+
+def run_benchmark(bm, size, repeat=3):
+    """
+    Runs the benchmark *bm* with workload *size* *repeat* times, each with a fresh setup, and
+    returns a :py:class:`Result`. Counters are taken from the last repetition. Outputs written to
+    stdout during the benchmark are discarded.
+    """
+    durations = []
+    counters = None
+    # suppress outputs of the benchmarked code, such as polling status lines
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(max(repeat, 1)):
+            func = bm.func(size)
+            t0 = time.perf_counter()
+            counters = func()
+            durations.append(time.perf_counter() - t0)
+
+    mean = sum(durations) / len(durations)
+    stddev = math.sqrt(sum((d - mean)**2 for d in durations) / len(durations))
+
+    return Result(
+        name=bm.name,
+        size=size,
+        repeat=len(durations),
+        best=min(durations),
+        mean=mean,
+        stddev=stddev,
+        counters=dict(counters) if isinstance(counters, dict) else {},
+    )
+
+
+def _git_revision():
+    try:
+        out = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=thisdir,
+            stderr=subprocess.DEVNULL)
+        return out.decode("utf-8").strip()
+    except Exception:
+        return None
+
+
+def dump_results(results, path):
+    """
+    Writes a list of :py:class:`Result` objects together with information on the environment to a
+    json file at *path*. When *path* is ``"-"``, the json content is written to stdout.
+    """
+    import law
+    import luigi
+
+    data = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": _git_revision(),
+            "law_version": law.__version__,
+            "luigi_version": getattr(luigi, "__version__", None),
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": [
+            OrderedDict([
+                ("name", r.name),
+                ("size", r.size),
+                ("repeat", r.repeat),
+                ("best", round(r.best, 6)),
+                ("mean", round(r.mean, 6)),
+                ("stddev", round(r.stddev, 6)),
+                ("per_item_us", round(1e6 * r.best / max(r.size, 1), 3)),
+                ("counters", r.counters),
+            ])
+            for r in results
+        ],
+    }
+
+    if path == "-":
+        json.dump(data, sys.stdout, indent=4)
+        sys.stdout.write("\n")
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+
+    return data
+
+
+def load_results(path):
+    """
+    Loads results written by :py:func:`dump_results` and returns them in a dictionary mapping
+    2-tuples of benchmark name and size to result dictionaries.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    return OrderedDict(((r["name"], r["size"]), r) for r in data["results"])
+
+
+def compare(results, baseline, tolerance=0.25, min_duration=1e-3):
+    """
+    Compares a list of :py:class:`Result` objects against *baseline* results as returned by
+    :py:func:`load_results` and returns a list of 4-tuples (name, size, metric, message) describing
+    regressions. Timings regress when the best duration exceeds that of the baseline by more than
+    the relative *tolerance*, ignoring durations below *min_duration* seconds. Counters regress
+    whenever they increase.
+    """
+    regressions = []
+    for r in results:
+        ref = baseline.get((r.name, r.size))
+        if not ref:
+            continue
+
+        if max(r.best, ref["best"]) >= min_duration and r.best > ref["best"] * (1 + tolerance):
+            regressions.append((r.name, r.size, "time", "{:.4f}s -> {:.4f}s ({:+.1f}%)".format(
+                ref["best"], r.best, 100.0 * (r.best / ref["best"] - 1))))
+
+        for key, value in r.counters.items():
+            ref_value = ref.get("counters", {}).get(key)
+            if ref_value is not None and value > ref_value:
+                regressions.append((r.name, r.size, key, "{} -> {}".format(ref_value, value)))
+
+    return regressions
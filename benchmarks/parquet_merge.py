@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Benchmark of merging many small parquet files with law.contrib.pyarrow.merge_parquet_files,
+comparing the default, the streamed and the streamed plus prefetched merging modes.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(thisdir))
+
+from law.contrib.pyarrow.util import merge_parquet_files
+
+
+def create_inputs(tmp_dir, n_files, n_rows, row_group_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    paths = []
+    for i in range(n_files):
+        table = pa.table({
+            "idx": pa.array(range(i * n_rows, (i + 1) * n_rows), pa.int64()),
+            "value": pa.array([float(j) for j in range(n_rows)], pa.float64()),
+            "label": pa.array(["label_{}".format(j % 10) for j in range(n_rows)]),
+        })
+        path = os.path.join(tmp_dir, "input_{}.parquet".format(i))
+        pq.write_table(table, path, row_group_size=row_group_size)
+        paths.append(path)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--files", "-n", type=int, default=500, help="number of input files")
+    parser.add_argument("--rows", "-r", type=int, default=1000, help="number of rows per file")
+    parser.add_argument("--row-group-size", type=int, default=250, help="rows per row group")
+    parser.add_argument("--prefetch", "-p", type=int, default=4, help="number of prefetched files")
+    parser.add_argument("--max-memory", "-m", default="100MB", help="memory bound when streaming")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions per mode")
+    args = parser.parse_args()
+
+    modes = [
+        ("default", {}),
+        ("stream", {"stream": True}),
+        ("stream+prefetch", {
+            "stream": True,
+            "prefetch": args.prefetch,
+            "max_memory": args.max_memory,
+        }),
+    ]
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        src_paths = create_inputs(tmp_dir, args.files, args.rows, args.row_group_size)
+        dst_path = os.path.join(tmp_dir, "merged.parquet")
+
+        print("merging {} files with {} rows each".format(args.files, args.rows))
+        for name, kwargs in modes:
+            durations = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                merge_parquet_files(src_paths, dst_path, **kwargs)
+                durations.append(time.perf_counter() - t0)
+            print("{:<16}: best {:.3f}s, mean {:.3f}s".format(
+                name, min(durations), sum(durations) / len(durations)))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
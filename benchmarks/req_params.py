@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Micro-benchmark of law.Task.req_params and req_branch for many branches of a workflow, comparing
+calls without the cached parameter plans and parameter lists (cleared before each call) and with
+both caches in place.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(thisdir))
+
+import luigi
+import law
+
+
+class BenchmarkWorkflow(law.LocalWorkflow):
+
+    n_branches = luigi.IntParameter(default=1000)
+    version = luigi.Parameter(default="v1")
+    dataset = luigi.Parameter(default="data")
+    shift = luigi.Parameter(default="nominal")
+    threshold = luigi.FloatParameter(default=0.5)
+
+    exclude_params_req = {"threshold", "shi*"}
+
+    def create_branch_map(self):
+        return list(range(self.n_branches))
+
+    def output(self):
+        return law.LocalFileTarget("/dev/null/{}".format(self.branch))
+
+    def run(self):
+        return
+
+
+class BenchmarkDependency(law.Task):
+
+    version = luigi.Parameter(default="v1")
+    dataset = luigi.Parameter(default="data")
+    shift = luigi.Parameter(default="nominal")
+
+    def output(self):
+        return law.LocalFileTarget("/dev/null")
+
+    def run(self):
+        return
+
+
+def clear_caches():
+    for cls in (BenchmarkWorkflow, BenchmarkDependency):
+        cls.__dict__.get("_req_params_plans", {}).clear()
+    law.task.base.BaseRegister._params_cache.clear()
+
+
+def measure(func, n, repeat, uncached):
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(n):
+            if uncached:
+                clear_caches()
+            func(i)
+        durations.append(time.perf_counter() - t0)
+    return min(durations), sum(durations) / len(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--branches", "-n", type=int, default=10000, help="number of branches")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions per mode")
+    args = parser.parse_args()
+
+    wf = BenchmarkWorkflow(n_branches=args.branches)
+    branch_task = wf.req_branch(0)
+
+    cases = [
+        ("req_params", lambda i: BenchmarkDependency.req_params(branch_task)),
+        ("req_branch", lambda i: wf.req_branch(i)),
+    ]
+
+    print("{} calls per case".format(args.branches))
+    for name, func in cases:
+        for mode, uncached in [("uncached", True), ("cached", False)]:
+            best, mean = measure(func, args.branches, args.repeat, uncached)
+            print("{:<10} {:<8}: best {:.3f}s, mean {:.3f}s, {:.2f}us per call".format(
+                name, mode, best, mean, 1e6 * best / args.branches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Runs the law benchmark suite on synthetic workloads and local stand-ins for remote resources,
+optionally writing results to a json file and comparing them against a baseline. Examples:
+
+    # list all benchmarks
+    python benchmarks/run.py --list
+
+    # run all workflow benchmarks in quick mode and store results
+    python benchmarks/run.py --quick --filter "workflow.*" --output results.json
+
+    # compare against a previous run, exiting with code 1 on regressions
+    python benchmarks/run.py --quick --compare results.json
+"""
+
+import os
+import sys
+import argparse
+
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, thisdir)
+
+from harness import collect, run_benchmark, dump_results, load_results, compare
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", 1)[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__.split("\n", 3)[3])
+    parser.add_argument("--filter", "-k", nargs="+", help="fnmatch patterns of benchmarks to run")
+    parser.add_argument("--quick", "-q", action="store_true", help="only run the quick sizes")
+    parser.add_argument("--max-size", type=int, help="skip sizes larger than this value")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="number of repetitions per "
+        "benchmark and size, reporting the best; default: 3")
+    parser.add_argument("--output", "-o", help="json file to write results to, '-' for stdout")
+    parser.add_argument("--compare", "-c", help="json file with baseline results to compare to")
+    parser.add_argument("--tolerance", "-t", type=float, default=0.25, help="relative slowdown "
+        "with respect to the baseline that is considered a regression; default: 0.25")
+    parser.add_argument("--list", "-l", action="store_true", help="list benchmarks and exit")
+    args = parser.parse_args()
+
+    benchmarks = collect(args.filter)
+
+    if args.list:
+        for bm in benchmarks:
+            print("{:<32} {}".format(bm.name, bm.description))
+            print("{:<32} sizes: {}, quick: {}".format("", ",".join(map(str, bm.sizes)),
+                ",".join(map(str, bm.quick_sizes))))
+        return 0
+
+    # report to stderr when the results are written to stdout
+    log = sys.stderr if args.output == "-" else sys.stdout
+
+    results = []
+    for bm in benchmarks:
+        sizes = bm.quick_sizes if args.quick else bm.sizes
+        for size in sizes:
+            if args.max_size and size > args.max_size:
+                continue
+            res = run_benchmark(bm, size, repeat=args.repeat)
+            results.append(res)
+            counters = ", ".join("{}={}".format(*tpl) for tpl in sorted(res.counters.items()))
+            log.write("{:<32} {:>8}: best {:.4f}s, mean {:.4f}s, {:.2f}us per item{}\n".format(
+                bm.name, size, res.best, res.mean, 1e6 * res.best / max(size, 1),
+                ", " + counters if counters else ""))
+            log.flush()
+
+    if args.output:
+        dump_results(results, args.output)
+
+    if args.compare:
+        regressions = compare(results, load_results(args.compare), tolerance=args.tolerance)
+        if regressions:
+            log.write("\n{} regression(s) with respect to {}:\n".format(len(regressions),
+                args.compare))
+            for name, size, metric, msg in regressions:
+                log.write("  {} ({}), {}: {}\n".format(name, size, metric, msg))
+            return 1
+        log.write("\nno regressions with respect to {}\n".format(args.compare))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,7 @@ __all__ = [
 
 
 import os
+import sys
 
 # package infos
 from law.__version__ import (
@@ -59,35 +60,113 @@ import law.patches
 law.patches.patch_all()
 
 
-# provisioning imports
-import law.util
-from law.util import law_run as run, no_value
-from law.config import Config
-from law.notification import notify_mail
-from law.parameter import (
-    NO_STR, NO_INT, NO_FLOAT, is_no_param, get_param, Parameter, TaskInstanceParameter,
-    OptionalBoolParameter, DurationParameter, BytesParameter, CSVParameter, MultiCSVParameter,
-    RangeParameter, MultiRangeParameter, NotifyParameter, NotifyMultiParameter, NotifyMailParameter,
-    NotifyCustomParameter,
-)
-from law.target.file import (
-    FileSystemTarget, FileSystemFileTarget, FileSystemDirectoryTarget, localize_file_targets,
-)
-from law.target.local import LocalFileSystem, LocalTarget, LocalFileTarget, LocalDirectoryTarget
-from law.target.collection import (
-    TargetCollection, FileCollection, SiblingFileCollection, NestedSiblingFileCollection,
-)
-from law.target.mirrored import MirroredTarget, MirroredFileTarget, MirroredDirectoryTarget
-import law.decorator
-from law.task.base import Register, Task, WrapperTask, ExternalTask
-from law.workflow.base import (
-    BaseWorkflow, WorkflowParameter, workflow_property, dynamic_workflow_condition,
-)
-from law.workflow.local import LocalWorkflow
-from law.sandbox.base import Sandbox, SandboxTask
-from law.sandbox.bash import BashSandbox
-from law.sandbox.venv import VenvSandbox
-from law.job.base import BaseJobManager, BaseJobFileFactory, JobInputFile, JobArguments
-import law.job.dashboard
-import law.workflow.remote
-import law.contrib
+# tracing of internal hot paths, when enabled in the config
+import law.trace
+law.trace.setup()
+
+
+# when running inside a sandbox, load the sandbox state right away (see law.patches)
+if os.getenv("LAW_SANDBOX_SWITCHED", "") == "1":
+    import law.sandbox.base
+
+
+# provisioning of the public namespace, mapping attribute names to the modules (and optionally
+# the attributes therein) they are resolved from on first access (PEP 562)
+_lazy_attrs = {
+    "run": ("law.util", "law_run"),
+    "no_value": ("law.util", None),
+    "Config": ("law.config", None),
+    "notify_mail": ("law.notification", None),
+}
+_lazy_attrs.update({
+    attr: ("law.parameter", None)
+    for attr in [
+        "NO_STR", "NO_INT", "NO_FLOAT", "is_no_param", "get_param", "Parameter",
+        "TaskInstanceParameter", "OptionalBoolParameter", "DurationParameter", "BytesParameter",
+        "CSVParameter", "MultiCSVParameter", "RangeParameter", "MultiRangeParameter",
+        "NotifyParameter", "NotifyMultiParameter", "NotifyMailParameter", "NotifyCustomParameter",
+    ]
+})
+_lazy_attrs.update({
+    attr: ("law.target.file", None)
+    for attr in [
+        "FileSystemTarget", "FileSystemFileTarget", "FileSystemDirectoryTarget",
+        "localize_file_targets",
+    ]
+})
+_lazy_attrs.update({
+    attr: ("law.target.local", None)
+    for attr in ["LocalFileSystem", "LocalTarget", "LocalFileTarget", "LocalDirectoryTarget"]
+})
+_lazy_attrs.update({
+    attr: ("law.target.collection", None)
+    for attr in [
+        "TargetCollection", "FileCollection", "SiblingFileCollection",
+        "NestedSiblingFileCollection",
+    ]
+})
+_lazy_attrs.update({
+    attr: ("law.target.mirrored", None)
+    for attr in ["MirroredTarget", "MirroredFileTarget", "MirroredDirectoryTarget"]
+})
+_lazy_attrs.update({
+    attr: ("law.task.base", None)
+    for attr in ["Register", "Task", "WrapperTask", "ExternalTask"]
+})
+_lazy_attrs.update({
+    attr: ("law.workflow.base", None)
+    for attr in [
+        "BaseWorkflow", "WorkflowParameter", "workflow_property", "dynamic_workflow_condition",
+    ]
+})
+_lazy_attrs["LocalWorkflow"] = ("law.workflow.local", None)
+_lazy_attrs.update({attr: ("law.sandbox.base", None) for attr in ["Sandbox", "SandboxTask"]})
+_lazy_attrs["BashSandbox"] = ("law.sandbox.bash", None)
+_lazy_attrs["VenvSandbox"] = ("law.sandbox.venv", None)
+_lazy_attrs.update({
+    attr: ("law.job.base", None)
+    for attr in ["BaseJobManager", "BaseJobFileFactory", "JobInputFile", "JobArguments"]
+})
+
+# subpackages and modules that are imported on first access
+_lazy_modules = [
+    "util", "config", "notification", "parameter", "parser", "target", "decorator", "task",
+    "workflow", "sandbox", "job", "contrib", "cli",
+]
+
+
+def _resolve(name):
+    from importlib import import_module
+
+    if name in _lazy_modules:
+        value = import_module("law." + name)
+    else:
+        mod_name, attr = _lazy_attrs[name]
+        value = getattr(import_module(mod_name), attr or name)
+
+    # store the value so that subsequent lookups do not go through __getattr__ again
+    globals()[name] = value
+
+    return value
+
+
+def __getattr__(name):
+    if name in _lazy_attrs or name in _lazy_modules:
+        return _resolve(name)
+
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs) | set(_lazy_modules))
+
+
+# module-level __getattr__ is only supported as of python 3.7, so resolve everything eagerly before
+if sys.version_info[:2] < (3, 7):
+    for _name in _lazy_modules + list(_lazy_attrs):
+        _resolve(_name)
+    # same for submodules of subpackages that are otherwise imported on first access
+    for _name in _lazy_modules:
+        for _sub_name in getattr(globals()[_name], "_lazy_modules", []):
+            __import__("law.{}.{}".format(_name, _sub_name))
+    del _name, _sub_name
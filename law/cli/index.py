@@ -7,6 +7,11 @@
 
 import os
 import sys
+import json
+import mmap
+import zlib
+import struct
+import hashlib
 import traceback
 from importlib import import_module
 from collections import OrderedDict, deque
@@ -48,6 +53,13 @@ def setup_parser(sub_parsers):
         action="store_true",
         help="skip external tasks",
     )
+    parser.add_argument(
+        "--full",
+        "-f",
+        action="store_true",
+        help="fully rebuild the index instead of only re-importing modules that changed since the "
+        "last indexing",
+    )
     parser.add_argument(
         "--remove",
         "-r",
@@ -106,10 +118,13 @@ def execute(args):
             abort("index file {} does not exist".format(index_file))
 
     # just remove the index file?
+    binary_index_file = get_binary_index_file(index_file)
     if args.remove:
         if os.path.exists(index_file):
             os.remove(index_file)
             print("removed index file {}".format(index_file))
+        if os.path.exists(binary_index_file):
+            os.remove(binary_index_file)
         return
 
     # get modules to lookup
@@ -120,19 +135,40 @@ def execute(args):
     # expand braces
     lookup = sum(map(brace_expand, lookup), [])
 
+    # load the state of the previous indexing to skip modules whose files did not change
+    prev_meta = None
+    if not args.full and os.path.exists(index_file):
+        prev_meta = read_binary_index_meta(binary_index_file)
+        if prev_meta and prev_meta.get("no_externals") != args.no_externals:
+            prev_meta = None
+
     if not args.quiet:
         print("indexing tasks in {} module(s)".format(len(lookup)))
 
     exit_code = 0
 
     # loop through modules, import everything to load tasks
+    reused_modules = OrderedDict()
+    imported_modules = OrderedDict()
     for modid in lookup:
         if not modid:
             continue
 
+        # reuse information of unchanged modules
+        mod_meta = prev_meta and prev_meta["modules"].get(modid)
+        if mod_meta and _files_unchanged(mod_meta["files"]):
+            reused_modules[modid] = mod_meta
+            if args.verbose:
+                print("module '{}' unchanged".format(modid))
+            continue
+
         if args.verbose:
             sys.stdout.write("loading module '{}'".format(modid))
 
+        # keep track of modules and task classes that are loaded by the import
+        modules_before = set(sys.modules)
+        classes_before = set(_iter_task_classes())
+
         try:
             import_module(modid)
         except Exception as e:
@@ -144,6 +180,12 @@ def execute(args):
                 traceback.print_exc()
             continue
 
+        new_modules = (set(sys.modules) - modules_before) | {modid}
+        imported_modules[modid] = (
+            _module_files(new_modules),
+            set(_iter_task_classes()) - classes_before,
+        )
+
         if args.verbose:
             print(", {}".format(colored("done", style="bright")))
 
@@ -227,9 +269,28 @@ def execute(args):
                     params.append(attr.replace("_", "-"))
         return params
 
-    def index_line(cls, params):
+    # build index entries (module id, task family, params) of loaded task classes
+    entries = [(cls.__module__, cls.get_task_family(), get_task_params(cls)) for cls in task_classes]
+
+    # store the state of imported modules for the next incremental indexing
+    meta = {"no_externals": bool(args.no_externals), "modules": OrderedDict()}
+    for modid, (files, classes) in six.iteritems(imported_modules):
+        meta["modules"][modid] = {
+            "files": files,
+            "tasks": [entry for cls, entry in zip(task_classes, entries) if cls in classes],
+        }
+
+    # add entries of reused modules whose families are not loaded
+    for modid, mod_meta in six.iteritems(reused_modules):
+        meta["modules"][modid] = mod_meta
+        for entry in mod_meta["tasks"]:
+            if entry[1] not in seen_families:
+                seen_families.append(entry[1])
+                entries.append(tuple(entry))
+
+    def index_line(modid, task_family, params):
         # format: "module_id:task_family:param param ..."
-        return "{}:{}:{}".format(cls.__module__, cls.get_task_family(), " ".join(params))
+        return "{}:{}:{}".format(modid, task_family, " ".join(params))
 
     stats = OrderedDict()
 
@@ -237,16 +298,16 @@ def execute(args):
     makedirs(os.path.dirname(index_file))
 
     with open(index_file, "w") as f:
-        for cls in task_classes:
-            # get prams
-            params = get_task_params(cls)
-
+        for modid, task_family, params in entries:
             # fill stats
-            if cls.__module__ not in stats:
-                stats[cls.__module__] = []
-            stats[cls.__module__].append((cls.get_task_family(), params))
+            if modid not in stats:
+                stats[modid] = []
+            stats[modid].append((task_family, params))
+
+            f.write(index_line(modid, task_family, params) + "\n")
 
-            f.write(index_line(cls, params) + "\n")
+    # write the binary index file
+    write_binary_index(binary_index_file, entries, meta=meta)
 
     # print stats
     if args.verbose:
@@ -257,11 +318,187 @@ def execute(args):
         print("")
 
     if not args.quiet:
-        print("written {} task(s) to index file '{}'".format(len(task_classes), index_file))
+        msg = "written {} task(s) to index file '{}'".format(len(entries), index_file)
+        if reused_modules:
+            msg += ", {} unchanged module(s) skipped".format(len(reused_modules))
+        print(msg)
 
     return exit_code
 
 
+def _iter_task_classes():
+    lookup = deque([Task])
+    while lookup:
+        cls = lookup.popleft()
+        lookup.extend(cls.__subclasses__())
+        yield cls
+
+
+def _file_state(path):
+    # returns the modification time and content hash of a file
+    with open(path, "rb") as f:
+        content_hash = hashlib.sha1(f.read()).hexdigest()
+    return [os.path.getmtime(path), content_hash]
+
+
+def _module_files(modids):
+    # returns a dictionary mapping source files of modules to their current states
+    files = {}
+    for modid in modids:
+        path = getattr(sys.modules.get(modid), "__file__", None)
+        if not path:
+            continue
+        if path.endswith((".pyc", ".pyo")) and os.path.exists(path[:-1]):
+            path = path[:-1]
+        if os.path.isfile(path):
+            files[os.path.abspath(path)] = _file_state(path)
+    return files
+
+
+def _files_unchanged(files):
+    # checks if the states of files are unchanged, comparing hashes only when mtimes differ
+    for path, (mtime, content_hash) in six.iteritems(files):
+        if not os.path.isfile(path):
+            return False
+        if os.path.getmtime(path) == mtime:
+            continue
+        if _file_state(path)[1] != content_hash:
+            return False
+    return True
+
+
+# binary index layout (little endian):
+# - header: magic (8s), number of buckets (I), number of entries (I), offset of the json encoded
+#   meta data (Q), size of the meta data (Q)
+# - hash table: one entry offset (Q) per bucket with 0 denoting empty buckets, and the bucket of a
+#   task family being the crc32 checksum of its utf-8 bytes modulo the number of buckets and
+#   collisions resolved through linear probing
+# - entries: sizes (HHI) of task family, module id and space-separated parameters followed by their
+#   utf-8 bytes
+# - meta data for incremental indexing
+_binary_index_magic = b"LAWIDX01"
+_binary_index_header = struct.Struct("<8sIIQQ")
+_binary_index_bucket = struct.Struct("<Q")
+_binary_index_entry = struct.Struct("<HHI")
+
+
+def get_binary_index_file(index_file=None):
+    """
+    Returns the path of the binary index file that corresponds to the human-readable *index_file*.
+    When *None*, the *index_file* refers to the default as defined in :py:mod:`law.config`.
+    """
+    if index_file is None:
+        index_file = Config.instance().get_expanded("core", "index_file")
+    return index_file + ".bin"
+
+
+def write_binary_index(path, entries, meta=None):
+    """
+    Writes index *entries*, given as 3-tuples containing module id, task family and a list of
+    parameter names, into a binary index file at *path* that can be read with
+    :py:func:`read_task_from_binary_index`. *meta* can be a json serializable object that is stored
+    in addition.
+    """
+    # build entry records
+    records = []
+    for modid, task_family, params in entries:
+        data = [task_family.encode("utf-8"), modid.encode("utf-8"), " ".join(params).encode("utf-8")]
+        records.append((data[0], _binary_index_entry.pack(*map(len, data)) + b"".join(data)))
+
+    # build the hash table with a load factor of at most 0.5
+    n_buckets = max(2 * len(records), 1)
+    buckets = [0] * n_buckets
+    offset = _binary_index_header.size + n_buckets * _binary_index_bucket.size
+    for family, record in records:
+        i = (zlib.crc32(family) & 0xffffffff) % n_buckets
+        while buckets[i]:
+            i = (i + 1) % n_buckets
+        buckets[i] = offset
+        offset += len(record)
+
+    meta_data = json.dumps(meta or {}).encode("utf-8")
+    header = _binary_index_header.pack(_binary_index_magic, n_buckets, len(records), offset,
+        len(meta_data))
+
+    # write to a temporary file first and move it to make the update atomic
+    makedirs(os.path.dirname(path))
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"".join(_binary_index_bucket.pack(b) for b in buckets))
+        f.write(b"".join(record for _, record in records))
+        f.write(meta_data)
+    os.rename(tmp_path, path)
+
+
+def _read_binary_index(path, func):
+    # opens the binary index file at path as a memory map, checks its header and calls func with
+    # the map and the header values, returns None when the file is missing or invalid
+    if not os.path.isfile(path) or os.path.getsize(path) < _binary_index_header.size:
+        return None
+
+    with open(path, "rb") as f:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = _binary_index_header.unpack_from(m, 0)
+            if header[0] != _binary_index_magic:
+                return None
+            return func(m, *header[1:])
+        finally:
+            m.close()
+
+
+def read_task_from_binary_index(task_family, path=None):
+    """
+    Returns module id, task family and space-separated parameters in a tuple for a task given by
+    *task_family* from the binary index file at *path*, using a single hash table lookup. When
+    *None*, *path* refers to the binary version of the default index file as defined in
+    :py:mod:`law.config`. Returns *None* when the task could not be found or the file does not
+    exist.
+    """
+    if path is None:
+        path = get_binary_index_file()
+
+    family = task_family.encode("utf-8")
+
+    def lookup(m, n_buckets, n_entries, meta_offset, meta_size):
+        i = (zlib.crc32(family) & 0xffffffff) % n_buckets
+        for _ in six.moves.range(n_buckets):
+            offset = _binary_index_bucket.unpack_from(m, _binary_index_header.size + i * 8)[0]
+            if not offset:
+                break
+            n_family, n_modid, n_params = _binary_index_entry.unpack_from(m, offset)
+            offset += _binary_index_entry.size
+            if m[offset:offset + n_family] == family:
+                offset += n_family
+                modid = m[offset:offset + n_modid].decode("utf-8")
+                offset += n_modid
+                params = m[offset:offset + n_params].decode("utf-8")
+                return modid, task_family, params
+            i = (i + 1) % n_buckets
+        return None
+
+    return _read_binary_index(path, lookup)
+
+
+def read_binary_index_meta(path=None):
+    """
+    Returns the meta data stored in the binary index file at *path*, or *None* when the file does not
+    exist. When *None*, *path* refers to the binary version of the default index file as defined in
+    :py:mod:`law.config`.
+    """
+    if path is None:
+        path = get_binary_index_file()
+
+    def read_meta(m, n_buckets, n_entries, meta_offset, meta_size):
+        return json.loads(m[meta_offset:meta_offset + meta_size].decode("utf-8"))
+
+    try:
+        return _read_binary_index(path, read_meta)
+    except ValueError:
+        return None
+
+
 def get_global_parameters(config_names=("core", "scheduler", "worker", "retcode")):
     """
     Returns a list of global, luigi-internal configuration parameters. Each list item is a 4-tuple
@@ -8,8 +8,10 @@
 import os
 import sys
 
+import law.trace
 from law.config import Config
 from law.task.base import Task
+from law.cli.index import get_binary_index_file, read_task_from_binary_index
 from law.util import abort
 from law.logger import get_logger
 
@@ -38,6 +40,16 @@ def setup_parser(sub_parsers):
         nargs="*",
         help="task parameters",
     )
+    parser.add_argument(
+        "--law-trace",
+        nargs="?",
+        const="-",
+        metavar="OUTPUT",
+        help="trace internal hot paths and write the trace to OUTPUT at exit, using the Chrome "
+        "trace format for files ending with '.json' and a text summary otherwise; prints the "
+        "summary to stderr when no OUTPUT is given; must be placed after the task family; named "
+        "with a 'law-' prefix to not collide with task parameters",
+    )
 
 
 def execute(args, argv):
@@ -87,23 +99,63 @@ def execute(args, argv):
             raise error
         abort("task '{}' not found".format(args.task_family))
 
+    # enable tracing when requested
+    luigi_argv = [task_family] + argv[3:]
+    trace_output = pop_trace_arg(luigi_argv)
+    if trace_output:
+        cfg = Config.instance()
+        if trace_output == "-":
+            trace_output = cfg.get_expanded("trace", "output", None) or trace_output
+        law.trace.enable(output=trace_output, fmt=cfg.get_expanded("trace", "format", None))
+
     # run luigi
     from luigi.cmdline import luigi_run
     sys.argv[0] += " run"
-    luigi_run([task_family] + argv[3:])
+    luigi_run(luigi_argv)
+
+
+def pop_trace_arg(argv):
+    """
+    Removes the ``--law-trace [OUTPUT]`` (or ``--law-trace=OUTPUT``) argument from *argv* in-place
+    and returns the *OUTPUT*, or ``"-"`` when no output is given. *None* is returned when the
+    argument is not present. Task parameters such as ``--trace`` are not affected.
+    """
+    for i, arg in enumerate(list(argv)):
+        if arg == "--law-trace":
+            argv.pop(i)
+            if i < len(argv) and not argv[i].startswith("-"):
+                return argv.pop(i)
+            return "-"
+        if arg.startswith("--law-trace="):
+            argv.pop(i)
+            return arg[len("--law-trace="):] or "-"
+
+    return None
 
 
 def read_task_from_index(task_family, index_file=None):
     """
     Returns module id, task family and space-separated parameters in a tuple for a task given by
     *task_family* from the *index_file*. When *None*, the *index_file* refers to the default as
-    defined in :py:mod:`law.config`. Returns *None* when the task could not be found.
+    defined in :py:mod:`law.config`. The lookup is done in the corresponding binary index file
+    (see :py:func:`law.cli.index.read_task_from_binary_index`) if it is up to date, and otherwise
+    through the lines of the *index_file*. Returns *None* when the task could not be found.
     """
     # read task information from the index file given a task family
     if index_file is None:
         cfg = Config.instance()
         index_file = cfg.get_expanded("core", "index_file")
 
+    # prefer the binary index when it is up to date
+    binary_index_file = get_binary_index_file(index_file)
+    if (
+        os.path.exists(binary_index_file) and
+        os.path.getmtime(binary_index_file) >= os.path.getmtime(index_file)
+    ):
+        info = read_task_from_binary_index(task_family, binary_index_file)
+        if info:
+            return info
+
     # open and go through lines
     with open(index_file, "r") as f:
         for line in f.readlines():
@@ -9,7 +9,7 @@ __all__ = [  # noqa
     "getfloat", "getboolean", "get_default", "get_expanded", "get_expanded_int",
     "get_expanded_float", "get_expanded_bool", "get_expanded_boolean", "is_missing_or_none",
     "find_option", "add_section", "has_section", "remove_section", "set", "has_option",
-    "remove_option",
+    "remove_option", "invalidate_memo", "memo_stats",
 ]
 
 
@@ -29,6 +29,9 @@ this_dir = os.path.dirname(os.path.abspath(__file__))
 
 _set = set
 
+# placeholder for default values in memoized config lookups
+_memo_default = object()
+
 
 def law_home_path(*paths):
     home = os.getenv("LAW_HOME") or os.path.expandvars(os.path.expanduser("$HOME/.law"))
@@ -65,10 +68,22 @@ class Config(ConfigParser):
 
         List of configuration files that are checked during setup (unless *skip_fallbacks* is
         *True*). When a file exists, the check is stopped. Therefore, the order is important here.
+
+    .. py:classattribute:: memoize
+
+        type: bool
+
+        Whether results of :py:meth:`get_default` (and all methods based on it) are memoized per
+        combination of section, option, type and lookup flags. The memo is invalidated whenever the
+        config is changed, e.g. through :py:meth:`set`, :py:meth:`update`, :py:meth:`include` or
+        :py:meth:`sync_env`. Values that depend on environment variable or user expansion are never
+        memoized. See :py:meth:`memo_stats` for hit rates.
     """
 
     _instance = None
 
+    memoize = True
+
     class Deferred(object):
         """
         Wrapper around callables representing deferred options.
@@ -108,6 +123,8 @@ class Config(ConfigParser):
             "interactive_line_breaks": True,
             "interactive_line_width": 0,
             "interactive_status_skip_seen": False,
+            "interactive_status_threads": 4,
+            "resource_accounting_interval": 1.0,
         },
         "target": {
             "colored_repr": False,
@@ -132,6 +149,21 @@ class Config(ConfigParser):
             "job_file_dir": os.getenv("LAW_JOB_FILE_DIR") or tempfile.gettempdir(),
             "job_file_dir_mkdtemp": True,
             "job_file_dir_cleanup": False,
+            "job_query_broker": False,
+            "job_query_broker_window": 600.0,
+            "job_query_broker_max_age": 60.0,
+            "job_query_broker_dir": None,
+            "job_scheduling_policy": "fifo",
+            "job_fair_share_slots": None,
+            "job_fair_share_file": None,
+            "job_runtime_history_dir": law_home_path("runtime_history"),
+            "job_heartbeat_interval": 60.0,
+            "job_heartbeat_stall_time": 600.0,
+        },
+        "trace": {
+            "enabled": False,
+            "output": None,
+            "format": None,
         },
         "notifications": {
             "mail_recipient": None,
@@ -197,6 +229,10 @@ class Config(ConfigParser):
     def __init__(self, config_file="", skip_defaults=False, skip_fallbacks=False,
             skip_includes=False, skip_env_sync=False, skip_luigi_sync=False,
             skip_resolve_deferred=False):
+        # memo of get_default lookups and counters, to be setup before the parser is initialized
+        self._memo = {}
+        self._memo_counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
         ConfigParser.__init__(self, allow_no_value=True)
 
         # lookup to correct config file
@@ -299,6 +335,47 @@ class Config(ConfigParser):
         raise ValueError("unknown 'type' argument ({}), must be 'str', 'int', 'float', or "
             "'bool'".format(type))
 
+    def invalidate_memo(self):
+        """
+        Clears the memo of :py:meth:`get_default` lookups. This is done automatically whenever the
+        config is changed through :py:meth:`set` (and hence :py:meth:`update`, :py:meth:`include`
+        and :py:meth:`sync_env`), when sections or options are added or removed, and when files are
+        read, but needs to be invoked manually when the underlying sections are altered directly.
+        """
+        if self._memo:
+            self._memo.clear()
+            self._memo_counts["invalidations"] += 1
+
+    def memo_stats(self):
+        """
+        Returns a dictionary with the number of ``"hits"``, ``"misses"`` and ``"invalidations"`` of
+        the memo of :py:meth:`get_default` lookups, its current ``"size"``, and the ``"hit_rate"``.
+        """
+        stats = dict(self._memo_counts)
+        n = stats["hits"] + stats["misses"]
+        stats["size"] = len(self._memo)
+        stats["hit_rate"] = (float(stats["hits"]) / n) if n else 0.0
+        return stats
+
+    def _read(self, *args, **kwargs):
+        self.invalidate_memo()
+        return ConfigParser._read(self, *args, **kwargs)
+
+    def add_section(self, section):
+        """"""
+        self.invalidate_memo()
+        return ConfigParser.add_section(self, section)
+
+    def remove_section(self, section):
+        """"""
+        self.invalidate_memo()
+        return ConfigParser.remove_section(self, section)
+
+    def remove_option(self, section, option):
+        """"""
+        self.invalidate_memo()
+        return ConfigParser.remove_option(self, section, option)
+
     def optionxform(self, option):
         """"""
         return option
@@ -351,6 +428,8 @@ class Config(ConfigParser):
             else:
                 value = str(value)
 
+        self.invalidate_memo()
+
         return ConfigParser.set(self, section, option, value)
 
     def update(self, data, overwrite=True, overwrite_sections=None, overwrite_options=None):
@@ -417,7 +496,49 @@ class Config(ConfigParser):
 
         When *default_when_none* is *True*, a *default* value is provided, and the option was found
         but its value is *None* or ``"None"`` (case-insensitive), the *default* is returned.
+
+        Results are memoized unless :py:attr:`memoize` is *False*.
         """  # noqa
+        default_set = default != no_value
+
+        # use the memo when enabled, not resolving a reference and the type is hashable
+        key = None
+        if self.memoize and _skip_refs is None:
+            key = (section, option, type, expand_vars, expand_user, split_csv, dereference,
+                default_when_none, default_set)
+            try:
+                value = self._memo.get(key, no_value)
+            except TypeError:
+                key = None
+                value = no_value
+            if value is not no_value:
+                self._memo_counts["hits"] += 1
+                if value is _memo_default:
+                    return default
+                return list(value) if split_csv else value
+
+        # when memoizing, resolve lookups falling back to the default with a placeholder that is
+        # replaced after saving the result, and track whether the value depends on the environment
+        state = {"volatile": False} if key else None
+        value = self._get_default(section, option, default=_memo_default if key and default_set
+            else default, type=type, expand_vars=expand_vars, expand_user=expand_user,
+            split_csv=split_csv, dereference=dereference, default_when_none=default_when_none,
+            _skip_refs=_skip_refs, _state=state)
+
+        if key:
+            self._memo_counts["misses"] += 1
+            if not state["volatile"]:
+                self._memo[key] = value
+            if value is _memo_default:
+                return default
+            if split_csv:
+                return list(value)
+
+        return value
+
+    def _get_default(self, section, option, default=no_value, type=None, expand_vars=False,
+            expand_user=False, split_csv=False, dereference=True, default_when_none=True,
+            _skip_refs=None, _state=None):
         # return the default when either the section or the option does not exist
         default_set = default != no_value
         if (not self.has_section(section) or not self.has_option(section, option)) and default_set:
@@ -429,6 +550,11 @@ class Config(ConfigParser):
         # handle variable expansion and dereferencing when value is a string
         # (which should always be the case, but subclasses might overwrite get())
         if isinstance(value, six.string_types):
+            # values that are subject to expansion depend on the environment
+            if _state is not None and (expand_vars or expand_user):
+                if "$" in value or "~" in value:
+                    _state["volatile"] = True
+
             # expand
             value = self._expand_path(value, expand_vars=expand_vars, expand_user=expand_user)
 
@@ -444,10 +570,10 @@ class Config(ConfigParser):
                     _skip_refs.append(ref)
 
                     # return the referenced value
-                    return self.get_default(*ref, default=default, type=type,
+                    return self._get_default(*ref, default=default, type=type,
                         expand_vars=expand_vars, expand_user=expand_user, split_csv=split_csv,
                         dereference=dereference, default_when_none=default_when_none,
-                        _skip_refs=_skip_refs)
+                        _skip_refs=_skip_refs, _state=_state)
 
         # interpret None and "None" as missing?
         if default_when_none and default_set:
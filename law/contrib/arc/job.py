@@ -35,6 +35,9 @@ class ARCJobManager(BaseJobManager):
     chunk_size_cleanup = _cfg.get_expanded_int("job", "arc_chunk_size_cleanup")
     chunk_size_query = _cfg.get_expanded_int("job", "arc_chunk_size_query")
 
+    # instance attributes that have an effect on status queries
+    query_broker_attributes = ("job_list", "ce")
+
     submission_job_id_cre = re.compile("^Job submitted with jobid: (.+)$")
     status_block_cre = re.compile(r"\s*([^:]+): (.*)\n")
     status_invalid_job_cre = re.compile("^.+: Job not found in job list: (.+)$")
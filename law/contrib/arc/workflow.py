@@ -50,13 +50,13 @@ class ARCWorkflowProxy(BaseRemoteWorkflowProxy):
         task = self.task
 
         # the file postfix is pythonic range made from branches, e.g. [0, 1, 2, 4] -> "_0To5"
-        postfix = "_{}To{}".format(branches[0], branches[-1] + 1)
+        postfix = self.job_file_postfix(job_num, branches)
 
         # create the config
         c = self.job_file_factory.get_config()
         c.input_files = DeprecatedInputFiles()
         c.output_files = []
-        c.render_variables = {}
+        c.render_variables = self.heartbeat_render_variables()
         c.custom_content = []
 
         # get the actual wrapper file that will be executed by the remote job
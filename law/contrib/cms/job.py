@@ -109,7 +109,7 @@ class CrabJobManager(BaseJobManager):
 
         return groups
 
-    def _apply_group(self, func, result_type, group_func, job_objs, *args, **kwargs):
+    def _iter_group(self, func, group_func, job_objs, *args, **kwargs):
         # when job_objs is a string or a sequence of strings, interpret them as project dirs, read
         # their log files to extract task names, build actual job ids and forward them
         if func != self.submit:
@@ -132,9 +132,8 @@ class CrabJobManager(BaseJobManager):
                     job_ids.append(self.JobId(crab_num, log_data["task_name"], proj_dir))
             job_objs = job_ids
 
-        return super(CrabJobManager, self)._apply_group(
+        return super(CrabJobManager, self)._iter_group(
             func,
-            result_type,
             group_func,
             job_objs,
             *args,
@@ -91,7 +91,7 @@ class CrabWorkflowProxy(BaseRemoteWorkflowProxy):
         c = self.job_file_factory.get_config()
         c.input_files = {}
         c.output_files = []
-        c.render_variables = {}
+        c.render_variables = self.heartbeat_render_variables()
         c.custom_content = []
 
         # get remote job file, force remote rendering
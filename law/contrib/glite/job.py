@@ -34,6 +34,9 @@ class GLiteJobManager(BaseJobManager):
     chunk_size_cleanup = _cfg.get_expanded_int("job", "glite_chunk_size_cleanup")
     chunk_size_query = _cfg.get_expanded_int("job", "glite_chunk_size_query")
 
+    # instance attributes that have an effect on status queries
+    query_broker_attributes = ("ce", "delegation_id")
+
     submission_job_id_cre = re.compile(r"^https?\:\/\/.+\:\d+\/.+")
     status_block_cre = re.compile(r"(\w+)\s*\=\s*\[([^\]]*)\]")
 
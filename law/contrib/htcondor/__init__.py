@@ -6,13 +6,15 @@ HTCondor contrib functionality.
 """
 
 __all__ = [
-    "get_htcondor_version",
-    "HTCondorJobManager", "HTCondorJobFileFactory",
+    "get_htcondor_version", "import_htcondor",
+    "HTCondorJobManager", "HTCondorBindingsJobManager", "HTCondorJobFileFactory",
     "HTCondorWorkflow",
 ]
 
 
 # provisioning imports
-from law.contrib.htcondor.util import get_htcondor_version
-from law.contrib.htcondor.job import HTCondorJobManager, HTCondorJobFileFactory
+from law.contrib.htcondor.util import get_htcondor_version, import_htcondor
+from law.contrib.htcondor.job import (
+    HTCondorJobManager, HTCondorBindingsJobManager, HTCondorJobFileFactory,
+)
 from law.contrib.htcondor.workflow import HTCondorWorkflow
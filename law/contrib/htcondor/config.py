@@ -16,5 +16,7 @@ def config_defaults(default_config):
             "htcondor_chunk_size_cancel": 25,
             "htcondor_chunk_size_query": 25,
             "htcondor_merge_job_files": True,
+            "htcondor_query_mode": "jobs",
+            "htcondor_use_bindings": False,
         },
     }
@@ -4,7 +4,7 @@
 HTCondor job manager. See https://research.cs.wisc.edu/htcondor.
 """
 
-__all__ = ["HTCondorJobManager", "HTCondorJobFileFactory"]
+__all__ = ["HTCondorJobManager", "HTCondorBindingsJobManager", "HTCondorJobFileFactory"]
 
 
 import os
@@ -12,7 +12,11 @@ import stat
 import time
 import re
 import tempfile
+import threading
 import subprocess
+from collections import OrderedDict
+
+import six
 
 from law.config import Config
 from law.job.base import BaseJobManager, BaseJobFileFactory, JobInputFile, DeprecatedInputFiles
@@ -20,7 +24,9 @@ from law.target.file import get_path
 from law.util import make_list, make_unique, quote_cmd, interruptable_popen
 from law.logger import get_logger
 
-from law.contrib.htcondor.util import get_htcondor_version
+from law.contrib.htcondor.util import (
+    get_htcondor_version, parse_htcondor_version, import_htcondor,
+)
 
 
 logger = get_logger(__name__)
@@ -51,10 +57,22 @@ class HTCondorJobManager(BaseJobManager):
     chunk_size_cancel = _cfg.get_expanded_int("job", "htcondor_chunk_size_cancel")
     chunk_size_query = _cfg.get_expanded_int("job", "htcondor_chunk_size_query")
 
+    # instance attributes that have an effect on status queries
+    query_broker_attributes = ("pool", "scheduler", "user", "query_mode", "constraint")
+
+    # status query mode, "jobs", "cluster" or "constraint"
+    query_modes = ("jobs", "cluster", "constraint")
+    query_mode = _cfg.get_expanded("job", "htcondor_query_mode")
+    job_grouping_query = query_mode in ("cluster", "constraint")
+
+    # ClassAds to fetch in queries, the order is relevant for parsing autoformat outputs
+    query_ads = ["JobStatus", "ExitCode", "ExitStatus", "HoldReason", "RemoveReason"]
+
     submission_job_id_cre = re.compile(r"^(\d+) job\(s\) submitted to cluster (\d+)\.$")
     long_block_cre = re.compile(r"(\w+) \= \"?([^\"\n]*)\"?\n")
 
-    def __init__(self, pool=None, scheduler=None, user=None, threads=1):
+    def __init__(self, pool=None, scheduler=None, user=None, query_mode=None, constraint=None,
+            threads=1):
         super(HTCondorJobManager, self).__init__()
 
         self.pool = pool
@@ -62,13 +80,34 @@ class HTCondorJobManager(BaseJobManager):
         self.user = user
         self.threads = threads
 
+        # query mode and an optional default constraint for grouped queries
+        if query_mode is not None:
+            if query_mode not in self.query_modes:
+                raise ValueError("unknown htcondor query mode '{}', valid values are {}".format(
+                    query_mode, ",".join(self.query_modes)))
+            self.query_mode = query_mode
+            self.job_grouping_query = query_mode in ("cluster", "constraint")
+        self.constraint = constraint
+
+        # status data of jobs that already left the queue, mapped to job ids, so that the history
+        # is queried only once per job in grouped queries
+        self._history_data = {}
+        self._history_lock = threading.Lock()
+
         # determine the htcondor version once
-        self.htcondor_version = get_htcondor_version()
+        self.htcondor_version = self.get_htcondor_version()
 
         # flags for versions with some important changes
         self.htcondor_ge_v833 = self.htcondor_version and self.htcondor_version >= (8, 3, 3)
         self.htcondor_ge_v856 = self.htcondor_version and self.htcondor_version >= (8, 5, 6)
 
+    def get_htcondor_version(self):
+        """
+        Returns the version of the HTCondor installation in a 3-tuple, or *None* when it cannot be
+        determined.
+        """
+        return get_htcondor_version()
+
     def cleanup(self, *args, **kwargs):
         raise NotImplementedError("HTCondorJobManager.cleanup is not implemented")
 
@@ -305,6 +344,8 @@ class HTCondorJobManager(BaseJobManager):
             cmd += ["-pool", pool]
         if scheduler:
             cmd += ["-name", scheduler]
+        if user:
+            cmd += ["-constraint", self.user_constraint(user)]
         cmd += ["-long"]
         # since v8.3.3 one can limit the number of jobs to query
         if self.htcondor_ge_v833:
@@ -337,6 +378,8 @@ class HTCondorJobManager(BaseJobManager):
                 cmd += ["-pool", pool]
             if scheduler:
                 cmd += ["-name", scheduler]
+            if user:
+                cmd += ["-constraint", self.user_constraint(user)]
             cmd += ["-long"]
             # since v8.3.3 one can limit the number of jobs to query
             if self.htcondor_ge_v833:
@@ -375,6 +418,195 @@ class HTCondorJobManager(BaseJobManager):
 
         return query_data if chunking else query_data[job_id]
 
+    @classmethod
+    def job_ids_constraint(cls, job_ids):
+        """
+        Returns a constraint expression selecting all *job_ids*.
+        """
+        groups = OrderedDict()
+        for job_id in job_ids:
+            cluster_id, proc_id = job_id.split(".", 1)
+            groups.setdefault(cluster_id, []).append(proc_id)
+
+        return " || ".join(
+            "(ClusterId == {} && ({}))".format(
+                cluster_id,
+                " || ".join("ProcId == {}".format(proc_id) for proc_id in proc_ids),
+            )
+            for cluster_id, proc_ids in groups.items()
+        )
+
+    @classmethod
+    def user_constraint(cls, user):
+        """
+        Returns a constraint expression selecting jobs owned by *user*.
+        """
+        return "Owner == \"{}\"".format(user)
+
+    @classmethod
+    def query_constraint(cls, cluster_or_constraint, user=None):
+        """
+        Returns a constraint expression selecting jobs given by *cluster_or_constraint*, which is
+        either a cluster id or a constraint expression, that are optionally owned by *user*.
+        """
+        constraint = str(cluster_or_constraint)
+        if constraint.isdigit():
+            constraint = "ClusterId == {}".format(constraint)
+        if user:
+            constraint = "({}) && {}".format(constraint, cls.user_constraint(user))
+        return constraint
+
+    def group_job_ids(self, job_ids):
+        groups = OrderedDict()
+
+        # group by cluster id
+        for job_id in job_ids:
+            cluster_id = job_id.split(".", 1)[0]
+            if cluster_id not in groups:
+                groups[cluster_id] = []
+            groups[cluster_id].append(job_id)
+
+        return groups
+
+    def query_group(self, job_ids, threads=None, callback=None, constraint=None, **kwargs):
+        """
+        Queries the status of all *job_ids* in groups. When a *constraint* (defaulting to the
+        instance attribute) is given and the query mode is ``"constraint"``, a single query with
+        that constraint is performed. Otherwise, job ids are grouped by their cluster and one query
+        is performed per cluster. In both cases, jobs that left the queue are looked up in the
+        history only once and their final status is remembered for subsequent calls. All other
+        *kwargs* are forwarded to :py:meth:`query_bulk`.
+        """
+        if constraint is None:
+            constraint = self.constraint
+
+        if constraint and self.query_mode == "constraint":
+            group_func = lambda job_ids: OrderedDict([(constraint, list(job_ids))])
+        else:
+            group_func = self.group_job_ids
+
+        return self._apply_group(
+            func=self.query_bulk,
+            result_type=dict,
+            group_func=group_func,
+            job_objs=job_ids,
+            threads=threads,
+            callback=callback,
+            **kwargs  # noqa
+        )
+
+    def query_bulk(self, cluster_or_constraint, job_ids, pool=None, scheduler=None, user=None,
+            silent=False, _processes=None):
+        """
+        Queries the status of all jobs selected by *cluster_or_constraint*, which is either a
+        cluster id or a ClassAd constraint expression, and optionally owned by *user*, and returns a
+        dictionary mapping the requested *job_ids* to status data. Jobs missing in the queue are
+        looked up in the history, restricted to their ids. Jobs that are neither found in the queue
+        nor in the history are marked as failed.
+        """
+        # default arguments
+        if pool is None:
+            pool = self.pool
+        if scheduler is None:
+            scheduler = self.scheduler
+        if user is None:
+            user = self.user
+
+        # jobs whose final state is already known need not be queried again
+        with self._history_lock:
+            query_data = {
+                job_id: self._history_data[job_id]
+                for job_id in job_ids
+                if job_id in self._history_data
+            }
+        if len(query_data) == len(job_ids):
+            return query_data
+
+        # helper to build condor_q and condor_history commands with autoformatted, tab-separated
+        # outputs, prefixed by the job id
+        def build_cmd(executable, constraint, limit=None):
+            cmd = [executable]
+            if str(constraint).isdigit():
+                cmd.append(str(constraint))
+            else:
+                cmd += ["-constraint", str(constraint)]
+            if pool:
+                cmd += ["-pool", pool]
+            if scheduler:
+                cmd += ["-name", scheduler]
+            if limit and self.htcondor_ge_v833:
+                cmd += ["-limit", str(limit)]
+            cmd += ["-af:jt"] + self.query_ads
+            return quote_cmd(cmd)
+
+        cmd = build_cmd("condor_q", self.query_constraint(cluster_or_constraint, user=user)
+            if user else cluster_or_constraint)
+        logger.debug("query htcondor job(s) with command '{}'".format(cmd))
+        code, out, err = interruptable_popen(cmd, shell=True, executable="/bin/bash",
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, kill_timeout=2, processes=_processes)
+
+        # handle errors
+        if code != 0:
+            if silent:
+                return None
+            raise Exception("queue query of htcondor job(s) '{}' failed with code {}:"
+                "\n{}".format(cluster_or_constraint, code, err))
+
+        # parse the output, only considering requested jobs
+        query_data.update(
+            (job_id, data)
+            for job_id, data in six.iteritems(self.parse_af_output(out))
+            if job_id in job_ids
+        )
+
+        # jobs that are missing in the queue are looked up in the history once
+        missing_ids = [job_id for job_id in job_ids if job_id not in query_data]
+        if missing_ids:
+            history_constraint = self.query_constraint(self.job_ids_constraint(missing_ids),
+                user=user)
+            cmd = build_cmd("condor_history", history_constraint, limit=len(missing_ids))
+            logger.debug("query htcondor job history with command '{}'".format(cmd))
+            code, out, err = interruptable_popen(cmd, shell=True, executable="/bin/bash",
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, kill_timeout=2,
+                processes=_processes)
+
+            # handle errors
+            if code != 0:
+                if silent:
+                    return None
+                raise Exception("history query of htcondor job(s) '{}' failed with code {}:"
+                    "\n{}".format(cluster_or_constraint, code, err))
+
+            # parse the output, remember and update query data
+            history_data = self.parse_af_output(out)
+            with self._history_lock:
+                for job_id in missing_ids:
+                    if job_id in history_data:
+                        self._history_data[job_id] = query_data[job_id] = history_data[job_id]
+
+        # mark jobs that were not found at all as failed
+        for job_id in job_ids:
+            if job_id not in query_data:
+                query_data[job_id] = self.job_status_dict(job_id=job_id, status=self.FAILED,
+                    error="job not found in query response")
+
+        return query_data
+
+    @classmethod
+    def parse_af_output(cls, out):
+        # parse autoformatted, tab-separated lines with the job id followed by values of query_ads
+        query_data = {}
+        n_ads = len(cls.query_ads)
+        for line in out.strip().split("\n"):
+            values = line.strip().split("\t", n_ads)
+            if len(values) != n_ads + 1:
+                continue
+            job_id = values[0].strip()
+            data = dict(zip(cls.query_ads, (v.strip() for v in values[1:])))
+            query_data[job_id] = cls._status_dict_from_ads(job_id, data)
+
+        return query_data
+
     @classmethod
     def parse_long_output(cls, out):
         # retrieve information per block mapped to the job id
@@ -389,37 +621,42 @@ class HTCondorJobManager(BaseJobManager):
                 continue
             job_id = "{ClusterId}.{ProcId}".format(**data)
 
-            # get the job status code
-            status = cls.map_status(data.get("JobStatus"))
-
-            # get the exit code
-            code = int(data.get("ExitCode") or data.get("ExitStatus") or "0")
-
-            # get the error message, undefined counts as None
-            error = data.get("HoldReason", "undefined")
-            if error.lower() == "undefined":
-                error = None
-            remove_error = data.get("RemoveReason", "undefined")
-            if remove_error.lower() == "undefined":
-                remove_error = None
-            # prefer remove error
-            if remove_error:
-                error = remove_error
-
-            # handle inconsistencies between status, code and the presence of an error message
-            if code != 0:
-                if status != cls.FAILED:
-                    status = cls.FAILED
-                    if not error:
-                        error = "job status set to '{}' due to non-zero exit code {}".format(
-                            cls.FAILED, code)
-
             # store it
-            query_data[job_id] = cls.job_status_dict(job_id=job_id, status=status, code=code,
-                error=error)
+            query_data[job_id] = cls._status_dict_from_ads(job_id, data)
 
         return query_data
 
+    @classmethod
+    def _status_dict_from_ads(cls, job_id, data):
+        # get the job status code
+        status = cls.map_status(data.get("JobStatus"))
+
+        # get the exit code, undefined values are skipped
+        defined = lambda attr: (data.get(attr) or "undefined").lower() != "undefined"
+        code = int(data["ExitCode"] if defined("ExitCode") else (
+            data["ExitStatus"] if defined("ExitStatus") else "0"))
+
+        # get the error message, undefined counts as None
+        error = data.get("HoldReason", "undefined")
+        if error.lower() == "undefined":
+            error = None
+        remove_error = data.get("RemoveReason", "undefined")
+        if remove_error.lower() == "undefined":
+            remove_error = None
+        # prefer remove error
+        if remove_error:
+            error = remove_error
+
+        # handle inconsistencies between status, code and the presence of an error message
+        if code != 0:
+            if status != cls.FAILED:
+                status = cls.FAILED
+                if not error:
+                    error = "job status set to '{}' due to non-zero exit code {}".format(
+                        cls.FAILED, code)
+
+        return cls.job_status_dict(job_id=job_id, status=status, code=code, error=error)
+
     @classmethod
     def map_status(cls, status_flag):
         # see http://pages.cs.wisc.edu/~adesmet/status.html
@@ -435,6 +672,316 @@ class HTCondorJobManager(BaseJobManager):
             return cls.FAILED
 
 
+class HTCondorBindingsJobManager(HTCondorJobManager):
+    """
+    Job manager with the same interface as :py:class:`HTCondorJobManager`, but using the htcondor
+    python bindings instead of command line tools. Job files are parsed and submitted within a
+    single schedd transaction via ``Submit.queue_with_itemdata``, queries use projections, and the
+    job history is iterated in a streaming fashion. A *schedd* object can be passed to bypass the
+    lookup via *pool* and *scheduler*, for instance to use a stand-in for tests.
+    """
+
+    queue_cre = re.compile(r"^queue(\s+\d+)?(\s+(.+)\s+from\s*\(\s*)?$", re.IGNORECASE)
+
+    def __init__(self, pool=None, scheduler=None, user=None, query_mode=None, constraint=None,
+            schedd=None, threads=1):
+        super(HTCondorBindingsJobManager, self).__init__(pool=pool, scheduler=scheduler, user=user,
+            query_mode=query_mode, constraint=constraint, threads=threads)
+
+        # schedd objects mapped to (pool, scheduler) pairs
+        self._schedds = {}
+        self._schedds_lock = threading.Lock()
+        if schedd is not None:
+            self._schedds[(pool, scheduler)] = schedd
+
+    def get_htcondor_version(self):
+        # take the version from the bindings instead of running condor_version in a subprocess,
+        # and skip the lookup when they are not available (e.g. when using a stand-in schedd)
+        try:
+            htcondor = import_htcondor()
+        except ImportError:
+            return None
+        return parse_htcondor_version(htcondor.version())
+
+    def get_schedd(self, pool=None, scheduler=None):
+        """
+        Returns a schedd object for a *pool* and *scheduler*, both defaulting to the instance
+        attributes. Objects are cached.
+        """
+        if pool is None:
+            pool = self.pool
+        if scheduler is None:
+            scheduler = self.scheduler
+
+        key = (pool, scheduler)
+        with self._schedds_lock:
+            if key not in self._schedds:
+                htcondor = import_htcondor()
+                if pool or scheduler:
+                    collector = htcondor.Collector(pool) if pool else htcondor.Collector()
+                    if scheduler:
+                        ad = collector.locate(htcondor.DaemonTypes.Schedd, scheduler)
+                    else:
+                        ad = collector.locate(htcondor.DaemonTypes.Schedd)
+                    self._schedds[key] = htcondor.Schedd(ad)
+                else:
+                    self._schedds[key] = htcondor.Schedd()
+
+            return self._schedds[key]
+
+    @classmethod
+    def parse_job_file(cls, job_file):
+        """
+        Parses a *job_file* and returns a list of 3-tuples, each containing the submit description
+        (a dictionary), the number of jobs to queue per item, and a list of item data dictionaries
+        (or *None*) for each queue statement. As in condor_submit, descriptions are accumulated
+        across queue statements.
+        """
+        blocks = []
+        desc = OrderedDict()
+        count, item_vars, items = 1, [], None
+        with open(job_file, "r") as f:
+            for line in f:
+                line = line.strip()
+
+                # collect item data of the current queue statement
+                if items is not None:
+                    if line == ")":
+                        blocks.append((OrderedDict(desc), count, items))
+                        items = None
+                        continue
+                    values = []
+                    for _ in range(len(item_vars) - 1):
+                        m = re.match(r"^([^,\s]+)\s*,?\s*(.*)$", line)
+                        if not m:
+                            break
+                        values.append(m.group(1))
+                        line = m.group(2)
+                    values.append(line)
+                    items.append(OrderedDict(zip(item_vars, values)))
+                    continue
+
+                # skip empty lines and comments
+                if not line or line.startswith("#"):
+                    continue
+
+                # queue statements
+                if line.lower().startswith("queue"):
+                    m = cls.queue_cre.match(line)
+                    if not m:
+                        raise ValueError("unsupported queue statement '{}' in job file {}".format(
+                            line, job_file))
+                    count = int(m.group(1) or 1)
+                    if m.group(3):
+                        item_vars = [v.strip() for v in m.group(3).split(",")]
+                        items = []
+                    else:
+                        blocks.append((OrderedDict(desc), count, None))
+                    continue
+
+                # key-value pairs
+                key, value = line.split("=", 1) if "=" in line else (line, "")
+                desc[key.strip()] = value.strip()
+
+        if items is not None:
+            raise ValueError("unterminated queue statement in job file {}".format(job_file))
+
+        return blocks
+
+    def _submit_blocks(self, schedd, blocks):
+        htcondor = import_htcondor()
+
+        job_ids = []
+
+        def add_job_ids(result):
+            job_ids.extend(
+                "{}.{}".format(result.cluster(), result.first_proc() + i)
+                for i in range(result.num_procs())
+            )
+
+        # use a single transaction when available, otherwise submit block-wise
+        if hasattr(schedd, "transaction"):
+            with schedd.transaction() as txn:
+                for desc, count, items in blocks:
+                    sub = htcondor.Submit(dict(desc))
+                    add_job_ids(sub.queue_with_itemdata(txn, count, items and iter(items)))
+        else:
+            for desc, count, items in blocks:
+                sub = htcondor.Submit(dict(desc))
+                add_job_ids(schedd.submit(sub, count=count, itemdata=items and iter(items)))
+
+        return job_ids
+
+    def _submit_impl_batched(self, job_file, pool=None, scheduler=None, spool=False, retries=0,
+            retry_delay=3, silent=False, _processes=None):
+        # spooling is not supported via bindings, so fallback to the command line tools
+        if spool:
+            return super(HTCondorBindingsJobManager, self)._submit_impl_batched(job_file,
+                pool=pool, scheduler=scheduler, spool=spool, retries=retries,
+                retry_delay=retry_delay, silent=silent, _processes=_processes)
+
+        chunking = isinstance(job_file, (list, tuple))
+        job_files = list(map(str, make_list(job_file)))
+
+        job_ids = self._submit_files(job_files, pool=pool, scheduler=scheduler, retries=retries,
+            retry_delay=retry_delay, silent=silent)
+        if job_ids is None:
+            return None
+
+        return job_ids if chunking else job_ids[0]
+
+    def _submit_impl_grouped(self, job_file, job_files=None, pool=None, scheduler=None, spool=False,
+            retries=0, retry_delay=3, silent=False, _processes=None):
+        # spooling is not supported via bindings, so fallback to the command line tools
+        if spool:
+            return super(HTCondorBindingsJobManager, self)._submit_impl_grouped(job_file,
+                job_files=job_files, pool=pool, scheduler=scheduler, spool=spool, retries=retries,
+                retry_delay=retry_delay, silent=silent, _processes=_processes)
+
+        return self._submit_files([str(job_file)], pool=pool, scheduler=scheduler, retries=retries,
+            retry_delay=retry_delay, silent=silent)
+
+    def _submit_files(self, job_files, pool=None, scheduler=None, retries=0, retry_delay=3,
+            silent=False):
+        # parse all job files, relative paths are resolved relative to the job file directory as
+        # condor_submit would be invoked therein
+        blocks = []
+        for job_file in job_files:
+            for desc, count, items in self.parse_job_file(job_file):
+                if not any(key.lower() == "initialdir" for key in desc):
+                    desc["initialdir"] = os.path.dirname(os.path.abspath(job_file))
+                blocks.append((desc, count, items))
+
+        job_files_repr = ",".join(map(os.path.basename, job_files))
+
+        # define the actual submission in a loop to simplify retries
+        while True:
+            logger.debug("submit htcondor job(s) '{}' via python bindings".format(job_files_repr))
+            try:
+                job_ids = self._submit_blocks(self.get_schedd(pool, scheduler), blocks)
+                if not job_ids:
+                    raise Exception("no job ids returned")
+                return job_ids
+            except Exception as e:
+                err = e
+
+            logger.debug("submission of htcondor job(s) '{}' failed:\n{}".format(
+                job_files_repr, err))
+
+            if retries > 0:
+                retries -= 1
+                time.sleep(retry_delay)
+                continue
+
+            if silent:
+                return None
+
+            raise Exception("submission of htcondor job(s) '{}' failed:\n{}".format(
+                job_files_repr, err))
+
+    def cancel(self, job_id, pool=None, scheduler=None, silent=False, _processes=None):
+        chunking = isinstance(job_id, (list, tuple))
+        job_ids = make_list(job_id)
+
+        logger.debug("cancel htcondor job(s) '{}' via python bindings".format(job_id))
+        try:
+            htcondor = import_htcondor()
+            self.get_schedd(pool, scheduler).act(htcondor.JobAction.Remove, list(job_ids))
+        except Exception as e:
+            if not silent:
+                raise Exception("cancellation of htcondor job(s) '{}' failed:\n{}".format(
+                    job_id, e))
+
+        return {job_id: None for job_id in job_ids} if chunking else None
+
+    def query(self, job_id, pool=None, scheduler=None, user=None, silent=False, _processes=None):
+        chunking = isinstance(job_id, (list, tuple))
+        job_ids = make_list(job_id)
+
+        query_data = self._query_impl(self.job_ids_constraint(job_ids), job_ids, pool=pool,
+            scheduler=scheduler, user=user, silent=silent)
+        if query_data is None:
+            return None
+
+        # single jobs that were not found are considered an error
+        if not chunking and query_data[job_id]["error"] == "job not found in query response":
+            if silent:
+                return None
+            raise Exception("htcondor job(s) '{}' not found in query response".format(job_id))
+
+        return query_data if chunking else query_data[job_id]
+
+    def query_bulk(self, cluster_or_constraint, job_ids, pool=None, scheduler=None, user=None,
+            silent=False, _processes=None):
+        return self._query_impl(self.query_constraint(cluster_or_constraint), job_ids, pool=pool,
+            scheduler=scheduler, user=user, silent=silent)
+
+    def _query_impl(self, constraint, job_ids, pool=None, scheduler=None, user=None,
+            silent=False):
+        if user is None:
+            user = self.user
+        constraint = self.query_constraint(constraint, user=user)
+
+        # jobs whose final state is already known need not be queried again
+        with self._history_lock:
+            query_data = {
+                job_id: self._history_data[job_id]
+                for job_id in job_ids
+                if job_id in self._history_data
+            }
+        if len(query_data) == len(job_ids):
+            return query_data
+
+        projection = ["ClusterId", "ProcId"] + self.query_ads
+        requested_ids = set(job_ids)
+
+        def parse_ads(ads):
+            data = {}
+            for ad in ads:
+                job_id = "{}.{}".format(ad["ClusterId"], ad["ProcId"])
+                if job_id in requested_ids:
+                    ad_data = {attr: str(ad[attr]) for attr in self.query_ads if attr in ad}
+                    data[job_id] = self._status_dict_from_ads(job_id, ad_data)
+            return data
+
+        try:
+            schedd = self.get_schedd(pool, scheduler)
+
+            # query the queue
+            logger.debug("query htcondor job(s) with constraint '{}' via python bindings".format(
+                constraint))
+            query_data.update(parse_ads(schedd.query(constraint=constraint,
+                projection=projection)))
+
+            # jobs that are missing in the queue are looked up in the history once, stopping the
+            # streamed iteration as soon as all of them are found
+            missing_ids = [job_id for job_id in job_ids if job_id not in query_data]
+            if missing_ids:
+                logger.debug("query htcondor job history with constraint '{}' via python "
+                    "bindings".format(constraint))
+                history_constraint = self.query_constraint(self.job_ids_constraint(missing_ids),
+                    user=user)
+                history_data = parse_ads(schedd.history(history_constraint, projection,
+                    len(missing_ids)))
+                with self._history_lock:
+                    for job_id in missing_ids:
+                        if job_id in history_data:
+                            self._history_data[job_id] = query_data[job_id] = history_data[job_id]
+        except Exception as e:
+            if silent:
+                return None
+            raise Exception("query of htcondor job(s) with constraint '{}' failed:\n{}".format(
+                constraint, e))
+
+        # mark jobs that were not found at all as failed
+        for job_id in job_ids:
+            if job_id not in query_data:
+                query_data[job_id] = self.job_status_dict(job_id=job_id, status=self.FAILED,
+                    error="job not found in query response")
+
+        return query_data
+
+
 class HTCondorJobFileFactory(BaseJobFileFactory):
 
     config_attrs = BaseJobFileFactory.config_attrs + [
@@ -4,7 +4,7 @@
 HTCondor utilities.
 """
 
-__all__ = ["get_htcondor_version"]
+__all__ = ["get_htcondor_version", "parse_htcondor_version", "import_htcondor"]
 
 
 import re
@@ -31,11 +31,34 @@ def get_htcondor_version():
             code, out, _ = interruptable_popen("condor_version", shell=True, executable="/bin/bash",
                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
             if code == 0:
-                first_line = out.strip().split("\n")[0]
-                m = re.match(r"^\$CondorVersion: (\d+)\.(\d+)\.(\d+) .+$", first_line.strip())
-                if m:
-                    version = tuple(map(int, m.groups()))
+                version = parse_htcondor_version(out)
 
             _htcondor_version = version
 
     return _htcondor_version
+
+
+def parse_htcondor_version(version_str):
+    """
+    Parses a version string *version_str* as returned by ``condor_version`` or
+    ``htcondor.version()`` and returns the version in a 3-tuple, or *None* when it cannot be parsed.
+    """
+    first_line = version_str.strip().split("\n")[0]
+    m = re.match(r"^\$CondorVersion: (\d+)\.(\d+)\.(\d+) .+$", first_line.strip())
+    return tuple(map(int, m.groups())) if m else None
+
+
+def import_htcondor():
+    """
+    Imports and returns the htcondor python bindings module. An *ImportError* with installation
+    instructions is raised if it is not available.
+    """
+    try:
+        import htcondor
+    except ImportError as e:
+        e.msg = "module 'htcondor' not found, run 'pip install htcondor' to install the htcondor " \
+            "python bindings"
+        e.args = (e.msg,) + e.args[1:]
+        raise
+
+    return htcondor
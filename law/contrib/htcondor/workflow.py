@@ -25,7 +25,9 @@ from law.parameter import NO_STR
 from law.util import no_value, law_src_path, merge_dicts, DotDict, rel_path
 from law.logger import get_logger
 
-from law.contrib.htcondor.job import HTCondorJobManager, HTCondorJobFileFactory
+from law.contrib.htcondor.job import (
+    HTCondorJobManager, HTCondorBindingsJobManager, HTCondorJobFileFactory,
+)
 
 
 logger = get_logger(__name__)
@@ -54,7 +56,7 @@ class HTCondorWorkflowProxy(BaseRemoteWorkflowProxy):
         c = self.job_file_factory.get_config()
         c.input_files = {}
         c.output_files = {}
-        c.render_variables = {}
+        c.render_variables = self.heartbeat_render_variables()
         c.custom_content = []
 
         # get the actual wrapper and job file that will be executed by the remote job
@@ -95,11 +97,11 @@ class HTCondorWorkflowProxy(BaseRemoteWorkflowProxy):
         # the file postfix is pythonic range made from branches, e.g. [0, 1, 2, 4] -> "_0To5"
         if grouped_submission:
             c.postfix = [
-                "_{}To{}".format(branches[0], branches[-1] + 1)
-                for branches in submit_jobs.values()
+                self.job_file_postfix(job_num, branches)
+                for job_num, branches in submit_jobs.items()
             ]
         else:
-            c.postfix = "_{}To{}".format(branches[0], branches[-1] + 1)
+            c.postfix = self.job_file_postfix(job_num, branches)
 
         # job script arguments per job number
         def get_job_args(job_num, branches):
@@ -167,6 +169,9 @@ class HTCondorWorkflowProxy(BaseRemoteWorkflowProxy):
         log_dir = cast_dir(log_dir_orig) if log_dir_orig else output_dir
         log_dir_is_local = isinstance(log_dir, LocalDirectoryTarget)
 
+        # add the task id as a custom job attribute to allow constraint-based status queries
+        c.custom_content.append(("+LawTaskId", "\"{}\"".format(task.live_task_id)))
+
         # task hook
         if grouped_submission:
             c = task.htcondor_job_config(c, list(submit_jobs.keys()), list(submit_jobs.values()))
@@ -346,10 +351,15 @@ class HTCondorWorkflow(BaseRemoteWorkflow):
         return ""
 
     def htcondor_job_manager_cls(self):
+        if Config.instance().get_expanded_bool("job", "htcondor_use_bindings"):
+            return HTCondorBindingsJobManager
         return HTCondorJobManager
 
     def htcondor_create_job_manager(self, **kwargs):
         kwargs = merge_dicts(self.htcondor_job_manager_defaults, kwargs)
+        # default constraint selecting jobs of this workflow in constraint-based status queries
+        if kwargs.get("constraint") is None:
+            kwargs["constraint"] = "LawTaskId == \"{}\"".format(self.live_task_id)
         return self.htcondor_job_manager_cls()(**kwargs)
 
     def htcondor_job_file_factory_cls(self):
@@ -31,12 +31,19 @@ _cfg = Config.instance()
 
 class LSFJobManager(BaseJobManager):
 
+    # whether to submit jobs as job arrays
+    job_grouping_submit = _cfg.get_expanded_bool("job", "lsf_job_grouping_submit")
+
     # chunking settings
     chunk_size_submit = 0
     chunk_size_cancel = _cfg.get_expanded_int("job", "lsf_chunk_size_cancel")
     chunk_size_query = _cfg.get_expanded_int("job", "lsf_chunk_size_query")
 
+    # instance attributes that have an effect on status queries
+    query_broker_attributes = ("queue",)
+
     submission_job_id_cre = re.compile(r"^Job <(\d+)> is submitted.+$")
+    array_job_name_cre = re.compile(r"^.*\[(\d+)\]$")
 
     def __init__(self, queue=None, emails=False, threads=1):
         super(LSFJobManager, self).__init__()
@@ -57,8 +64,21 @@ class LSFJobManager(BaseJobManager):
     def cleanup_batch(self, *args, **kwargs):
         raise NotImplementedError("LSFJobManager.cleanup_batch is not implemented")
 
-    def submit(self, job_file, queue=None, emails=None, retries=0, retry_delay=3, silent=False,
-            _processes=None):
+    @classmethod
+    def lsf_job_id(cls, job_id):
+        """
+        Converts a *job_id* of an array element in the format ``arrayid_index`` into the notation
+        ``arrayid[index]`` used by LSF commands. Other ids are returned unchanged.
+        """
+        job_id = str(job_id)
+        if "_" in job_id:
+            job_id = "{}[{}]".format(*job_id.split("_", 1))
+        return job_id
+
+    def submit(self, job_file, job_files=None, queue=None, emails=None, retries=0, retry_delay=3,
+            silent=False, _processes=None):
+        # when job_files is set, the job file describes an array with one element per job file,
+        # and the ids of all array elements are returned in the format arrayid_index
         # default arguments
         if queue is None:
             queue = self.queue
@@ -93,7 +113,9 @@ class LSFJobManager(BaseJobManager):
 
             # retry or done?
             if code == 0:
-                return job_id
+                if job_files is None:
+                    return job_id
+                return ["{}_{}".format(job_id, i + 1) for i in range(len(job_files))]
 
             logger.debug("submission of lsf job '{}' failed with code {}:\n{}".format(
                 job_file, code, err))
@@ -120,7 +142,7 @@ class LSFJobManager(BaseJobManager):
         cmd = ["bkill"]
         if queue:
             cmd += ["-q", queue]
-        cmd += job_ids
+        cmd += [self.lsf_job_id(_job_id) for _job_id in job_ids]
         cmd = quote_cmd(cmd)
 
         # run it
@@ -149,7 +171,7 @@ class LSFJobManager(BaseJobManager):
             cmd.append("-noheader")
         if queue:
             cmd += ["-q", queue]
-        cmd += job_ids
+        cmd += [self.lsf_job_id(_job_id) for _job_id in job_ids]
         cmd = quote_cmd(cmd)
 
         # run it
@@ -188,6 +210,7 @@ class LSFJobManager(BaseJobManager):
         """
         Example output to parse:
         141914132 user_name DONE queue_name exec_host b63cee711a job_name Feb 8 14:54
+        141914133 user_name RUN queue_name exec_host b63cee711a job_name[2] Feb 8 14:54
         """
         query_data = {}
 
@@ -199,6 +222,12 @@ class LSFJobManager(BaseJobManager):
             job_id = parts[0]
             status_flag = parts[2]
 
+            # array elements share the job id but have the index appended to the job name, which
+            # is followed by the three fields of the submission time
+            m = cls.array_job_name_cre.match(parts[-4])
+            if m:
+                job_id = "{}_{}".format(job_id, m.group(1))
+
             # map the status
             status = cls.map_status(status_flag)
 
@@ -268,7 +297,10 @@ class LSFJobFileFactory(BaseJobFileFactory):
         self.custom_content = custom_content
         self.absolute_paths = absolute_paths
 
-    def create(self, postfix=None, **kwargs):
+    # placeholders of array job and task ids in output files and the job-side variables
+    array_placeholders = [("%J", "${LSB_JOBID}"), ("%I", "${LSB_JOBINDEX}")]
+
+    def create(self, postfix=None, grouped_submission=False, **kwargs):
         # merge kwargs and instance attributes
         c = self.get_config(**kwargs)
 
@@ -279,6 +311,19 @@ class LSFJobFileFactory(BaseJobFileFactory):
             raise ValueError("either command or executable must not be empty")
         if not c.shell:
             raise ValueError("shell must not be empty")
+        if grouped_submission:
+            c.arguments = make_list(c.arguments)
+            if not c.arguments:
+                raise ValueError("arguments must not be empty for grouped submission")
+
+        # for grouped submission, output files are postfixed with array job and task ids
+        output_postfix = "_%J_%I" if grouped_submission else postfix
+
+        # helper to replace array placeholders with variables resolved by the job
+        def job_side(s):
+            for placeholder, variable in self.array_placeholders:
+                s = s.replace(placeholder, variable)
+            return s
 
         # ensure that the custom log file is an output file
         if c.custom_log_file and c.custom_log_file not in c.output_files:
@@ -290,12 +335,12 @@ class LSFJobFileFactory(BaseJobFileFactory):
             skip_postfix_cre = re.compile(r"^(/dev/).*$")
             skip_postfix = lambda s: bool(skip_postfix_cre.match(str(s)))
             c.output_files = [
-                path if skip_postfix(path) else self.postfix_output_file(path, postfix)
+                path if skip_postfix(path) else self.postfix_output_file(path, output_postfix)
                 for path in c.output_files
             ]
             for attr in ["stdout", "stderr", "custom_log_file"]:
                 if c[attr] and not skip_postfix(c[attr]):
-                    c[attr] = self.postfix_output_file(c[attr], postfix)
+                    c[attr] = self.postfix_output_file(c[attr], output_postfix)
 
         # ensure that all input files are JobInputFile objects
         c.input_files = {
@@ -380,11 +425,11 @@ class LSFJobFileFactory(BaseJobFileFactory):
 
         # add the custom log file to render variables
         if c.custom_log_file:
-            c.render_variables["log_file"] = c.custom_log_file
+            c.render_variables["log_file"] = job_side(c.custom_log_file)
 
         # add the file postfix to render variables
-        if postfix and "file_postfix" not in c.render_variables:
-            c.render_variables["file_postfix"] = postfix
+        if output_postfix and "file_postfix" not in c.render_variables:
+            c.render_variables["file_postfix"] = job_side(output_postfix)
 
         # linearize render variables
         render_variables = self.linearize_render_variables(c.render_variables)
@@ -392,6 +437,20 @@ class LSFJobFileFactory(BaseJobFileFactory):
         # prepare the job description file
         job_file = self.postfix_input_file(os.path.join(c.dir, str(c.file_name)), postfix)
 
+        # for grouped submission, write job arguments per array task into a manifest file that is
+        # transferred like other input files
+        manifest_path = None
+        if grouped_submission:
+            manifest_file = "{}_manifest.txt".format(os.path.splitext(job_file)[0])
+            with open(manifest_file, "w") as f:
+                for args in c.arguments:
+                    f.write((quote_cmd(args) if isinstance(args, (list, tuple)) else args) + "\n")
+            manifest_path = (
+                manifest_file
+                if c.absolute_paths else
+                os.path.basename(manifest_file)
+            )
+
         # render copied, non-forwarded input files
         for key, f in c.input_files.items():
             if not f.copy or f.forward or not f.render_local:
@@ -415,7 +474,9 @@ class LSFJobFileFactory(BaseJobFileFactory):
         content = []
         content.append("#!/usr/bin/env {}".format(c.shell))
 
-        if c.job_name:
+        if grouped_submission:
+            content.append(("-J", "\"{}[1-{}]\"".format(c.job_name or "law_job", len(c.arguments))))
+        elif c.job_name:
             content.append(("-J", c.job_name))
         if c.queue:
             content.append(("-q", c.queue))
@@ -430,9 +491,13 @@ class LSFJobFileFactory(BaseJobFileFactory):
         if c.custom_content:
             content += c.custom_content
 
+        # paths of files to stage in
+        stagein_paths = [f.path_sub_rel for f in c.input_files.values() if f.path_sub_rel]
+        if manifest_path:
+            stagein_paths.append(manifest_path)
+
         if not c.manual_stagein:
-            paths = [f.path_sub_rel for f in c.input_files.values() if f.path_sub_rel]
-            for path in make_unique(paths):
+            for path in make_unique(stagein_paths):
                 content.append(("-f", "\"{} > {}\"".format(path, os.path.basename(path))))
 
         if not c.manual_stageout:
@@ -441,21 +506,28 @@ class LSFJobFileFactory(BaseJobFileFactory):
 
         if c.manual_stagein:
             tmpl = "cp " + ("{}" if c.absolute_paths else "$LS_EXECCWD/{}") + " $PWD/{}"
-            paths = [f.path_sub_rel for f in c.input_files.values() if f.path_sub_rel]
-            for path in make_unique(paths):
+            for path in make_unique(stagein_paths):
                 content.append(tmpl.format(path, os.path.basename(path)))
 
+        # for grouped submission, read arguments from the manifest per array task
+        if grouped_submission:
+            content.append("law_job_arguments=\"$( sed -n \"${{LSB_JOBINDEX}}p\" \"{}\" )\"".format(
+                os.path.basename(manifest_path)))
+
         if c.command:
             content.append(c.command)
         else:
             content.append("./" + c.executable)
-        if c.arguments:
+        if grouped_submission:
+            content[-1] += " ${law_job_arguments}"
+        elif c.arguments:
             args = quote_cmd(c.arguments) if isinstance(c.arguments, (list, tuple)) else c.arguments
             content[-1] += " {}".format(args)
 
         if c.manual_stageout:
             tmpl = "cp $PWD/{} $LS_EXECCWD/{}"
             for path in c.output_files:
+                path = job_side(path)
                 content.append(tmpl.format(path, path))
 
         # write the job file
@@ -5,8 +5,10 @@
 Contrib functionality for profiling tasks.
 """
 
-__all__ = ["profile_by_line"]
+__all__ = ["profile_by_line", "profile_by_sampling", "ProfilingTask", "StackSampler"]
 
 
 # provisioning imports
-from law.contrib.profiling.decorator import profile_by_line
+from law.contrib.profiling.decorator import profile_by_line, profile_by_sampling
+from law.contrib.profiling.task import ProfilingTask
+from law.contrib.profiling.sampler import StackSampler
@@ -4,11 +4,22 @@
 Profiling decorators.
 """
 
-__all__ = ["profile_by_line"]
+__all__ = ["profile_by_line", "profile_by_sampling"]
 
 
+import os
+import shutil
+import tempfile
+
 from law.decorator import factory, get_task
-from law.util import colored
+from law.sandbox.base import SandboxTask
+from law.target.file import FileSystemFileTarget
+from law.target.local import LocalFileTarget
+from law.util import colored, flatten, create_hash
+from law.logger import get_logger
+
+
+logger = get_logger(__name__)
 
 
 @factory(output_unit=None, stripzeros=False, accept_generator=True)
@@ -48,3 +59,125 @@ def profile_by_line(fn, opts, task, *args, **kwargs):
         print_stats(profiler, "(up to exception of type '{}')".format(error.__class__.__name__))
 
     return before_call, call, after_call, on_error
+
+
+@factory(interval=0.01, mode="cpu", flamegraph=True, stage_out=True, accept_generator=True)
+def profile_by_sampling(fn, opts, task, *args, **kwargs):
+    """ profile_by_sampling(interval=0.01, mode="cpu", flamegraph=True, stage_out=True)
+    Decorator for law task methods that performs a statistical profiling by sampling the call stack
+    every *interval* seconds using a :py:class:`~law.contrib.profiling.sampler.StackSampler` in a
+    certain *mode* (``"cpu"`` or ``"wall"``). The overhead is low and only depends on the sampling
+    interval, so that the decorator is also suited for production tasks, including those running
+    in remote jobs and sandboxes. Accepts generator functions.
+
+    After the method was called, the samples are written in the collapsed stack format to a file
+    named ``<basename>.profile.folded`` next to the first file output of the task with
+    *basename*, and when *flamegraph* is *True*, also as a flame graph to
+    ``<basename>.profile.svg``. Outputs of sandbox tasks refer to the actual outputs rather than
+    staged ones. When the output is not local, the files are created locally first and then copied
+    next to the output in case *stage_out* is *True*, or left in the current working directory
+    otherwise. Tasks without file outputs write to the current working directory. Errors during
+    writing are logged but never raised.
+
+    When the task has a ``profile`` attribute, e.g. when inheriting from
+    :py:class:`~law.contrib.profiling.task.ProfilingTask` which adds a ``--profile`` parameter,
+    profiling is only performed when its value is *True*.
+    """
+    from law.contrib.profiling.sampler import StackSampler
+
+    _task = get_task(task)
+    enabled = getattr(_task, "profile", True)
+
+    def before_call():
+        if not enabled:
+            return None
+        sampler = StackSampler(interval=opts["interval"], mode=opts["mode"])
+        sampler.start()
+        return sampler
+
+    def call(sampler):
+        return fn(task, *args, **kwargs)
+
+    def finish(sampler, error=None):
+        if sampler is None:
+            return
+        sampler.stop()
+        try:
+            write_profile(_task, fn.__name__, sampler, flamegraph=opts["flamegraph"],
+                stage_out=opts["stage_out"], error=error)
+        except Exception as e:
+            logger.warning("could not write sampling profile of task {}: {}".format(_task, e))
+
+    def after_call(sampler):
+        finish(sampler)
+
+    def on_error(error, sampler):
+        finish(sampler, error=error)
+
+    return before_call, call, after_call, on_error
+
+
+def write_profile(task, method_name, sampler, flamegraph=True, stage_out=True, error=None):
+    """
+    Writes the samples of a *sampler* that profiled the method *method_name* of a *task* next to its
+    first file output as described in :py:func:`profile_by_sampling`. Returns a list of the targets
+    that were written.
+    """
+    # get the first file output, considering unstaged outputs of sandbox tasks
+    if isinstance(task, SandboxTask):
+        outputs = task.__getattribute__("output", proxy=False)()
+    else:
+        outputs = task.output()
+    output = None
+    for t in flatten(outputs):
+        if isinstance(t, FileSystemFileTarget):
+            output = t
+            break
+
+    # build the file names
+    if output is not None:
+        basename = output.basename
+    else:
+        basename = "{}_{}".format(task.task_family, create_hash(task.task_id))
+    basename += ".profile"
+    exts = [".folded"] + ([".svg"] if flamegraph else [])
+
+    # decide where to write files to initially
+    is_local = isinstance(output, LocalFileTarget)
+    do_stage_out = not is_local and output is not None and stage_out
+    if is_local:
+        local_dir = output.parent.abspath
+        output.parent.touch()
+    elif do_stage_out:
+        local_dir = tempfile.mkdtemp()
+    else:
+        local_dir = os.getcwd()
+
+    title = "{} of {} ({} mode, {}s interval{})".format(method_name, task.repr(color=False),
+        sampler.mode, sampler.interval, ", failed with {}".format(error.__class__.__name__)
+        if error is not None else "")
+
+    targets = []
+    for ext in exts:
+        local_target = LocalFileTarget(os.path.join(local_dir, basename + ext))
+        if ext == ".folded":
+            sampler.write_collapsed(local_target.abspath)
+        else:
+            sampler.write_flamegraph(local_target.abspath, title=title)
+
+        # stage out
+        if do_stage_out:
+            target = output.parent.child(basename + ext, type="f")
+            target.copy_from_local(local_target)
+            local_target.remove()
+        else:
+            target = local_target
+        targets.append(target)
+
+    if do_stage_out:
+        shutil.rmtree(local_dir, ignore_errors=True)
+
+    task.logger.info("wrote sampling profile with {} samples to {}".format(sampler.n_samples,
+        ", ".join(t.uri() for t in targets)))
+
+    return targets
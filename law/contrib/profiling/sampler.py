@@ -0,0 +1,259 @@
+# coding: utf-8
+
+"""
+Statistical stack sampler based on interval timers and signals of the standard library.
+"""
+
+__all__ = ["StackSampler", "render_flamegraph"]
+
+
+import os
+import sys
+import signal
+import threading
+import zlib
+from collections import defaultdict
+
+import six
+
+from law.util import perf_counter
+from law.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class StackSampler(object):
+    """
+    Low-overhead, statistical profiler that periodically samples the call stack of the main thread.
+    Samples are triggered by an interval timer every *interval* seconds of either consumed CPU time
+    (*mode* ``"cpu"``, using ``SIGPROF``) or wall time (*mode* ``"wall"``, using ``SIGALRM``). The
+    latter also accounts for time spent waiting, e.g., for sub processes or I/O, but might interfere
+    with other alarm-based logic.
+
+    As signals are only delivered to the main thread, the sampler can only be started from there
+    and on platforms that provide ``signal.setitimer``. Otherwise, :py:meth:`start` logs a warning
+    and no samples are recorded. Example:
+
+    .. code-block:: python
+
+        sampler = StackSampler(interval=0.005)
+        with sampler:
+            do_work()
+
+        sampler.write_collapsed("profile.folded")
+        sampler.write_flamegraph("profile.svg")
+
+    .. py:attribute:: samples
+
+        type: dict
+
+        Number of samples, mapped to stacks represented by tuples of code objects, ordered from the
+        outermost to the innermost frame.
+    """
+
+    modes = {
+        "cpu": ("ITIMER_PROF", "SIGPROF"),
+        "wall": ("ITIMER_REAL", "SIGALRM"),
+    }
+
+    def __init__(self, interval=0.01, mode="cpu"):
+        super(StackSampler, self).__init__()
+
+        if mode not in self.modes:
+            raise ValueError("unknown sampling mode '{}', must be one of {}".format(
+                mode, ",".join(self.modes)))
+
+        self.interval = interval
+        self.mode = mode
+
+        self.samples = defaultdict(int)
+        self.duration = 0.0
+
+        self._active = False
+        self._t0 = None
+        self._prev_handler = None
+        self._labels = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def n_samples(self):
+        return sum(six.itervalues(self.samples))
+
+    def _handle(self, signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        self.samples[tuple(reversed(stack))] += 1
+
+    def start(self):
+        """
+        Starts sampling and returns *True* on success, and *False* otherwise.
+        """
+        if self._active:
+            return True
+
+        timer_name, signal_name = self.modes[self.mode]
+        if not hasattr(signal, "setitimer") or not hasattr(signal, signal_name):
+            logger.warning("stack sampling not supported on platform {}".format(sys.platform))
+            return False
+        if not isinstance(threading.current_thread(), threading._MainThread):
+            logger.warning("stack sampling can only be started in the main thread")
+            return False
+
+        signum = getattr(signal, signal_name)
+        self._prev_handler = signal.signal(signum, self._handle)
+        signal.setitimer(getattr(signal, timer_name), self.interval, self.interval)
+
+        self._active = True
+        self._t0 = perf_counter()
+
+        return True
+
+    def stop(self):
+        """
+        Stops sampling and restores the previous signal handler.
+        """
+        if not self._active:
+            return
+
+        timer_name, signal_name = self.modes[self.mode]
+        signal.setitimer(getattr(signal, timer_name), 0)
+        signal.signal(getattr(signal, signal_name), self._prev_handler or signal.SIG_DFL)
+
+        self.duration += perf_counter() - self._t0
+        self._active = False
+        self._prev_handler = None
+
+    def clear(self):
+        """
+        Removes all samples.
+        """
+        self.samples.clear()
+        self.duration = 0.0
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            # use the last two fragments of the file path to keep labels short but unambiguous
+            path = os.path.join(*code.co_filename.split(os.sep)[-2:] or ["?"])
+            label = "{} ({}:{})".format(code.co_name, path, code.co_firstlineno)
+            # semicolons separate frames in the collapsed format
+            label = label.replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def collapsed(self):
+        """
+        Returns a dictionary mapping collapsed stacks, i.e., semicolon-separated frame labels from
+        the outermost to the innermost frame, to the number of samples.
+        """
+        collapsed = defaultdict(int)
+        for stack, n in six.iteritems(self.samples):
+            collapsed[";".join(self._label(code) for code in stack)] += n
+        return dict(collapsed)
+
+    def write_collapsed(self, path):
+        """
+        Writes all samples in the collapsed stack format to a file at *path*, as understood by
+        common flame graph tools such as ``flamegraph.pl`` or
+        `speedscope <https://speedscope.app>`__.
+        """
+        with open(path, "w") as f:
+            for stack, n in sorted(six.iteritems(self.collapsed())):
+                f.write("{} {}\n".format(stack, n))
+
+    def write_flamegraph(self, path, title=None):
+        """
+        Writes all samples as a flame graph in a self-contained SVG file to *path*. See
+        :py:func:`render_flamegraph` for more info.
+        """
+        svg = render_flamegraph(self.collapsed(), title=title, interval=self.interval)
+        with open(path, "w") as f:
+            f.write(svg)
+
+
+def render_flamegraph(collapsed, title=None, interval=None, width=1200, frame_height=16):
+    """
+    Renders a dictionary of *collapsed* stacks with their number of samples, as returned by
+    :py:meth:`StackSampler.collapsed`, as a flame graph and returns a self-contained SVG string.
+    *title* is shown at the top of the graph. When *interval* is given, the total number of samples
+    is converted into an estimated duration. *width* and *frame_height* control the dimensions in
+    pixels.
+    """
+    from xml.sax.saxutils import escape
+
+    # build the tree of frames, nodes are lists [n_samples, children]
+    root = [0, {}]
+    max_depth = 0
+    for stack, n in six.iteritems(collapsed):
+        node = root
+        node[0] += n
+        frames = stack.split(";") if stack else []
+        max_depth = max(max_depth, len(frames))
+        for frame in frames:
+            node = node[1].setdefault(frame, [0, {}])
+            node[0] += n
+
+    total = root[0]
+    pad = 10
+    header = 3 * frame_height
+    height = header + (max_depth + 1) * frame_height + pad
+    char_width = 0.6 * (frame_height - 4)
+
+    if title is None:
+        title = "flame graph"
+    subtitle = "{} samples".format(total)
+    if interval:
+        subtitle += " (~{:.2f}s)".format(total * interval)
+
+    elems = [
+        "<?xml version=\"1.0\" standalone=\"no\"?>",
+        "<svg version=\"1.1\" width=\"{}\" height=\"{}\" xmlns=\"http://www.w3.org/2000/svg\" "
+        "font-family=\"monospace\" font-size=\"{}\">".format(width, height, frame_height - 4),
+        "<rect x=\"0\" y=\"0\" width=\"100%\" height=\"100%\" fill=\"#f8f8f8\"/>",
+        "<text x=\"{}\" y=\"{}\" font-size=\"{}\">{}</text>".format(pad, frame_height + 2,
+            frame_height - 2, escape(title)),
+        "<text x=\"{}\" y=\"{}\">{}</text>".format(pad, 2 * frame_height + 2, escape(subtitle)),
+    ]
+
+    def add(name, node, x, depth):
+        w = (width - 2 * pad) * float(node[0]) / total
+        if w < 0.1:
+            return
+        y = height - pad - (depth + 1) * frame_height
+        # warm colors, deterministic per frame name
+        h = zlib.crc32(six.b(name)) & 0xffffffff
+        color = "rgb({},{},{})".format(205 + h % 50, 80 + (h >> 8) % 150, 40 + (h >> 16) % 50)
+        label = escape("{} ({} samples, {:.2f}%)".format(name, node[0], 100. * node[0] / total))
+        text = ""
+        n_chars = int((w - 4) / char_width)
+        if n_chars >= 3:
+            short = name if len(name) <= n_chars else name[:n_chars - 2] + ".."
+            text = "<text x=\"{:.1f}\" y=\"{}\">{}</text>".format(x + 2, y + frame_height - 4,
+                escape(short))
+        elems.append(
+            "<g><title>{}</title><rect x=\"{:.1f}\" y=\"{}\" width=\"{:.1f}\" height=\"{}\" "
+            "fill=\"{}\" rx=\"2\"/>{}</g>".format(label, x, y, w, frame_height - 1, color, text),
+        )
+        for child_name, child in sorted(six.iteritems(node[1])):
+            add(child_name, child, x, depth + 1)
+            x += (width - 2 * pad) * float(child[0]) / total
+
+    if total:
+        add("all", root, pad, 0)
+
+    elems.append("</svg>")
+
+    return "\n".join(elems) + "\n"
@@ -0,0 +1,41 @@
+# coding: utf-8
+
+"""
+Profiling task mixins.
+"""
+
+__all__ = ["ProfilingTask"]
+
+
+import luigi
+
+from law.task.base import Task
+
+
+class ProfilingTask(Task):
+    """
+    Task mixin that adds a ``--profile`` parameter to enable the statistical profiling of methods
+    decorated with :py:func:`~law.contrib.profiling.decorator.profile_by_sampling`. As the parameter
+    is not significant, it does not change the task id, but it is still forwarded to remote jobs
+    and sandboxes. Example:
+
+    .. code-block:: python
+
+        class MyTask(ProfilingTask):
+
+            @profile_by_sampling
+            def run(self):
+                ...
+
+    .. code-block:: bash
+
+        law run MyTask --profile
+    """
+
+    profile = luigi.BoolParameter(
+        default=False,
+        significant=False,
+        description="when set, profile methods decorated with profile_by_sampling with a "
+        "statistical stack sampler and write collapsed stacks and flame graphs next to the task "
+        "outputs; default: False",
+    )
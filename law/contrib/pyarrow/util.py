@@ -9,13 +9,15 @@ __all__ = ["merge_parquet_files", "merge_parquet_task"]
 import os
 import shutil
 
+import six
+
 from law.target.file import FileSystemFileTarget
 from law.target.local import LocalFileTarget, LocalDirectoryTarget
-from law.util import map_verbose, human_bytes
+from law.util import map_verbose, prefetch_map, human_bytes, parse_bytes
 
 
 def merge_parquet_files(src_paths, dst_path, force=True, callback=None, writer_opts=None,
-        copy_single=False, skip_empty=True):
+        copy_single=False, skip_empty=True, stream=False, prefetch=0, max_memory=None):
     """
     Merges parquet files in *src_paths* into a new file at *dst_path*. Intermediate directories are
     created automatically. When *dst_path* exists and *force* is *True*, the file is removed first.
@@ -27,6 +29,16 @@ def merge_parquet_files(src_paths, dst_path, force=True, callback=None, writer_o
     *copy_single* is *True*, the file is copied to *dst_path* and no merging takes place. Files
     containing empty tables are skipped unless *skip_empty* is *False*.
 
+    When *stream* is *True*, inputs are not read entirely into memory but processed row group by
+    row group. Row groups of inputs whose schema matches the one of the first file are copied as a
+    whole, whereas inputs with diverging schemas or row groups exceeding *max_memory* are iterated
+    in batches via ``ParquetFile.iter_batches`` and converted to the target schema. *prefetch*
+    defines the number of upcoming inputs that are read into memory in background threads while the
+    current one is being written, which mostly helps when files are located on network mounts. The
+    peak memory used for prefetched files and batches can be bounded by *max_memory* which can be a
+    number in bytes or a string such as ``"500MB"`` that is interpreted by
+    :py:func:`law.util.parse_bytes`.
+
     The absolute, expanded *dst_path* is returned.
     """
     import pyarrow.parquet as pq
@@ -60,6 +72,13 @@ def merge_parquet_files(src_paths, dst_path, force=True, callback=None, writer_o
         callback(0)
         return dst_path
 
+    # streaming case
+    if stream:
+        _merge_parquet_files_streamed(src_paths, dst_path, callback=callback,
+            writer_opts=writer_opts, skip_empty=skip_empty, prefetch=prefetch,
+            max_memory=max_memory)
+        return dst_path
+
     # read the first table to extract the schema
     table = pq.read_table(src_paths[0])
 
@@ -79,7 +98,69 @@ def merge_parquet_files(src_paths, dst_path, force=True, callback=None, writer_o
     return dst_path
 
 
-def merge_parquet_task(task, inputs, output, local=False, cwd=None, force=True, **kwargs):
+def _merge_parquet_files_streamed(src_paths, dst_path, callback=None, writer_opts=None,
+        skip_empty=True, prefetch=0, max_memory=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if isinstance(max_memory, six.string_types):
+        max_memory = parse_bytes(max_memory, unit="bytes")
+
+    # when prefetching, files are loaded into memory buffers in background threads
+    if prefetch > 0:
+        def load(path):
+            with pa.OSFile(path, "rb") as f:
+                return pa.BufferReader(f.read_buffer())
+
+        sources = prefetch_map(load, src_paths, prefetch=prefetch, size=lambda r: r.size(),
+            max_size=max_memory)
+    else:
+        sources = iter(src_paths)
+
+    writer = None
+    try:
+        for i, source in enumerate(sources):
+            pf = pq.ParquetFile(source)
+
+            # the first file defines the schema
+            if writer is None:
+                schema = pf.schema_arrow
+                writer = pq.ParquetWriter(dst_path, schema, **(writer_opts or {}))
+
+            if skip_empty and pf.metadata.num_rows == 0:
+                callback(i)
+                continue
+
+            same_schema = pf.schema_arrow.equals(schema)
+            for rg in six.moves.range(pf.num_row_groups):
+                rg_meta = pf.metadata.row_group(rg)
+                if skip_empty and rg_meta.num_rows == 0:
+                    continue
+
+                # fast path: copy the full row group
+                if same_schema and (max_memory is None or rg_meta.total_byte_size <= max_memory):
+                    writer.write_table(pf.read_row_group(rg))
+                    continue
+
+                # slow path: iterate through batches whose size is adjusted to the memory limit
+                batch_size = 2**16
+                if max_memory is not None and rg_meta.total_byte_size > 0:
+                    rows_per_byte = float(rg_meta.num_rows) / rg_meta.total_byte_size
+                    batch_size = max(int(max_memory * rows_per_byte), 1)
+                for batch in pf.iter_batches(batch_size=batch_size, row_groups=[rg]):
+                    table = pa.Table.from_batches([batch])
+                    if not same_schema:
+                        table = table.cast(schema)
+                    writer.write_table(table)
+
+            callback(i)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def merge_parquet_task(task, inputs, output, local=False, cwd=None, force=True, fetch_threads=1,
+        **kwargs):
     """
     This method is intended to be used by tasks that are supposed to merge parquet files, e.g. when
     inheriting from :py:class:`law.contrib.tasks.MergeCascade`. *inputs* should be a sequence of
@@ -89,7 +170,7 @@ def merge_parquet_task(task, inputs, output, local=False, cwd=None, force=True,
     dowload directory. When empty, a temporary directory is used. The *task* itself is used to print
     and publish messages via its :py:meth:`law.Task.publish_message` and
     :py:meth:`law.Task.publish_step` methods. When *force* is *True*, any existing output file is
-    overwritten.
+    overwritten. *fetch_threads* controls the number of inputs that are fetched concurrently.
 
     All additional *kwargs* are forwarded to :py:func:`merge_parquet_files` which is used internally
     for the actual merging.
@@ -149,7 +230,12 @@ def merge_parquet_task(task, inputs, output, local=False, cwd=None, force=True,
             def callback(i):
                 task.publish_message("fetch file {} / {}".format(i + 1, len(inputs)))
 
-            local_inputs = map_verbose(fetch, inputs, every=5, callback=callback)
+            local_inputs = map_verbose(
+                lambda local_inp: local_inp,
+                prefetch_map(fetch, inputs, prefetch=fetch_threads),
+                every=5,
+                callback=callback,
+            )
 
         # merge into a localized output
         with output.localize("w", cache=False) as local_output:
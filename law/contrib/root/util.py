@@ -8,12 +8,16 @@ __all__ = ["import_ROOT", "hadd_task"]
 
 
 import os
+import threading
 
 import six
 
 from law.target.file import FileSystemFileTarget
 from law.target.local import LocalFileTarget, LocalDirectoryTarget
-from law.util import map_verbose, make_list, interruptable_popen, human_bytes, quote_cmd
+from law.util import (
+    make_list, prefetch_map, iter_chunks, interruptable_popen, perf_counter, human_bytes,
+    parse_bytes, human_duration, quote_cmd,
+)
 
 
 _ROOT = None
@@ -44,7 +48,8 @@ def import_ROOT(batch=True, ignore_cli=True, reset=False):
     return _ROOT
 
 
-def hadd_task(task, inputs, output, cwd=None, local=False, force=True, hadd_args=None):
+def hadd_task(task, inputs, output, cwd=None, local=False, force=True, hadd_args=None,
+        hadd_jobs=1, fetch_threads=1, chunk_size=None, max_disk=None):
     """
     This method is intended to be used by tasks that are supposed to merge root files, e.g. when
     inheriting from :py:class:`law.contrib.tasks.ForestMerge`. *inputs* should be a sequence of
@@ -56,7 +61,18 @@ def hadd_task(task, inputs, output, cwd=None, local=False, force=True, hadd_args
     When *local* is *True*, the input and output targets are assumed to be local and the merging is
     based on their local paths. Otherwise, the targets are fetched first and the output target is
     localized. When *force* is *True*, any existing output file is overwritten. *hadd_args* can be a
-    sequence of additional arguments that are added to the hadd command.
+    sequence of additional arguments that are added to the hadd command. *hadd_jobs* is forwarded
+    to hadd's ``-j`` option to merge with multiple processes.
+
+    When not *local*, inputs are fetched by *fetch_threads* concurrent threads. When *chunk_size* is
+    set, fetching and merging are pipelined: as soon as *chunk_size* inputs are available, they are
+    merged into a partial file in a separate temporary directory and removed, and partial files are
+    merged in a tree-like fashion with at most *chunk_size* files per hadd call. *max_disk* limits
+    the size of fetched inputs that are not yet merged and removed, and can be a number in bytes or
+    a string such as ``"10GB"`` that is interpreted by :py:func:`law.util.parse_bytes`. The input
+    that is required next is always fetched, so that without *chunk_size*, inputs are fetched one
+    after another once the limit is reached. The peak temporary disk usage as well as the time spent
+    for fetching and merging are published as messages.
     """
     abspath = lambda path: os.path.abspath(os.path.expandvars(os.path.expanduser(str(path))))
 
@@ -81,10 +97,17 @@ def hadd_task(task, inputs, output, cwd=None, local=False, force=True, hadd_args
         cwd = LocalDirectoryTarget(abspath(cwd))
     cwd.touch()
 
+    if chunk_size is not None and chunk_size < 2:
+        raise ValueError("chunk_size must be at least 2, got {}".format(chunk_size))
+    if isinstance(max_disk, six.string_types):
+        max_disk = parse_bytes(max_disk, unit="bytes")
+
     # helper to create the hadd cmd
     def hadd_cmd(input_paths, output_path):
         cmd = ["hadd", "-n", "0"]
         cmd.extend(["-d", cwd.path])
+        if hadd_jobs > 1:
+            cmd.extend(["-j", str(hadd_jobs)])
         if hadd_args:
             cmd.extend(make_list(hadd_args))
         cmd.append(output_path)
@@ -118,29 +141,111 @@ def hadd_task(task, inputs, output, cwd=None, local=False, force=True, hadd_args
         task.publish_message("merged file size: {}".format(output_size))
 
     else:
-        # when not local, we need to fetch files first into the cwd
-        with task.publish_step("fetching inputs ...", runtime=True):
-            def fetch(inp):
-                inp.copy_to_local(cwd.child(inp.unique_basename, type="f"), cache=False)
-                return inp.unique_basename
-
-            def callback(i):
-                task.publish_message("fetch file {} / {}".format(i + 1, len(inputs)))
-
-            bases = map_verbose(fetch, inputs, every=5, callback=callback)
+        # bookkeeping of temporary disk usage, the size of inputs on disk counted against max_disk,
+        # the index of the next input required for merging, and timings
+        cond = threading.Condition()
+        disk = {"current": 0, "peak": 0, "inputs": 0, "next_index": 0, "stopped": False}
+        timings = {"fetch": 0.0, "merge": 0.0}
+
+        def track_disk(diff, is_input=False):
+            with cond:
+                disk["current"] += diff
+                disk["peak"] = max(disk["peak"], disk["current"])
+                if is_input:
+                    disk["inputs"] += diff
+                    cond.notify_all()
+
+        def fetch(index_inp):
+            index, inp = index_inp
+            # wait for the disk budget, except for the input that is required next
+            if max_disk is not None:
+                with cond:
+                    while disk["inputs"] >= max_disk and index > disk["next_index"]:
+                        if disk["stopped"]:
+                            raise Exception("merging stopped before fetching {}".format(inp))
+                        cond.wait()
+            local_inp = cwd.child(inp.unique_basename, type="f")
+            inp.copy_to_local(local_inp, cache=False)
+            size = local_inp.stat().st_size
+            track_disk(size, is_input=True)
+            return local_inp.abspath, size, True
+
+        # partial files are written into a fresh temporary directory inside the cwd to avoid clashes
+        # with leftovers from previous runs
+        partial_dir = LocalDirectoryTarget(is_tmp=True, tmp_dir=cwd.path)
+        partial_dir.touch()
+
+        def merge_partial(files):
+            t0 = perf_counter()
+            partial = partial_dir.child("law_hadd_partial_{}.root".format(len(partials)), type="f")
+            partials.append(partial)
+            cmd = hadd_cmd([path for path, _, _ in files], partial.abspath)
+            code = interruptable_popen(cmd, shell=True, executable="/bin/bash", cwd=cwd.path)[0]
+            if code != 0:
+                raise Exception("hadd failed")
+            # remove merged files and update the disk usage, releasing the budget of inputs
+            for path, size, is_input in files:
+                os.remove(path)
+                track_disk(-size, is_input=is_input)
+            size = partial.stat().st_size
+            track_disk(size)
+            timings["merge"] += perf_counter() - t0
+            return partial.abspath, size, False
+        partials = []
+
+        # fetch inputs into the cwd, merging chunks of them in the meantime when requested
+        msg = "fetching inputs ..." if not chunk_size else "fetching and merging inputs ..."
+        with task.publish_step(msg, runtime=True):
+            fetched = prefetch_map(fetch, enumerate(inputs), prefetch=fetch_threads)
+
+            files, chunk = [], []
+            t0 = perf_counter()
+            try:
+                for i, res in enumerate(fetched):
+                    timings["fetch"] += perf_counter() - t0
+                    with cond:
+                        disk["next_index"] = i + 1
+                        cond.notify_all()
+                    chunk.append(res)
+                    if (i + 1) % 5 == 0 or i + 1 == len(inputs):
+                        task.publish_message("fetched file {} / {}".format(i + 1, len(inputs)))
+
+                    # merge the current chunk
+                    if chunk_size and len(chunk) >= chunk_size:
+                        files.append(merge_partial(chunk))
+                        chunk = []
+                    t0 = perf_counter()
+            finally:
+                # release fetches that still wait for the disk budget
+                with cond:
+                    disk["stopped"] = True
+                    cond.notify_all()
+            files.extend(chunk)
+
+            # reduce partial files in a tree-like fashion
+            if chunk_size:
+                while len(files) > chunk_size:
+                    files = [
+                        (merge_partial(chunk) if len(chunk) > 1 else chunk[0])
+                        for chunk in iter_chunks(files, chunk_size)
+                    ]
+
+        paths = [path for path, _, _ in files]
 
         # start merging into the localized output
         with output.localize("w", cache=False) as tmp_out:
             with task.publish_step("merging ...", runtime=True):
-                if len(bases) == 1:
-                    tmp_out.path = cwd.child(bases[0]).abspath
+                t0 = perf_counter()
+                if len(paths) == 1:
+                    tmp_out.path = paths[0]
                 else:
                     # merge using hadd
-                    cmd = hadd_cmd(bases, tmp_out.path)
+                    cmd = hadd_cmd(paths, tmp_out.path)
                     code = interruptable_popen(cmd, shell=True, executable="/bin/bash",
                         cwd=cwd.path)[0]
                     if code != 0:
                         raise Exception("hadd failed")
+                timings["merge"] += perf_counter() - t0
 
             stat = tmp_out.exists(stat=True)
             if not stat:
@@ -149,3 +254,9 @@ def hadd_task(task, inputs, output, cwd=None, local=False, force=True, hadd_args
             # print the size
             output_size = human_bytes(stat.st_size, fmt=True)
             task.publish_message("merged file size: {}".format(output_size))
+
+        # print disk usage and timings
+        task.publish_message("peak temporary disk usage: {}".format(
+            human_bytes(disk["peak"], fmt=True)))
+        task.publish_message("time spent waiting for inputs: {}, merging: {}".format(
+            human_duration(seconds=timings["fetch"]), human_duration(seconds=timings["merge"])))
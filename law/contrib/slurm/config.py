@@ -11,7 +11,10 @@ def config_defaults(default_config):
             "slurm_job_file_dir": None,
             "slurm_job_file_dir_mkdtemp": None,
             "slurm_job_file_dir_cleanup": False,
+            "slurm_job_grouping_submit": False,
             "slurm_chunk_size_cancel": 25,
             "slurm_chunk_size_query": 25,
+            "slurm_query_mode": "jobs",
+            "slurm_snapshot_sacct_window": 48.0,
         },
     }
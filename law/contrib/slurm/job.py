@@ -11,8 +11,12 @@ import os
 import time
 import re
 import stat
+import json
+import threading
 import subprocess
 
+import six
+
 from law.config import Config
 from law.job.base import BaseJobManager, BaseJobFileFactory, JobInputFile
 from law.target.file import get_path
@@ -27,33 +31,74 @@ _cfg = Config.instance()
 
 class SlurmJobManager(BaseJobManager):
 
+    # whether to submit jobs as job arrays
+    job_grouping_submit = _cfg.get_expanded_bool("job", "slurm_job_grouping_submit")
+
     # chunking settings
     chunk_size_submit = 0
     chunk_size_cancel = _cfg.get_expanded_int("job", "slurm_chunk_size_cancel")
     chunk_size_query = _cfg.get_expanded_int("job", "slurm_chunk_size_query")
 
+    # instance attributes that have an effect on status queries
+    query_broker_attributes = ("partition", "query_mode")
+
     submission_cre = re.compile(r"^Submitted batch job (\d+)$")
 
-    squeue_format = r"JobID,State"
-    squeue_cre = re.compile(r"^\s*(\d+)\s+([^\s]+)$")
+    squeue_format = r"JobArrayID,State"
+    squeue_cre = re.compile(r"^\s*(\d+(?:_\d+)?)\s+([^\s]+)$")
 
     sacct_format = r"JobID,State,ExitCode,Reason"
-    sacct_cre = re.compile(r"^\s*(\d+)\s+([^\s]+)\s+(-?\d+):-?\d+\s+(.+)$")
+    sacct_cre = re.compile(r"^\s*(\d+(?:_\d+)?)\s+([^\s]+)\s+(-?\d+):-?\d+\s+(.+)$")
+
+    # status query mode, "jobs" or "snapshot"
+    query_modes = ("jobs", "snapshot")
+    query_mode = _cfg.get_expanded("job", "slurm_query_mode")
+
+    # time window in hours for accounting queries in snapshot mode
+    snapshot_sacct_window = _cfg.get_expanded_float("job", "slurm_snapshot_sacct_window")
 
-    def __init__(self, partition=None, threads=1):
+    # maximum age in seconds of a snapshot before it is refreshed in direct calls to query
+    snapshot_max_age = 10.0
+
+    def __init__(self, partition=None, query_mode=None, threads=1):
         super(SlurmJobManager, self).__init__()
 
         self.partition = partition
         self.threads = threads
 
+        if query_mode is not None:
+            if query_mode not in self.query_modes:
+                raise ValueError("unknown slurm query mode '{}', valid values are {}".format(
+                    query_mode, ",".join(self.query_modes)))
+            self.query_mode = query_mode
+
+        # the status snapshot, mapping job ids to status data, its creation time and lock
+        self._snapshot = None
+        self._snapshot_time = None
+        self._snapshot_lock = threading.Lock()
+        # job ids the snapshot was created for, None when the accounting history was included
+        self._snapshot_job_ids = None
+
     def cleanup(self, *args, **kwargs):
         raise NotImplementedError("SlurmJobManager.cleanup is not implemented")
 
     def cleanup_batch(self, *args, **kwargs):
         raise NotImplementedError("SlurmJobManager.cleanup_batch is not implemented")
 
-    def submit(self, job_file, partition=None, retries=0, retry_delay=3, silent=False,
-            _processes=None):
+    @classmethod
+    def cast_job_id(cls, job_id):
+        """
+        Converts a *job_id* into an integer, except for ids of array jobs in the format
+        ``arrayid_index`` which are kept as strings.
+        """
+        if isinstance(job_id, six.string_types) and job_id.isdigit():
+            return int(job_id)
+        return job_id
+
+    def submit(self, job_file, job_files=None, partition=None, retries=0, retry_delay=3,
+            silent=False, _processes=None):
+        # when job_files is set, the job file describes an array with one element per job file,
+        # and the ids of all array elements are returned in the format arrayid_index
         # default arguments
         if partition is None:
             partition = self.partition
@@ -90,7 +135,9 @@ class SlurmJobManager(BaseJobManager):
 
             # retry or done?
             if code == 0:
-                return job_id
+                if job_files is None:
+                    return job_id
+                return ["{}_{}".format(job_id, i + 1) for i in range(len(job_files))]
 
             logger.debug("submission of slurm job '{}' failed with code {}:\n{}".format(
                 job_file, code, err))
@@ -133,6 +180,98 @@ class SlurmJobManager(BaseJobManager):
 
         return {job_id: None for job_id in job_ids} if chunking else None
 
+    def prepare_query(self, job_ids, partition=None, **kwargs):
+        # in snapshot mode, create a single snapshot with all job ids that all chunks read from
+        if self.query_mode == "snapshot":
+            self.refresh_snapshot(job_ids, partition=partition)
+
+    def refresh_snapshot(self, job_ids=None, partition=None, _processes=None):
+        """
+        Creates a snapshot of the status of all jobs of the current user with a single ``squeue``
+        call and, when some of the *job_ids* are missing, a single ``sacct`` call restricted to
+        jobs started within the last :py:attr:`snapshot_sacct_window` hours. The snapshot maps job
+        ids to status data and is used by :py:meth:`query` in snapshot mode. Errors are stored and
+        raised in :py:meth:`query`.
+        """
+        with self._snapshot_lock:
+            return self._refresh_snapshot(job_ids, partition=partition, _processes=_processes)
+
+    def _refresh_snapshot(self, job_ids=None, partition=None, _processes=None):
+        # must be called with the snapshot lock acquired
+        if partition is None:
+            partition = self.partition
+
+        try:
+            snapshot, sacct = self._create_snapshot(job_ids, partition=partition,
+                _processes=_processes)
+        except Exception as e:
+            snapshot, sacct = e, False
+
+        self._snapshot = snapshot
+        self._snapshot_time = time.time()
+        self._snapshot_job_ids = None if sacct or job_ids is None else set(job_ids)
+
+        return snapshot
+
+    def _get_snapshot(self, job_ids, partition=None, _processes=None):
+        # returns the snapshot for job_ids and refreshes it when it is too old, or when jobs are
+        # missing in a snapshot that was created without the accounting history
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            refresh = snapshot is None or \
+                time.time() - self._snapshot_time > self.snapshot_max_age
+            if not refresh and self._snapshot_job_ids is not None:
+                refresh = any(job_id not in snapshot for job_id in job_ids)
+            if not refresh:
+                return snapshot
+
+            # keep the job ids of the previous snapshot
+            refresh_ids = set(job_ids) | (self._snapshot_job_ids or set())
+
+            return self._refresh_snapshot(list(refresh_ids), partition=partition,
+                _processes=_processes)
+
+    def _create_snapshot(self, job_ids=None, partition=None, _processes=None):
+        # build the squeue command
+        cmd = ["squeue", "--me", "--json"]
+        if partition:
+            cmd += ["--partition", partition]
+        cmd = quote_cmd(cmd)
+
+        logger.debug("create slurm job snapshot with command '{}'".format(cmd))
+        code, out, err = interruptable_popen(cmd, shell=True, executable="/bin/bash",
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, kill_timeout=2, processes=_processes)
+        if code != 0:
+            raise Exception("queue snapshot query of slurm jobs failed with code {}:\n{}".format(
+                code, err))
+
+        snapshot = self.parse_squeue_json(out)
+
+        # query the accounting history only when requested jobs are missing
+        if job_ids is not None and all(job_id in snapshot for job_id in job_ids):
+            return snapshot, False
+
+        # build the sacct command
+        cmd = ["sacct", "--json"]
+        if self.snapshot_sacct_window > 0:
+            cmd += ["--starttime", "now-{}minutes".format(int(self.snapshot_sacct_window * 60))]
+        if partition:
+            cmd += ["--partition", partition]
+        cmd = quote_cmd(cmd)
+
+        logger.debug("create slurm accounting snapshot with command '{}'".format(cmd))
+        code, out, err = interruptable_popen(cmd, shell=True, executable="/bin/bash",
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, kill_timeout=2, processes=_processes)
+        if code != 0:
+            raise Exception("accounting snapshot query of slurm jobs failed with code {}:\n"
+                "{}".format(code, err))
+
+        # queue data is more recent, so it has precedence
+        sacct_data = self.parse_sacct_json(out)
+        sacct_data.update(snapshot)
+
+        return sacct_data, True
+
     def query(self, job_id, partition=None, silent=False, _processes=None):
         # default arguments
         if partition is None:
@@ -141,8 +280,32 @@ class SlurmJobManager(BaseJobManager):
         chunking = isinstance(job_id, (list, tuple))
         job_ids = make_list(job_id)
 
+        # in snapshot mode, read from the snapshot and refresh it if needed
+        if self.query_mode == "snapshot":
+            snapshot = self._get_snapshot(job_ids, partition=partition, _processes=_processes)
+
+            # handle errors
+            if isinstance(snapshot, Exception):
+                if silent:
+                    return None
+                raise snapshot
+
+            query_data = {}
+            for _job_id in job_ids:
+                if _job_id in snapshot:
+                    query_data[_job_id] = snapshot[_job_id]
+                elif not chunking:
+                    if silent:
+                        return None
+                    raise Exception("slurm job(s) '{}' not found in query response".format(job_id))
+                else:
+                    query_data[_job_id] = self.job_status_dict(job_id=_job_id, status=self.FAILED,
+                        error="job not found in query response")
+
+            return query_data if chunking else query_data[job_id]
+
         # build the squeue command
-        cmd = ["squeue", "--Format", self.squeue_format, "--noheader"]
+        cmd = ["squeue", "--Format", self.squeue_format, "--noheader", "--array"]
         if partition:
             cmd += ["--partition", partition]
         cmd += ["--jobs", ",".join(map(str, job_ids))]
@@ -220,7 +383,7 @@ class SlurmJobManager(BaseJobManager):
                 continue
 
             # build the job id
-            job_id = int(m.group(1))
+            job_id = cls.cast_job_id(m.group(1))
 
             # get the job status code
             status = cls.map_status(m.group(2))
@@ -240,7 +403,7 @@ class SlurmJobManager(BaseJobManager):
                 continue
 
             # build the job id
-            job_id = int(m.group(1))
+            job_id = cls.cast_job_id(m.group(1))
 
             # get the job status code
             status = cls.map_status(m.group(2))
@@ -268,6 +431,95 @@ class SlurmJobManager(BaseJobManager):
 
         return query_data
 
+    @classmethod
+    def _json_value(cls, value):
+        # values in json outputs differ between slurm versions, e.g. states might be lists and
+        # numbers might be dictionaries with "set" and "number" fields
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if isinstance(value, dict):
+            value = value.get("number") if value.get("set", True) else None
+        return value
+
+    @classmethod
+    def _json_job_ids(cls, job_id, array_job_id=None, array_task_id=None, array_task_string=None):
+        # returns the ids of a job in the json output, which are potentially multiple in case of
+        # array elements that are not yet expanded, e.g. "5-10,12%2" or "1-7:2"
+        array_job_id = cls._json_value(array_job_id)
+        if not array_job_id:
+            return [int(cls._json_value(job_id))]
+
+        array_task_id = cls._json_value(array_task_id)
+        if array_task_id is not None:
+            return ["{}_{}".format(array_job_id, array_task_id)]
+
+        job_ids = []
+        for part in (array_task_string or "").split("%", 1)[0].split(","):
+            if "-" in part:
+                start, end = part.split("-", 1)
+                end, step = (end.split(":", 1) + ["1"])[:2]
+                job_ids.extend(
+                    "{}_{}".format(array_job_id, i)
+                    for i in range(int(start), int(end) + 1, int(step))
+                )
+            elif part.strip():
+                job_ids.append("{}_{}".format(array_job_id, part.strip()))
+
+        return job_ids
+
+    @classmethod
+    def parse_squeue_json(cls, out):
+        # parse the json output of squeue and extract the status per job
+        query_data = {}
+        for job in json.loads(out or "{}").get("jobs", []):
+            status = cls.map_status(cls._json_value(job.get("job_state")) or "")
+            job_ids = cls._json_job_ids(job["job_id"], job.get("array_job_id"),
+                job.get("array_task_id"), job.get("array_task_string"))
+            for job_id in job_ids:
+                query_data[job_id] = cls.job_status_dict(job_id=job_id, status=status)
+
+        return query_data
+
+    @classmethod
+    def parse_sacct_json(cls, out):
+        # parse the json output of sacct and extract the status per job
+        query_data = {}
+        for job in json.loads(out or "{}").get("jobs", []):
+            array = job.get("array") or {}
+            job_ids = cls._json_job_ids(job["job_id"], array.get("job_id"), array.get("task_id"),
+                array.get("task"))
+
+            # get the job status code
+            state = job.get("state", {})
+            state_str = cls._json_value(state.get("current")) or ""
+            status = cls.map_status(state_str)
+
+            # get the exit code
+            exit_code = job.get("exit_code", {})
+            code = cls._json_value(exit_code.get("return_code")) if exit_code else None
+            code = int(code or 0)
+
+            # get the error message (if any)
+            error = state.get("reason")
+            if not isinstance(error, six.string_types) or error == "None":
+                error = None
+
+            # handle inconsistencies between status, code and the presence of an error message
+            if code != 0 and status != cls.FAILED:
+                status = cls.FAILED
+                if not error:
+                    error = "job status set to '{}' due to non-zero exit code {}".format(
+                        cls.FAILED, code)
+            if not error and status == cls.FAILED:
+                error = state_str
+
+            # store it
+            for job_id in job_ids:
+                query_data[job_id] = cls.job_status_dict(job_id=job_id, status=status, code=code,
+                    error=error)
+
+        return query_data
+
     @classmethod
     def map_status(cls, status):
         # see https://slurm.schedmd.com/squeue.html#lbAG
@@ -326,7 +578,10 @@ class SlurmJobFileFactory(BaseJobFileFactory):
         self.custom_content = custom_content
         self.absolute_paths = absolute_paths
 
-    def create(self, postfix=None, **kwargs):
+    # placeholders of array job and task ids in output files and the job-side variables
+    array_placeholders = [("%A", "${SLURM_ARRAY_JOB_ID}"), ("%a", "${SLURM_ARRAY_TASK_ID}")]
+
+    def create(self, postfix=None, grouped_submission=False, **kwargs):
         # merge kwargs and instance attributes
         c = self.get_config(**kwargs)
 
@@ -337,6 +592,19 @@ class SlurmJobFileFactory(BaseJobFileFactory):
             raise ValueError("either command or executable must not be empty")
         if not c.shell:
             raise ValueError("shell must not be empty")
+        if grouped_submission:
+            c.arguments = make_list(c.arguments)
+            if not c.arguments:
+                raise ValueError("arguments must not be empty for grouped submission")
+
+        # for grouped submission, output files are postfixed with array job and task ids
+        output_postfix = "_%A_%a" if grouped_submission else postfix
+
+        # helper to replace array placeholders with variables resolved by the job
+        def job_side(s):
+            for placeholder, variable in self.array_placeholders:
+                s = s.replace(placeholder, variable)
+            return s
 
         # postfix certain output files
         if c.postfix_output_files:
@@ -344,7 +612,7 @@ class SlurmJobFileFactory(BaseJobFileFactory):
             skip_postfix = lambda s: bool(skip_postfix_cre.match(s))
             for attr in ["stdout", "stderr", "custom_log_file"]:
                 if c[attr] and not skip_postfix(c[attr]):
-                    c[attr] = self.postfix_output_file(c[attr], postfix)
+                    c[attr] = self.postfix_output_file(c[attr], output_postfix)
 
         # ensure that all input files are JobInputFile objects
         c.input_files = {
@@ -429,11 +697,11 @@ class SlurmJobFileFactory(BaseJobFileFactory):
 
         # add the custom log file to render variables
         if c.custom_log_file:
-            c.render_variables["log_file"] = c.custom_log_file
+            c.render_variables["log_file"] = job_side(c.custom_log_file)
 
         # add the file postfix to render variables
-        if postfix and "file_postfix" not in c.render_variables:
-            c.render_variables["file_postfix"] = postfix
+        if output_postfix and "file_postfix" not in c.render_variables:
+            c.render_variables["file_postfix"] = job_side(output_postfix)
 
         # linearize render variables
         render_variables = self.linearize_render_variables(c.render_variables)
@@ -441,6 +709,14 @@ class SlurmJobFileFactory(BaseJobFileFactory):
         # prepare the job description file
         job_file = self.postfix_input_file(os.path.join(c.dir, str(c.file_name)), postfix)
 
+        # for grouped submission, write job arguments per array task into a manifest file
+        manifest_file = None
+        if grouped_submission:
+            manifest_file = "{}_manifest.txt".format(os.path.splitext(job_file)[0])
+            with open(manifest_file, "w") as f:
+                for args in c.arguments:
+                    f.write((quote_cmd(args) if isinstance(args, (list, tuple)) else args) + "\n")
+
         # render copied input files
         for key, f in c.input_files.items():
             if not f.copy or f.forward or not f.render_local:
@@ -473,6 +749,8 @@ class SlurmJobFileFactory(BaseJobFileFactory):
             content.append(("output", c.stdout))
         if c.stderr:
             content.append(("error", c.stderr))
+        if grouped_submission:
+            content.append(("array", "1-{}".format(len(c.arguments))))
 
         # add custom content
         if c.custom_content:
@@ -484,10 +762,15 @@ class SlurmJobFileFactory(BaseJobFileFactory):
                 line = self.create_line(obj)
                 f.write(line + "\n")
 
-            # prepare arguments
-            args = c.arguments or ""
-            if args:
-                args = " " + (quote_cmd(args) if isinstance(args, (list, tuple)) else args)
+            # prepare arguments, read from the manifest per array task for grouped submission
+            if grouped_submission:
+                tmpl = "\nlaw_job_arguments=\"$( sed -n \"${{SLURM_ARRAY_TASK_ID}}p\" \"{}\" )\"\n"
+                f.write(tmpl.format(manifest_file))
+                args = " ${law_job_arguments}"
+            else:
+                args = c.arguments or ""
+                if args:
+                    args = " " + (quote_cmd(args) if isinstance(args, (list, tuple)) else args)
 
             # add the command
             if c.command:
@@ -41,16 +41,25 @@ class SlurmWorkflowProxy(BaseRemoteWorkflowProxy):
     def create_job_file_factory(self, **kwargs):
         return self.task.slurm_create_job_file_factory(**kwargs)
 
-    def create_job_file(self, job_num, branches):
+    def create_job_file(self, *args):
         task = self.task
 
+        grouped_submission = len(args) == 1
+        if grouped_submission:
+            submit_jobs = args[0]
+            branches = sum(submit_jobs.values(), [])
+        else:
+            job_num, branches = args
+
         # the file postfix is pythonic range made from branches, e.g. [0, 1, 2, 4] -> "_0To5"
-        postfix = "_{}To{}".format(branches[0], branches[-1] + 1)
+        # (for grouped submission, it covers the branches of all jobs)
+        postfix = self.job_file_postfix(list(submit_jobs) if grouped_submission else job_num,
+            branches)
 
         # create the config
         c = self.job_file_factory.get_config()
         c.input_files = {}
-        c.render_variables = {}
+        c.render_variables = self.heartbeat_render_variables()
         c.custom_content = []
 
         # get the actual wrapper file that will be executed by the remote job
@@ -81,17 +90,25 @@ class SlurmWorkflowProxy(BaseRemoteWorkflowProxy):
         for key, value in OrderedDict(task.slurm_cmdline_args()).items():
             proxy_cmd.add_arg(key, value, overwrite=True)
 
-        # job script arguments
-        job_args = JobArguments(
-            task_cls=task.__class__,
-            task_params=proxy_cmd.build(skip_run=True),
-            branches=branches,
-            workers=task.job_workers,
-            auto_retry=False,
-            dashboard_data=self.dashboard.remote_hook_data(
-                job_num, self.job_data.attempts.get(job_num, 0)),
-        )
-        c.arguments = job_args.join()
+        # job script arguments per job number
+        def get_job_args(job_num, branches):
+            return JobArguments(
+                task_cls=task.__class__,
+                task_params=proxy_cmd.build(skip_run=True),
+                branches=branches,
+                workers=task.job_workers,
+                auto_retry=False,
+                dashboard_data=self.dashboard.remote_hook_data(
+                    job_num, self.job_data.attempts.get(job_num, 0)),
+            )
+
+        if grouped_submission:
+            c.arguments = [
+                get_job_args(job_num, branches).join()
+                for job_num, branches in submit_jobs.items()
+            ]
+        else:
+            c.arguments = get_job_args(job_num, branches).join()
 
         # add the bootstrap file
         bootstrap_file = task.slurm_bootstrap_file()
@@ -154,7 +171,10 @@ class SlurmWorkflowProxy(BaseRemoteWorkflowProxy):
             c.render_variables["law_job_tmp"] = "/tmp/law_$( basename \"$LAW_JOB_HOME\" )"
 
         # task hook
-        c = task.slurm_job_config(c, job_num, branches)
+        if grouped_submission:
+            c = task.slurm_job_config(c, list(submit_jobs.keys()), list(submit_jobs.values()))
+        else:
+            c = task.slurm_job_config(c, job_num, branches)
 
         # logging defaults
         def log_path(path):
@@ -170,7 +190,8 @@ class SlurmWorkflowProxy(BaseRemoteWorkflowProxy):
         c.custom_log_file = log_path(c.custom_log_file)
 
         # build the job file and get the sanitized config
-        job_file, c = self.job_file_factory(postfix=postfix, **c.__dict__)
+        job_file, c = self.job_file_factory(postfix=postfix, grouped_submission=grouped_submission,
+            **c.__dict__)
 
         # get the finale, absolute location of the custom log file
         abs_log_file = None
@@ -180,6 +201,21 @@ class SlurmWorkflowProxy(BaseRemoteWorkflowProxy):
         # return job and log files
         return {"job": job_file, "config": c, "log": abs_log_file}
 
+    def _submit_group(self, *args, **kwargs):
+        job_ids, submission_data = super(SlurmWorkflowProxy, self)._submit_group(*args, **kwargs)
+
+        # when a log file is present, replace array job and task id placeholders
+        for job_id, (job_num, data) in zip(job_ids, list(submission_data.items())):
+            # skip exceptions
+            if isinstance(job_id, Exception) or not data.get("log"):
+                continue
+            array_job_id, array_task_id = str(job_id).split("_", 1)
+            data = data.copy()
+            data["log"] = data["log"].replace("%A", array_job_id).replace("%a", array_task_id)
+            submission_data[job_num] = data
+
+        return job_ids, submission_data
+
     def destination_info(self):
         info = super(SlurmWorkflowProxy, self).destination_info()
 
@@ -20,10 +20,12 @@ arguments when configuring decorators. Default arguments are applied in either c
 """
 
 __all__ = [
-    "factory", "log", "safe_output", "delay", "notify", "timeit", "localize", "require_sandbox",
+    "factory", "log", "safe_output", "delay", "notify", "timeit", "account_resources", "localize",
+    "require_sandbox",
 ]
 
 
+import os
 import sys
 import time
 import traceback
@@ -33,6 +35,7 @@ import random
 import socket
 import collections
 import uuid
+import json
 
 import luigi
 import six
@@ -44,7 +47,7 @@ from law.target.file import localize_file_targets
 from law.target.local import LocalFileTarget
 from law.util import (
     no_value, uncolored, make_list, multi_match, human_duration, open_compat, join_generators,
-    TeeStream, perf_counter, empty_context,
+    TeeStream, perf_counter, empty_context, ResourceMonitor,
 )
 from law.logger import get_logger
 
@@ -477,6 +480,66 @@ def timeit(fn, opts, task, *args, **kwargs):
     return before_call, call, after_call, on_error
 
 
+@factory(interval=None, publish=True, accept_generator=True)
+def account_resources(fn, opts, task, *args, **kwargs):
+    """ account_resources(interval=None, publish=True)
+    Wraps a bound method of a task and accounts the resources used during its execution with a
+    :py:class:`law.util.ResourceMonitor`, sampling the memory and I/O usage of the task's process
+    tree every *interval* seconds, which defaults to the ``task.resource_accounting_interval``
+    config option. The resulting summary is stored in the *resource_summary* attribute of the task,
+    logged and, when *publish* is *True*, sent to the scheduler as a task message. When a branch
+    task is executed within a remote job, the summary is also reported to the submitting workflow
+    which stores it in its job data. Accounting can be disabled per task by setting an attribute
+    *account_resources* to *False*. Accepts generator functions.
+    """
+    def before_call():
+        if getattr(task, "account_resources", True) is False:
+            return None
+
+        interval = opts["interval"]
+        if interval is None:
+            from law.config import Config
+            interval = Config.instance().get_expanded_float("task", "resource_accounting_interval")
+
+        monitor = ResourceMonitor(interval=interval)
+        monitor.start()
+        return monitor
+
+    def call(monitor):
+        return fn(task, *args, **kwargs)
+
+    def report(monitor):
+        if monitor is None:
+            return
+
+        summary = monitor.stop()
+        task.resource_summary = summary
+
+        msg = "resources: {}".format(ResourceMonitor.format_summary(summary))
+        task.logger.info(msg)
+        if opts["publish"]:
+            task.publish_message(msg)
+
+        # when running inside a law job, append the summary of branch tasks to the file that is
+        # read by law_job.sh to report resources in the job log
+        resources_file = os.getenv("LAW_JOB_RESOURCES_FILE")
+        is_branch = getattr(task, "is_branch", None)
+        if resources_file and callable(is_branch) and is_branch():
+            try:
+                with open(resources_file, "a") as f:
+                    f.write("{} {}\n".format(task.branch, json.dumps(summary)))
+            except (IOError, OSError) as e:
+                logger.warning("could not report resources of {}: {}".format(task.task_id, e))
+
+    def after_call(monitor):
+        report(monitor)
+
+    def on_error(error, monitor):
+        report(monitor)
+
+    return before_call, call, after_call, on_error
+
+
 @factory(input=True, output=True, input_kwargs=None, output_kwargs=None, accept_generator=False)
 def localize(fn, opts, task, *args, **kwargs):
     """ localize(input=True, output=True, input_kwargs=None, output_kwargs=None)
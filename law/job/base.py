@@ -4,7 +4,9 @@
 Base classes for implementing remote job management and job file creation.
 """
 
-__all__ = ["BaseJobManager", "BaseJobFileFactory", "JobArguments", "JobInputFile"]
+__all__ = [
+    "BaseJobManager", "BaseJobFileFactory", "JobArguments", "JobInputFile", "JobQueryBroker",
+]
 
 
 import os
@@ -16,8 +18,9 @@ import base64
 import copy
 import re
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from multiprocessing.pool import ThreadPool
+import threading
 from threading import Lock
 from abc import ABCMeta, abstractmethod
 
@@ -26,9 +29,10 @@ import six
 from law.config import Config
 from law.target.file import get_scheme, get_path
 from law.target.remote.base import RemoteTarget
+from law.trace import span, count as trace_count
 from law.util import (
     colored, make_list, make_tuple, iter_chunks, makedirs, create_hash, create_random_string,
-    increment_path, kill_process,
+    increment_path, kill_process, range_join, SharedState, process_alive,
 )
 from law.logger import get_logger
 
@@ -36,18 +40,179 @@ from law.logger import get_logger
 logger = get_logger(__name__)
 
 
-def get_async_result_silent(result, timeout=None):
+class JobQueryBroker(object):
     """
-    Calls the ``get([timeout])`` method of an `AsyncResult
-    <https://docs.python.org/latest/library/multiprocessing.html#multiprocessing.pool.AsyncResult>`__
-    object *result* and returns its value. The only difference is that potentially raised exceptions
-    are returned instead of re-raised.
+    Broker that merges status queries of multiple callers, e.g. multiple remote workflows polling
+    jobs on the same batch system, into single queries. Callers can run in different threads and,
+    in particular, in different processes on the same machine, such as the worker processes of
+    ``law run ... --workers N``. Brokers are shared through :py:meth:`instance` per *key*, which
+    should identify the job manager class and all arguments that are forwarded to its query
+    methods, as only queries that can be answered by the same call can be merged. Their state is
+    kept in a :py:class:`law.util.SharedState` file in *directory*, named after a hash of the key.
+
+    Each call to :py:meth:`query` registers the requested job ids. When results of some of them
+    are missing or older than *max_age* seconds, the caller performs a single query for all job
+    ids that were registered by any caller within the last *window* seconds and stores the results
+    for *max_age* seconds, so that other callers requesting status information of their jobs in the
+    meantime reuse them. Callers that miss results while such a query is in progress wait for it to
+    finish instead of querying themselves. Merging therefore requires a positive *max_age*, ideally
+    of the order of the polling interval of the callers. Otherwise, each caller queries its own job
+    ids only.
+
+    Note that queries with arguments or job manager attributes that differ per caller, such as the
+    per-workflow constraint in the ``"constraint"`` query mode of the htcondor job manager, result
+    in different keys and are never merged.
+    """
+
+    _instances = {}
+    _instances_lock = Lock()
+
+    # seconds between checks of waiting callers whether a query in progress finished
+    wait_interval = 0.1
+
+    # seconds after which a query in progress is considered lost and taken over by waiting callers
+    query_timeout = 600.0
+
+    @classmethod
+    def instance(cls, key, window=None, max_age=None, directory=None):
+        """
+        Returns the broker instance registered for *key* and creates it first when missing.
+        *window*, *max_age* and *directory* default to the values of the
+        ``job_query_broker_window``, ``job_query_broker_max_age`` and ``job_query_broker_dir``
+        options in the ``[job]`` config section.
+        """
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(key, window=window, max_age=max_age,
+                    directory=directory)
+            return cls._instances[key]
+
+    @classmethod
+    def clear_instances(cls):
+        """
+        Removes all registered broker instances.
+        """
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    def __init__(self, key, window=None, max_age=None, directory=None):
+        super(JobQueryBroker, self).__init__()
+
+        cfg = Config.instance()
+        if window is None:
+            window = cfg.get_expanded_float("job", "job_query_broker_window")
+        if max_age is None:
+            max_age = cfg.get_expanded_float("job", "job_query_broker_max_age")
+        if directory is None:
+            directory = cfg.get_expanded("job", "job_query_broker_dir", None) or \
+                os.path.join(cfg.get_expanded("job", "job_file_dir"), "law_query_broker")
+
+        self.key = key
+        self.window = max(float(window or 0.0), 0.0)
+        self.max_age = max(float(max_age or 0.0), 0.0)
+        self.state = SharedState(os.path.join(directory, "{}.pkl".format(create_hash(repr(key)))))
+
+        # counters of this instance for monitoring purposes
+        self.n_queries = 0
+        self.n_requests = 0
+
+    def _prune(self, data, now):
+        # removes registrations older than the window and results older than max_age
+        data["ids"] = {
+            job_id: t for job_id, t in six.iteritems(data.get("ids", {}))
+            if now - t <= self.window
+        }
+        data["results"] = {
+            job_id: entry for job_id, entry in six.iteritems(data.get("results", {}))
+            if now - entry[0] <= self.max_age
+        }
+
+    def _acquire(self, job_ids):
+        # registers job_ids and returns available results, and either the list of job ids to query
+        # when the caller should perform the query, or None when it should wait for another query
+        query_ids = []
+        with self.state.locked() as data:
+            now = time.time()
+            self._prune(data, now)
+            data["ids"].update((job_id, now) for job_id in job_ids)
+
+            results = {
+                job_id: data["results"][job_id][1]
+                for job_id in job_ids
+                if job_id in data["results"]
+            }
+            if len(results) == len(job_ids):
+                return results, query_ids
+
+            # wait for a running query unless it is lost
+            owner = data.get("owner")
+            if owner and now - owner["time"] <= self.query_timeout and \
+                    process_alive(owner["pid"]) and owner["token"] != self._token():
+                return results, None
+
+            # become the owner and query all registered job ids without results
+            data["owner"] = {"pid": os.getpid(), "time": now, "token": self._token()}
+            query_ids = [job_id for job_id in data["ids"] if job_id not in data["results"]]
+
+        return results, query_ids
+
+    def _release(self, query_data):
+        # stores query results and releases the ownership
+        with self.state.locked() as data:
+            now = time.time()
+            self._prune(data, now)
+            data["results"].update(
+                (job_id, (now, d)) for job_id, d in six.iteritems(query_data)
+                if not isinstance(d, Exception)
+            )
+            if (data.get("owner") or {}).get("token") == self._token():
+                data["owner"] = None
 
-    """  # noqa
-    try:
-        return result.get(timeout)
-    except Exception as e:
-        return e
+    def _token(self):
+        # identifies the calling thread of the current process
+        return "{}_{}".format(os.getpid(), threading.current_thread().ident)
+
+    def query(self, job_ids, query_func, **kwargs):
+        """
+        Queries the status of jobs given by *job_ids* and returns an ordered dictionary mapping job
+        ids to status data or exceptions, in the same order as *job_ids*. *query_func* should have
+        the signature of :py:meth:`BaseJobManager.query_batch` and is invoked with the merged list
+        of job ids and all *kwargs* in case the caller is the one performing the query.
+        """
+        job_ids = list(job_ids)
+        self.n_requests += 1
+
+        # without caching, there is nothing to share
+        if self.max_age <= 0:
+            self.n_queries += 1
+            return OrderedDict(six.iteritems(query_func(job_ids, **kwargs)))
+
+        query_data = {}
+        while True:
+            results, query_ids = self._acquire(job_ids)
+            query_data.update(results)
+            if query_ids is not None:
+                break
+            time.sleep(self.wait_interval)
+
+        if query_ids:
+            # always release the ownership, even when interrupted
+            data = {}
+            try:
+                data = query_func(query_ids, **kwargs)
+            except Exception as e:
+                data = {job_id: e for job_id in query_ids}
+            finally:
+                self._release(data)
+            self.n_queries += 1
+
+            for job_id in job_ids:
+                if job_id not in query_data:
+                    query_data[job_id] = data.get(job_id, Exception(
+                        "job {} missing in merged query result".format(job_id),
+                    ))
+
+        return OrderedDict((job_id, query_data[job_id]) for job_id in job_ids)
 
 
 class BaseJobManager(six.with_metaclass(ABCMeta, object)):
@@ -169,6 +334,13 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
 
         The default chunk size value when no value is given in :py:meth:`query_batch`. If the value
         evaluates to *False*, no chunking is allowed.
+
+    .. py:classattribute:: query_broker_attributes
+
+        type: tuple
+
+        Names of instance attributes whose values have an effect on status queries and that are
+        therefore part of the :py:meth:`query_broker_key`.
     """
 
     PENDING = "pending"
@@ -201,6 +373,9 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
     chunk_size_cleanup = 0
     chunk_size_query = 0
 
+    # instance attributes that have an effect on status queries
+    query_broker_attributes = ()
+
     @classmethod
     def job_status_dict(cls, job_id=None, status=None, code=None, error=None, extra=None):
         """
@@ -225,6 +400,13 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
 
         self.last_counts = [0] * len(self.status_names)
 
+        # long-lived thread pools per number of threads, created lazily
+        self._executors = {}
+        self._executors_lock = Lock()
+
+    def __del__(self):
+        self.close()
+
     @abstractmethod
     def submit(self):
         """
@@ -273,15 +455,96 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
             "internal error, {}.group_job_ids not implemented".format(self.__class__.__name__),
         )
 
-    def _apply_batch(
+    def _get_executor(self, threads):
+        # returns the thread pool with *threads* workers and creates it first when missing
+        with self._executors_lock:
+            if threads not in self._executors:
+                self._executors[threads] = ThreadPool(threads)
+            return self._executors[threads]
+
+    def _close_executor(self, threads, terminate=False):
+        with self._executors_lock:
+            pool = self._executors.pop(threads, None)
+        if pool is not None:
+            if terminate:
+                pool.terminate()
+            else:
+                pool.close()
+
+    def close(self):
+        """
+        Shuts down all thread pools that were created for batched and grouped job interactions.
+        They are recreated lazily when needed again.
+        """
+        for threads in list(getattr(self, "_executors", {})):
+            try:
+                self._close_executor(threads)
+            except Exception:
+                pass
+
+    def _iter_calls(self, func, calls, threads, **kwargs):
+        # generator that applies func to all calls, given as a list of 3-tuples (args, job_objs,
+        # expand), using the thread pool with *threads* workers and yields 3-tuples (index, job_obj,
+        # data) for all job objects of each call in the order in which the calls complete; when
+        # expand is True, data is either a list or a dict to be indexed per job object
+        offsets = []
+        n_objs = 0
+        for _, job_objs, _ in calls:
+            offsets.append(n_objs)
+            n_objs += len(job_objs)
+
+        results = six.moves.queue.Queue()
+        kwargs["_processes"] = []
+
+        span_name = getattr(func, "__name__", "call")
+
+        def wrapper(i, args):
+            n_jobs = len(calls[i][1])
+            trace_count("job.{}.jobs".format(span_name), n_jobs)
+            try:
+                with span(span_name, "job_manager", manager=self.__class__.__name__,
+                        jobs=n_jobs):
+                    data = func(*args, **kwargs)
+            except Exception as e:
+                data = e
+            results.put((i, data))
+
+        pool = self._get_executor(threads)
+        for i, (args, _, _) in enumerate(calls):
+            pool.apply_async(wrapper, (i, args))
+
+        try:
+            for _ in range(len(calls)):
+                # use a timeout to stay responsive to keyboard interrupts
+                while True:
+                    try:
+                        i, data = results.get(True, 1)
+                        break
+                    except six.moves.queue.Empty:
+                        pass
+
+                _, job_objs, expand = calls[i]
+                for j, job_obj in enumerate(job_objs):
+                    _data = data
+                    if expand and not isinstance(data, Exception):
+                        try:
+                            _data = data[j] if isinstance(data, list) else data[job_obj]
+                        except (IndexError, KeyError):
+                            _data = Exception("no result for {}".format(job_obj))
+                    yield offsets[i] + j, job_obj, _data
+        except KeyboardInterrupt:
+            for p in kwargs["_processes"]:
+                kill_process(p, kill_group=True, kill_timeout=2)
+            self._close_executor(threads, terminate=True)
+            raise
+
+    def _iter_batch(
         self,
         func,
-        result_type,
         job_objs,
         default_chunk_size,
         threads=None,
         chunk_size=None,
-        callback=None,
         **kwargs  # noqa
     ):
         # default arguments
@@ -289,63 +552,65 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
 
         # is chunking allowed?
         chunk_size = max(chunk_size or default_chunk_size, 0) if default_chunk_size else 0
-        chunking = chunk_size > 0
 
-        # build chunks if needed
+        # build calls, either with chunks or single job objects
         job_objs = make_list(job_objs)
-        job_objs = list(iter_chunks(job_objs, chunk_size)) if chunking else job_objs
-
-        # factory to call the passed callback for each job file even when chunking
-        def cb_factory(i):
-            if not callable(callback):
-                return None
-
-            if chunking:
-                def wrapper(result_data):
-                    offset = sum(map(len, job_objs[:i]))
-                    for j in range(len(job_objs[i])):
-                        data = result_data if isinstance(result_data, Exception) else result_data[j]
-                        callback(offset + j, data)
-            else:
-                def wrapper(data):
-                    callback(i, data)
+        if chunk_size > 0:
+            calls = [(tuple([chunk]), chunk, True) for chunk in iter_chunks(job_objs, chunk_size)]
+        else:
+            calls = [(tuple([job_obj]), [job_obj], False) for job_obj in job_objs]
 
-            return wrapper
+        return self._iter_calls(func, calls, threads, **kwargs)
 
-        # threaded processing
-        pool = ThreadPool(threads)
-        kwargs["_processes"] = []
-        results = [
-            pool.apply_async(func, (arg,), kwargs, callback=cb_factory(i))
-            for i, arg in enumerate(job_objs)
-        ]
-        try:
-            pool.close()
-            pool.join()
-        except KeyboardInterrupt:
-            for p in kwargs["_processes"]:
-                kill_process(p, kill_group=True, kill_timeout=2)
-            raise
+    def _apply_batch(
+        self,
+        func,
+        result_type,
+        job_objs,
+        default_chunk_size,
+        threads=None,
+        chunk_size=None,
+        callback=None,
+        **kwargs  # noqa
+    ):
+        job_objs = make_list(job_objs)
+        results = [None] * len(job_objs)
+        for i, _, data in self._iter_batch(func, job_objs, default_chunk_size, threads=threads,
+                chunk_size=chunk_size, **kwargs):
+            results[i] = data
+            if callable(callback):
+                callback(i, data)
 
         # store result data or an exception
-        result_data = result_type()
-        if chunking:
-            for _job_objs, res in six.moves.zip(job_objs, results):
-                data = get_async_result_silent(res)
-                for i, job_obj in enumerate(_job_objs):
-                    if isinstance(result_data, list):
-                        result_data.append(data if isinstance(data, Exception) else data[i])
-                    else:
-                        result_data[job_obj] = data if isinstance(data, Exception) else data[job_obj]
-        else:
-            for job_obj, res in six.moves.zip(job_objs, results):
-                data = get_async_result_silent(res)
-                if isinstance(result_data, list):
-                    result_data.append(data)
-                else:
-                    result_data[job_obj] = data
+        if result_type is list:
+            return results
+        return result_type(six.moves.zip(job_objs, results))
 
-        return result_data
+    def iter_batch(self, action, job_objs, threads=None, chunk_size=None, **kwargs):
+        """
+        Generator that performs an *action*, i.e., ``"submit"``, ``"cancel"``, ``"cleanup"`` or
+        ``"query"``, for a batch of *job_objs*, i.e., job files or job ids, via the long-lived
+        thread pool of size *threads* which defaults to its instance attribute. When *chunk_size*,
+        which defaults to the corresponding class attribute (e.g. :py:attr:`chunk_size_query`), is
+        not negative, *job_objs* are split into chunks of that size.
+
+        In contrast to :py:meth:`submit_batch`, :py:meth:`cancel_batch`, etc., results are yielded
+        as soon as they are available, i.e., in the order in which the calls complete, as 3-tuples
+        containing the index of the job object in *job_objs*, the job object itself, and the return
+        value of the corresponding call or an exception if any occurred. All other *kwargs* are
+        passed to the method of the same name as *action*.
+        """
+        if action not in ("submit", "cancel", "cleanup", "query"):
+            raise ValueError("unknown job action '{}'".format(action))
+
+        return self._iter_batch(
+            func=getattr(self, action),
+            job_objs=job_objs,
+            default_chunk_size=getattr(self, "chunk_size_" + action),
+            threads=threads,
+            chunk_size=chunk_size,
+            **kwargs  # noqa
+        )
 
     def submit_batch(self, job_files, threads=None, chunk_size=None, callback=None, **kwargs):
         """
@@ -445,6 +710,8 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
         This method returns a dictionary that maps job ids to either the status query data or to an
         exception if any occurred.
         """
+        self.prepare_query(job_ids, **kwargs)
+
         return self._apply_batch(
             func=self.query,
             result_type=dict,
@@ -456,61 +723,82 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
             **kwargs  # noqa
         )
 
-    def _apply_group(
+    def prepare_query(self, job_ids, **kwargs):
+        """
+        Hook that is called once with all *job_ids* before their status is queried in chunks by
+        :py:meth:`query_batch` and :py:meth:`iter_query`, e.g. to create a single status snapshot
+        from which all chunks are served. *kwargs* are the same that are passed to :py:meth:`query`.
+        Does nothing by default.
+        """
+        return
+
+    def _iter_group(
         self,
         func,
-        result_type,
         group_func,
         job_objs,
         threads=None,
-        callback=None,
         **kwargs  # noqa
     ):
         # default arguments
         threads = max(threads or self.threads or 1, 1)
 
-        # group objects
-        job_objs = group_func(make_list(job_objs))
-
-        # factory to call the passed callback for each job file even when chunking
-        def cb_factory(i):
-            if not callable(callback):
-                return None
+        # group objects and build calls
+        groups = group_func(make_list(job_objs))
+        calls = [(make_tuple(item), item[1], True) for item in six.iteritems(groups)]
 
-            def wrapper(result_data):
-                offset = sum(map(len, list(job_objs.values())[:i]))
-                for j in range(len(list(job_objs.values())[i])):
-                    data = result_data if isinstance(result_data, Exception) else result_data[j]
-                    callback(offset + j, data)
+        return self._iter_calls(func, calls, threads, **kwargs)
 
-            return wrapper
-
-        # threaded processing
-        pool = ThreadPool(threads)
-        kwargs["_processes"] = []
-        results = [
-            pool.apply_async(func, make_tuple(arg), kwargs, callback=cb_factory(i))
-            for i, arg in enumerate(job_objs.items())
-        ]
-        try:
-            pool.close()
-            pool.join()
-        except KeyboardInterrupt:
-            for p in kwargs["_processes"]:
-                kill_process(p, kill_group=True, kill_timeout=2)
-            raise
+    def _apply_group(
+        self,
+        func,
+        result_type,
+        group_func,
+        job_objs,
+        threads=None,
+        callback=None,
+        **kwargs  # noqa
+    ):
+        results = []
+        for i, job_obj, data in self._iter_group(func, group_func, job_objs, threads=threads,
+                **kwargs):
+            results.append((i, job_obj, data))
+            if callable(callback):
+                callback(i, data)
+
+        # store result data or an exception, in the order of the groups
+        results.sort(key=lambda tpl: tpl[0])
+        if result_type is list:
+            return [data for _, _, data in results]
+        return result_type((job_obj, data) for _, job_obj, data in results)
 
-        # store result data or an exception
-        result_data = result_type()
-        for _job_objs, res in six.moves.zip(job_objs.values(), results):
-            data = get_async_result_silent(res)
-            for i, job_obj in enumerate(_job_objs):
-                if isinstance(result_data, list):
-                    result_data.append(data if isinstance(data, Exception) else data[i])
-                else:
-                    result_data[job_obj] = data if isinstance(data, Exception) else data[job_obj]
+    @classmethod
+    def _group_job_files(cls, job_files):
+        # trivial grouping of job files as required by submit_group
+        groups = OrderedDict()
+        for job_file in job_files:
+            groups.setdefault(job_file, []).append(job_file)
+        return groups
+
+    def iter_group(self, action, job_objs, threads=None, **kwargs):
+        """
+        Generator that performs an *action*, i.e., ``"submit"``, ``"cancel"``, ``"cleanup"`` or
+        ``"query"``, for several *job_objs* which are grouped as done in :py:meth:`submit_group`,
+        :py:meth:`cancel_group`, etc. Results are yielded as soon as a group call completes, as
+        3-tuples containing the index of the job object in the grouped sequence, the job object
+        itself, and the corresponding return value or an exception if any occurred. *threads* and
+        all other *kwargs* have the same meaning as in :py:meth:`iter_batch`.
+        """
+        if action not in ("submit", "cancel", "cleanup", "query"):
+            raise ValueError("unknown job action '{}'".format(action))
 
-        return result_data
+        return self._iter_group(
+            func=getattr(self, action),
+            group_func=self._group_job_files if action == "submit" else self.group_job_ids,
+            job_objs=job_objs,
+            threads=threads,
+            **kwargs  # noqa
+        )
 
     def submit_group(self, job_files, threads=None, callback=None, **kwargs):
         """
@@ -527,17 +815,11 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
         file properly expanded. When an exception was raised during a submission, this exception is
         added to the returned list.
         """
-        # in order to use the generic grouping mechanism in _apply_group create a trivial group_func
-        def group_func(job_files):
-            groups = defaultdict(list)
-            for job_file in job_files:
-                groups[job_file].append(job_file)
-            return groups
-
+        # in order to use the generic grouping mechanism in _apply_group use a trivial group_func
         return self._apply_group(
             func=self.submit,
             result_type=list,
-            group_func=group_func,
+            group_func=self._group_job_files,
             job_objs=job_files,
             threads=threads,
             callback=callback,
@@ -619,6 +901,67 @@ class BaseJobManager(six.with_metaclass(ABCMeta, object)):
             **kwargs  # noqa
         )
 
+    def query_broker_key(self, **kwargs):
+        """
+        Returns a hashable key that identifies the :py:class:`JobQueryBroker` through which status
+        queries with *kwargs* can be merged with those of other job manager instances. It consists
+        of the class, the values of all instance attributes listed in
+        :py:attr:`query_broker_attributes` and the representations of *kwargs*.
+        """
+        attrs = tuple(repr(getattr(self, attr, None)) for attr in self.query_broker_attributes)
+        kwargs = tuple((key, repr(value)) for key, value in sorted(six.iteritems(kwargs)))
+        return (self.__class__, attrs, kwargs)
+
+    def query_brokered(self, job_ids, threads=None, callback=None, **kwargs):
+        """
+        Queries the status of jobs given by *job_ids* via :py:meth:`query_group` if
+        :py:attr:`job_grouping_query` is *True*, and via :py:meth:`query_batch` otherwise. When the
+        ``job_query_broker`` option in the ``[job]`` config section is enabled, the query is
+        performed through the :py:class:`JobQueryBroker` identified by :py:meth:`query_broker_key`,
+        so that queries of concurrent callers in different threads or processes on the same machine
+        are merged into single queries against the batch system.
+
+        *threads*, *callback* and all other *kwargs* have the same meaning as in
+        :py:meth:`query_batch`. The return value is a dictionary that maps job ids to either the
+        status query data or to an exception if any occurred, in the same order as *job_ids*.
+        """
+        query_func = self.query_group if self.job_grouping_query else self.query_batch
+
+        if not Config.instance().get_expanded_bool("job", "job_query_broker"):
+            return query_func(job_ids, threads=threads, callback=callback, **kwargs)
+
+        broker = JobQueryBroker.instance(self.query_broker_key(**kwargs))
+        query_data = broker.query(job_ids, query_func, threads=threads, **kwargs)
+
+        if callable(callback):
+            for i, data in enumerate(six.itervalues(query_data)):
+                callback(i, data)
+
+        return query_data
+
+    def iter_query(self, job_ids, threads=None, **kwargs):
+        """
+        Generator that queries the status of jobs given by *job_ids* and yields 3-tuples containing
+        the index of the job id in *job_ids*, the job id itself, and the obtained status query data
+        or an exception if any occurred. When neither the ``job_query_broker`` nor
+        :py:attr:`job_grouping_query` is enabled, results are yielded as soon as they are available
+        through :py:meth:`iter_batch`. Otherwise, :py:meth:`query_brokered` is used. *threads* and
+        all other *kwargs* have the same meaning as in :py:meth:`query_batch`.
+        """
+        job_ids = make_list(job_ids)
+
+        if (
+            self.job_grouping_query or
+            Config.instance().get_expanded_bool("job", "job_query_broker")
+        ):
+            query_data = self.query_brokered(job_ids, threads=threads, **kwargs)
+            for i, job_id in enumerate(job_ids):
+                yield i, job_id, query_data.get(job_id)
+        else:
+            self.prepare_query(job_ids, **kwargs)
+            for tpl in self.iter_batch("query", job_ids, threads=threads, **kwargs):
+                yield tpl
+
     def status_line(self, counts, last_counts=None, sum_counts=None, timestamp=True, align=False,
             color=False):
         """
@@ -813,7 +1156,8 @@ class BaseJobFileFactory(six.with_metaclass(ABCMeta, object)):
         self.cleanup_dir(force=False)
 
     def __call__(self, *args, **kwargs):
-        return self.create(*args, **kwargs)
+        with span("create", "job_file", factory=self.__class__.__name__):
+            return self.create(*args, **kwargs)
 
     def __enter__(self):
         return self
@@ -1161,6 +1505,15 @@ class JobArguments(object):
         encoded = base64.b64encode(six.b(" ".join(str(v) for v in l) or "-"))
         return encoded.decode("utf-8") if six.PY3 else encoded
 
+    @classmethod
+    def encode_branches(cls, branches):
+        """
+        Encodes a list of *branches* into a string via base64 encoding, joining contiguous branches
+        to ranges in the format ``start:end`` (end not included) to keep arguments compact.
+        """
+        encoded = base64.b64encode(six.b(range_join(branches, to_str=True, sep=" ") or "-"))
+        return encoded.decode("utf-8") if six.PY3 else encoded
+
     def get_args(self):
         """
         Returns the list of encoded job arguments. The order of this list corresponds to the
@@ -1170,7 +1523,7 @@ class JobArguments(object):
             self.task_cls.__module__,
             self.task_cls.__name__,
             self.encode_string(self.task_params),
-            self.encode_list(self.branches),
+            self.encode_branches(self.branches),
             self.workers,
             self.encode_bool(self.auto_retry),
             self.encode_list(self.dashboard_data),
@@ -0,0 +1,237 @@
+# coding: utf-8
+
+"""
+Job-side heartbeat writer that periodically reports the progress and resource usage of a running
+law job to a location that is read by the submitting remote workflow. It is started in the
+background by the law job script.
+"""
+
+__all__ = ["encode_location", "decode_location", "heartbeat_file_name", "HeartbeatWriter"]
+
+
+import os
+import sys
+import time
+import json
+import base64
+import signal
+import argparse
+import threading
+import tempfile
+
+import six
+
+from law.util import range_expand, process_tree_usage
+
+
+def encode_location(location):
+    """
+    Encodes a heartbeat *location*, i.e., a local directory path or a remote directory target, into
+    a base64 encoded string that is passed to jobs. Remote targets must be associated to a named
+    file system so that they can be reconstructed inside jobs.
+    """
+    from law.target.remote.base import RemoteTarget
+    from law.target.local import LocalTarget
+
+    data = {}
+    if isinstance(location, six.string_types):
+        data["path"] = os.path.abspath(os.path.expandvars(os.path.expanduser(location)))
+    elif isinstance(location, LocalTarget):
+        data["path"] = location.abspath
+    elif isinstance(location, RemoteTarget) and location.fs.name:
+        data["cls"] = "{}.{}".format(location.__class__.__module__, location.__class__.__name__)
+        data["path"] = location.path
+        data["fs"] = location.fs.name
+    else:
+        raise ValueError("cannot encode heartbeat location {!r}".format(location))
+
+    return base64.b64encode(six.b(json.dumps(data))).decode("utf-8")
+
+
+def decode_location(encoded):
+    """
+    Decodes an *encoded* heartbeat location as created by :py:func:`encode_location` and returns
+    either a local directory path or a remote directory target.
+    """
+    data = json.loads(base64.b64decode(six.b(encoded)).decode("utf-8"))
+    if "cls" not in data:
+        return data["path"]
+
+    modid, cls_name = data["cls"].rsplit(".", 1)
+    mod = __import__(modid, globals(), locals(), [cls_name])
+    return getattr(mod, cls_name)(data["path"], fs=data["fs"])
+
+
+def heartbeat_file_name(branches, token=None):
+    """
+    Returns the name of the heartbeat file of a job processing *branches*. As jobs cover disjoint
+    sets of branches, the name is derived from the first one. The *token* identifies a particular
+    submission of the job, so that resubmitted jobs and speculative copies of jobs write separate
+    files, and outdated files are never read.
+    """
+    name = "heartbeat_{}".format(min(branches))
+    if token:
+        name += "_{}".format(token)
+    return name + ".json"
+
+
+def _read_branches(path):
+    # reads branch numbers from the first column of a file
+    branches = []
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts:
+                    try:
+                        branches.append(int(parts[0]))
+                    except ValueError:
+                        pass
+    return branches
+
+
+def _read_resources(path):
+    # reads resource summaries per branch from lines "<branch> <json>" of a file
+    resources = {}
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.strip().split(" ", 1)
+                if len(parts) != 2:
+                    continue
+                try:
+                    resources[int(parts[0])] = json.loads(parts[1])
+                except ValueError:
+                    pass
+    return resources
+
+
+class HeartbeatWriter(object):
+    """
+    Periodically writes heartbeat records of a job processing *branches* to a *location* every
+    *interval* seconds, into a file whose name contains the submission *token*. A record is a json
+    dictionary containing the *token*, a sequence number *seq* that increases with every record,
+    the current *time* of the job's host, the job *status*, the lists of all *branches*, *done* and
+    currently *running* branches, and the summed *rss* (in bytes) and *cpu* time (in seconds) of the
+    process tree of *pid*.
+    Completed and started branches are read from the files given by *done_file* and
+    *started_file*. When *resources_file* is set, resource summaries of completed branches that
+    were accounted by :py:func:`law.decorator.account_resources` are added as *resources*.
+    """
+
+    def __init__(self, location, branches, token=None, interval=60.0, pid=None, done_file=None,
+            started_file=None, resources_file=None):
+        super(HeartbeatWriter, self).__init__()
+
+        self.location = location
+        self.branches = list(branches)
+        self.token = token
+        self.interval = max(float(interval), 1.0)
+        self.pid = pid or os.getppid()
+        self.done_file = done_file
+        self.started_file = started_file
+        self.resources_file = resources_file
+
+        self._stop = threading.Event()
+        self._seq = 0
+
+    def record(self, status="running"):
+        done = _read_branches(self.done_file)
+        started = _read_branches(self.started_file)
+        usage = process_tree_usage(self.pid) or {}
+        self._seq += 1
+        record = {
+            "token": self.token,
+            "seq": self._seq,
+            "time": time.time(),
+            "status": status,
+            "branches": self.branches,
+            "done": sorted(set(done)),
+            "running": sorted(set(started) - set(done)),
+            "rss": usage.get("rss"),
+            "cpu": usage.get("cpu"),
+        }
+        resources = _read_resources(self.resources_file)
+        if resources:
+            record["resources"] = resources
+        return record
+
+    def write(self, record):
+        name = heartbeat_file_name(self.branches, self.token)
+        content = json.dumps(record)
+
+        if isinstance(self.location, six.string_types):
+            # write atomically into the local or shared directory
+            if not os.path.exists(self.location):
+                os.makedirs(self.location)
+            fd, tmp = tempfile.mkstemp(dir=self.location, prefix=".{}".format(name))
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.rename(tmp, os.path.join(self.location, name))
+        else:
+            # write a local file and transfer it to the remote directory
+            fd, tmp = tempfile.mkstemp(suffix=".json")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(content)
+                self.location.child(name, type="f").copy_from_local(tmp)
+            finally:
+                os.remove(tmp)
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run(self):
+        """
+        Writes records until :py:meth:`stop` is called or the observed process ends, and writes a
+        final record with status ``"stopped"``.
+        """
+        while not self._stop.is_set():
+            try:
+                self.write(self.record())
+            except Exception as e:
+                sys.stderr.write("heartbeat failed: {}\n".format(e))
+            self._stop.wait(self.interval)
+
+            # stop when the observed process is gone
+            try:
+                os.kill(self.pid, 0)
+            except OSError:
+                break
+
+        try:
+            self.write(self.record(status="stopped"))
+        except Exception as e:
+            sys.stderr.write("final heartbeat failed: {}\n".format(e))
+
+
+def main(argv=None):
+    """
+    Entry point when executed as a script by the law job script.
+    """
+    parser = argparse.ArgumentParser(description="law job heartbeat writer")
+    parser.add_argument("location", help="base64 encoded heartbeat location")
+    parser.add_argument("branches", help="comma-separated branches or branch ranges processed "
+        "by the job")
+    parser.add_argument("--token", help="token identifying the submission of the job")
+    parser.add_argument("--interval", type=float, default=60.0, help="heartbeat interval")
+    parser.add_argument("--pid", type=int, help="id of the process to observe")
+    args = parser.parse_args(argv)
+
+    writer = HeartbeatWriter(
+        location=decode_location(args.location),
+        branches=range_expand([b for b in args.branches.split(",") if b]),
+        token=args.token,
+        interval=args.interval,
+        pid=args.pid,
+        done_file=os.getenv("LAW_JOB_RUNTIMES_FILE"),
+        started_file=os.getenv("LAW_JOB_STARTED_FILE"),
+        resources_file=os.getenv("LAW_JOB_RESOURCES_FILE"),
+    )
+
+    signal.signal(signal.SIGTERM, writer.stop)
+    writer.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@
 # 1. LAW_JOB_TASK_MODULE: The module of the task class that is executed.
 # 2. LAW_JOB_TASK_CLASS: The task class that is executed.
 # 3. LAW_JOB_TASK_PARAMS: The base64 encoded representation of task parameters.
-# 4. LAW_JOB_TASK_BRANCHES: The base64 encoded list of task branches to run.
+# 4. LAW_JOB_TASK_BRANCHES: The base64 encoded list of task branches to run, with contiguous
+#      branches joined to ranges in the format "start:end" (end not included).
 # 5. LAW_JOB_WORKERS: The number of workers to use for processing branches in parallel.
 # 6. LAW_JOB_AUTO_RETRY: Either "yes" or "no" to control whether failed tasks are rerun once within
 #      the job.
@@ -24,6 +25,13 @@
 #     contains symbolic links to all input files.
 # - LAW_SRC_PATH: The location of the law package, obtained via "law location".
 # - LAW_JOB_TMP: A directory "tmp" inside LAW_JOB_HOME.
+# - LAW_JOB_RUNTIMES_FILE: A file inside LAW_JOB_HOME to which law appends the runtimes of
+#     processed branches, which are reported in the job output afterwards.
+# - LAW_JOB_STARTED_FILE: A file inside LAW_JOB_HOME to which law appends started branches when a
+#     heartbeat location is set.
+# - LAW_JOB_RESOURCES_FILE: A file inside LAW_JOB_HOME to which law appends resource summaries of
+#     processed branches whose run methods are accounted, which are reported in the job output
+#     afterwards.
 # - LAW_TARGET_TMP_DIR: Same as LAW_JOB_TMP.
 # - LAW_JOB_ORIGINAL_TMP: Original value of the TMP variable.
 # - LAW_JOB_ORIGINAL_TEMP: Original value of the TEMP variable.
@@ -47,6 +55,10 @@
 # - stageout_command: A command that is executed after running tasks.
 # - stageout_file: A file that is executed after running tasks.
 # - log_file: A file for logging stdout and stderr simultaneously.
+# - heartbeat_location: Base64 encoded location to which heartbeat records are written
+#     periodically, see law.job.heartbeat.
+# - heartbeat_interval: The interval in seconds between two heartbeat records.
+# - heartbeat_token: A token identifying the job submission, added to the heartbeat file name.
 #
 # Dashboard hooks (called when found in environment):
 # - law_hook_job_running: A function that is called right before the job setup starts. No arguments.
@@ -84,7 +96,15 @@ law_job() {
     export LAW_JOB_TASK_PARAMS="$( echo "$3" | base64 --decode )"
     export LAW_JOB_TASK_BRANCHES="$( echo "$4" | base64 --decode )"
     export LAW_JOB_TASK_BRANCHES_CSV="${LAW_JOB_TASK_BRANCHES// /,}"
-    export LAW_JOB_TASK_N_BRANCHES="$( echo "${LAW_JOB_TASK_BRANCHES}" | tr " " "\n" | wc -l | tr -d " " )"
+    export LAW_JOB_TASK_N_BRANCHES="0"
+    local branch_range
+    for branch_range in ${LAW_JOB_TASK_BRANCHES}; do
+        if [[ "${branch_range}" == *:* ]]; then
+            LAW_JOB_TASK_N_BRANCHES="$(( LAW_JOB_TASK_N_BRANCHES + ${branch_range#*:} - ${branch_range%%:*} ))"
+        else
+            LAW_JOB_TASK_N_BRANCHES="$(( LAW_JOB_TASK_N_BRANCHES + 1 ))"
+        fi
+    done
     export LAW_JOB_WORKERS="$5"
     export LAW_JOB_AUTO_RETRY="$6"
     export LAW_JOB_DASHBOARD_DATA="$( echo "$7" | base64 --decode )"
@@ -115,6 +135,9 @@ law_job() {
     local bootstrap_file="{{bootstrap_file}}"
     local bootstrap_command="{{bootstrap_command}}"
     local dashboard_file="{{dashboard_file}}"
+    local heartbeat_location="{{heartbeat_location}}"
+    local heartbeat_interval="{{heartbeat_interval}}"
+    local heartbeat_token="{{heartbeat_token}}"
     local input_files
     input_files=( {{input_files}} )
     local input_files_render
@@ -238,6 +261,42 @@ law_job() {
         fi
     }
 
+    _law_job_start_heartbeat() {
+        [ -z "${heartbeat_location}" ] && return "0"
+
+        export LAW_JOB_STARTED_FILE="${LAW_JOB_HOME}/law_job_started.txt"
+        local py_exe="python"
+        _law_exe_exists python || py_exe="python3"
+        ${py_exe} -m law.job.heartbeat "${heartbeat_location}" "${LAW_JOB_TASK_BRANCHES_CSV}" \
+            --token "${heartbeat_token}" --interval "${heartbeat_interval:-60}" --pid "$$" &
+        heartbeat_pid="$!"
+        echo "started heartbeat writer (pid ${heartbeat_pid})"
+    }
+
+    _law_job_stop_heartbeat() {
+        [ -z "${heartbeat_pid}" ] && return "0"
+
+        kill -TERM "${heartbeat_pid}" &> /dev/null
+        wait "${heartbeat_pid}" &> /dev/null
+        heartbeat_pid=""
+    }
+
+    _law_job_report_runtimes() {
+        [ ! -f "${LAW_JOB_RUNTIMES_FILE}" ] && return "0"
+
+        echo
+        _law_job_subsection "branch runtimes"
+        sed "s/^/law_job_branch_runtime: /" "${LAW_JOB_RUNTIMES_FILE}"
+    }
+
+    _law_job_report_resources() {
+        [ ! -f "${LAW_JOB_RESOURCES_FILE}" ] && return "0"
+
+        echo
+        _law_job_subsection "branch resources"
+        sed "s/^/law_job_branch_resources: /" "${LAW_JOB_RESOURCES_FILE}"
+    }
+
     _law_job_cleanup() {
         _law_job_section "cleanup"
 
@@ -261,6 +320,9 @@ law_job() {
         local job_exit_code="${1:-0}"
         local task_exit_code="$2"
 
+        # stop the heartbeat writer
+        _law_job_stop_heartbeat
+
         # stageout
         # when the job exit code was zero, replace it by that of stageout
         _law_job_stageout "${job_exit_code}"
@@ -535,6 +597,16 @@ EOT
 
     _law_job_section "run task ${branch_param} ${LAW_JOB_TASK_BRANCHES_CSV}"
 
+    # file in which runtimes of branches are stored by law
+    export LAW_JOB_RUNTIMES_FILE="${LAW_JOB_HOME}/law_job_runtimes.txt"
+
+    # file in which resource summaries of branches are stored by law
+    export LAW_JOB_RESOURCES_FILE="${LAW_JOB_HOME}/law_job_resources.txt"
+
+    # start the heartbeat writer in the background, stopped again during finalization
+    local heartbeat_pid=""
+    _law_job_start_heartbeat
+
     # build the full command
     local cmd="law run ${LAW_JOB_TASK_MODULE}.${LAW_JOB_TASK_CLASS} ${LAW_JOB_TASK_PARAMS} --${branch_param}=${LAW_JOB_TASK_BRANCHES_CSV} ${workflow_param} --workers=${LAW_JOB_WORKERS}"
     echo "cmd: ${cmd}"
@@ -570,6 +642,9 @@ EOT
         date +"%d/%m/%Y %T.%N (%Z)"
     fi
 
+    _law_job_report_runtimes
+    _law_job_report_resources
+
     if [ "${law_ret}" != "0" ]; then
         >&2 echo "execution of ${branch_param} ${LAW_JOB_TASK_BRANCHES_CSV} failed (exit code ${law_ret}), stop job"
         _law_job_call_hook law_hook_job_failed "60" "${law_ret}"
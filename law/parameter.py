@@ -13,6 +13,7 @@ __all__ = [
 
 import functools
 import csv
+import threading
 from collections import OrderedDict
 
 import luigi
@@ -21,8 +22,8 @@ import six
 from law.notification import notify_mail, notify_custom
 from law.util import (
     human_duration, parse_duration, time_units, time_unit_aliases, human_bytes, parse_bytes,
-    byte_units, is_lazy_iterable, make_tuple, make_unique, brace_expand, range_expand, try_int,
-    no_value,
+    byte_units, is_lazy_iterable, make_tuple, make_unique, brace_expand, try_int, no_value,
+    BranchRangeSet,
 )
 from law.logger import get_logger
 
@@ -65,6 +66,57 @@ def get_param(value, default=None):
     return default if is_no_param(value) else value
 
 
+# lock protecting memoization caches of parameters
+_memo_lock = threading.Lock()
+
+# types of inputs whose parsing and serialization results are memoized
+_memo_types = six.string_types + six.integer_types + (tuple,)
+
+
+def _memo_key(value):
+    # returns a key for value that also distinguishes types of (nested) elements so that, e.g., 1,
+    # 1.0 and True lead to different keys
+    if isinstance(value, tuple):
+        return tuple(map(_memo_key, value))
+    return (value.__class__, value)
+
+
+def _memoize(func):
+    # decorator for parse and serialize methods of parameters that stores results per parameter
+    # instance in a lru cache with a maximum size of memo_size, keyed on immutable inputs only
+    @functools.wraps(func)
+    def wrapper(self, inp):
+        if self.memo_size <= 0 or not isinstance(inp, _memo_types):
+            return func(self, inp)
+
+        try:
+            key = (func, _memo_key(inp))
+            hash(key)
+        except TypeError:
+            return func(self, inp)
+
+        memo = self.__dict__.get("_memo")
+        if memo is None:
+            memo = self.__dict__.setdefault("_memo", OrderedDict())
+
+        with _memo_lock:
+            if key in memo:
+                # move to the end
+                value = memo[key] = memo.pop(key)
+                return value
+
+        value = func(self, inp)
+
+        with _memo_lock:
+            memo[key] = value
+            while len(memo) > self.memo_size:
+                memo.popitem(last=False)
+
+        return value
+
+    return wrapper
+
+
 class Parameter(luigi.Parameter):
     """ __init__(*args, parse_empty=False, **kwargs)
     Custom base class of law-based parameters that adds additional features.
@@ -97,6 +149,8 @@ class TaskInstanceParameter(Parameter):
 
     def serialize(self, x):
         """"""
+        from law.task.base import Task
+
         if isinstance(x, Task):
             return getattr(x, "live_task_id", x.task_id)
         return str(x)
@@ -337,6 +391,14 @@ class CSVParameter(Parameter):
         undesired side effects, the *default* value given to the constructor is also converted to a
         tuple.
 
+    .. py:classattribute:: memo_size
+
+        type: int
+
+        Maximum number of results of :py:meth:`parse` and :py:meth:`serialize` calls with immutable
+        inputs that are memoized per parameter instance in a least-recently-used fashion. Memoization
+        is disabled when zero. Defaults to 1024.
+
     .. py:attribute:: _inst
 
         type: :py:attr:`cls`
@@ -345,6 +407,8 @@ class CSVParameter(Parameter):
         parameter parsing and serialization.
     """
 
+    memo_size = 1024
+
     def __init__(self, *args, **kwargs):
         self._cls = kwargs.pop("cls", luigi.Parameter)
         self._inst = kwargs.pop("inst", None)
@@ -410,6 +474,7 @@ class CSVParameter(Parameter):
             raise ValueError("invalid parameter value(s) '{}', valid choices are '{}'".format(
                 str_repr(make_unique(unknown)), str_repr(self._choices)))
 
+    @_memoize
     def parse(self, inp):
         """"""
         return_single_value = False
@@ -447,6 +512,7 @@ class CSVParameter(Parameter):
 
         return value[0] if return_single_value else value
 
+    @_memoize
     def serialize(self, value):
         """"""
         if value in (None, NO_STR, no_value):
@@ -550,6 +616,7 @@ class MultiCSVParameter(CSVParameter):
 
     _dialect = _Dialect()
 
+    @_memoize
     def parse(self, inp):
         """"""
         if not inp or inp == NO_STR:
@@ -572,6 +639,7 @@ class MultiCSVParameter(CSVParameter):
 
         return value
 
+    @_memoize
     def serialize(self, value):
         """"""
         if not value:
@@ -634,23 +702,33 @@ class RangeParameter(Parameter):
         type: None
 
         Value denoting open edges in parsed ranges.
+
+    .. py:classattribute:: memo_size
+
+        type: int
+
+        Maximum number of results of :py:meth:`parse` and :py:meth:`serialize` calls with immutable
+        inputs that are memoized per parameter instance in a least-recently-used fashion. Memoization
+        is disabled when zero. Defaults to 1024.
     """
 
     RANGE_SEP = ":"
     OPEN = None
 
+    memo_size = 1024
+
     @classmethod
     def expand(cls, range, **kwargs):
         """
         Expands *range* (as returned by :py:meth:`parse`) to a sorted list of unique integers.
-        Additional *kwargs* are forwarded to :py:func:`law.util.range_expand`.
+        Additional *kwargs* are forwarded to :py:meth:`law.util.BranchRangeSet.from_ranges`.
 
         .. code-block:: python
 
             RangeParameter.expand((4, 8))
             # -> [4, 5, 6, 7]
         """
-        return sorted(set(range_expand(range, **kwargs)))
+        return list(BranchRangeSet.from_ranges(range, **kwargs))
 
     def __init__(self, *args, **kwargs):
         self._require_start = kwargs.pop("require_start", True)
@@ -688,6 +766,7 @@ class RangeParameter(Parameter):
             raise ValueError("cannot interpret {} with {} elements as {}".format(
                 value, len(value), self.__class__.__name__))
 
+    @_memoize
     def parse(self, inp):
         """"""
         if inp in (None, "", NO_STR, no_value):
@@ -710,6 +789,7 @@ class RangeParameter(Parameter):
 
         return value
 
+    @_memoize
     def serialize(self, value):
         """"""
         if not value:
@@ -755,15 +835,16 @@ class MultiRangeParameter(RangeParameter):
     def expand(cls, ranges, **kwargs):
         """
         Expands *ranges* (as returned by :py:meth:`parse`) to a sorted list of unique integers.
-        Additional *kwargs* are forwarded to :py:func:`law.util.range_expand`.
+        Additional *kwargs* are forwarded to :py:meth:`law.util.BranchRangeSet.from_ranges`.
 
         .. code-block:: python
 
             MultiRangeParameter.expand(((4, 8), (12, 14)))
             # -> [4, 5, 6, 7, 8, 12, 13, 14]
         """
-        return sorted(set.union(*map(set, map(functools.partial(range_expand, **kwargs), ranges))))
+        return list(BranchRangeSet.from_ranges(list(ranges), **kwargs))
 
+    @_memoize
     def parse(self, inp):
         """"""
         if inp in (None, "", NO_STR, no_value):
@@ -778,6 +859,7 @@ class MultiRangeParameter(RangeParameter):
 
         return value
 
+    @_memoize
     def serialize(self, value):
         """"""
         if not value:
@@ -922,7 +1004,3 @@ class NotifyCustomParameter(NotifyParameter):
         """"""
         # success is not forwarded, as the message content will have a field "Traceback" when failed
         return notify_custom(*args, **kwargs)
-
-
-# trailing imports
-from law.task.base import Task
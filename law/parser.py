@@ -201,7 +201,7 @@ def global_cmdline_values():
     """
     global _global_cmdline_values
 
-    if not _global_cmdline_values:
+    if _global_cmdline_values is None:
         luigi_parser = luigi.cmdline_parser.CmdlineParser.get_instance()
         if not luigi_parser:
             return None
@@ -8,6 +8,7 @@ law, rather than changing default luigi behavior.
 __all__ = ["before_run", "patch_all"]
 
 
+import sys
 import re
 import functools
 import copy
@@ -26,6 +27,12 @@ _patched = False
 _before_run_funcs = []
 
 
+def _sandbox_attr(attr, default=None):
+    # the sandbox module is only imported on demand or when running in a sandbox (see law/__init__),
+    # so when it is not loaded yet, no sandbox switch happened and defaults apply
+    return getattr(sys.modules.get("law.sandbox.base"), attr, default)
+
+
 def before_run(func, force=False):
     """
     Adds a function *func* to the list of callbacks that are invoked right before luigi starts
@@ -113,11 +120,14 @@ def patch_task_process_run():
     def run(self):
         previous_level = interface_logger.level
 
-        # update logging for local workflows that already yielded their branch tasks
+        # update logging for local workflows that already yielded their branch tasks, given that
+        # local workflows were imported at all
+        local = sys.modules.get("law.workflow.local")
         if (
-            isinstance(self.task, law.LocalWorkflow) and
+            local is not None and
+            isinstance(self.task, local.LocalWorkflow) and
             self.task.is_workflow() and
-            isinstance(self.task.workflow_proxy, law.workflow.local.LocalWorkflowProxy) and
+            isinstance(self.task.workflow_proxy, local.LocalWorkflowProxy) and
             not self.task.local_workflow_require_branches and
             self.task.workflow_proxy._local_workflow_has_yielded
         ):
@@ -203,7 +213,7 @@ def patch_worker_add_task():
 
         # check if sandboxed and adjust log level
         previous_level = interface_logger.level
-        if law.sandbox.base._sandbox_switched:
+        if _sandbox_attr("_sandbox_switched", False):
             # increase the log level
             interface_logger.setLevel(logging.WARNING)
 
@@ -234,8 +244,8 @@ def patch_worker_add():
     def _add(self, task, *args, **kwargs):
         # _add_orig returns a generator, which we simply drain here
         # when we are in a sandbox
-        if law.sandbox.base._sandbox_switched:
-            task.task_id = law.sandbox.base._sandbox_task_id
+        if _sandbox_attr("_sandbox_switched", False):
+            task.task_id = _sandbox_attr("_sandbox_task_id")
             for _ in _add_orig(self, task, *args, **kwargs):
                 pass
             return []
@@ -268,7 +278,7 @@ def patch_worker_run_task():
             task._worker_first_task_id = None
 
         # make worker disposable when sandboxed
-        if law.sandbox.base._sandbox_switched:
+        if _sandbox_attr("_sandbox_switched", False):
             self._start_phasing_out()
 
     luigi.worker.Worker._run_task = _run_task
@@ -287,10 +297,10 @@ def patch_worker_get_work():
 
     @functools.wraps(_get_work_orig)
     def _get_work(self):
-        if law.sandbox.base._sandbox_switched:
+        if _sandbox_attr("_sandbox_switched", False):
             # when the worker is configured to stop requesting work, as triggered by the patched
             # _run_task method (see above), the worker response should contain an empty task_id
-            task_id = None if self._stop_requesting_work else law.sandbox.base._sandbox_task_id
+            task_id = None if self._stop_requesting_work else _sandbox_attr("_sandbox_task_id")
             return luigi.worker.GetWorkResponse(
                 task_id=task_id,
                 running_tasks=[],
@@ -314,8 +324,8 @@ def patch_worker_factory():
     """
     def create_worker(self, scheduler, worker_processes, assistant=False):
         worker = luigi.worker.Worker(scheduler=scheduler, worker_processes=worker_processes,
-            assistant=assistant, worker_id=law.sandbox.base._sandbox_worker_id or None)
-        worker._first_task = law.sandbox.base._sandbox_worker_first_task_id or None
+            assistant=assistant, worker_id=_sandbox_attr("_sandbox_worker_id") or None)
+        worker._first_task = _sandbox_attr("_sandbox_worker_first_task_id") or None
         return worker
 
     luigi.interface._WorkerSchedulerFactory.create_worker = create_worker
@@ -333,7 +343,7 @@ def patch_keepalive_run():
     @functools.wraps(run_orig)
     def run(self):
         # do not run the keep-alive loop when sandboxed
-        if law.sandbox.base._sandbox_switched:
+        if _sandbox_attr("_sandbox_switched", False):
             self.stop()
         else:
             run_orig(self)
@@ -351,7 +361,7 @@ def patch_luigi_run_result():
         __init__orig(self, *args, **kwargs)
 
         # condense the summary text into a single line when sandboxed
-        if law.sandbox.base._sandbox_switched:
+        if _sandbox_attr("_sandbox_switched", False):
             self.summary_text = luigi.execution_summary._create_one_line_summary(self.status)
 
     luigi.execution_summary.LuigiRunResult.__init__ = __init__
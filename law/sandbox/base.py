@@ -24,6 +24,7 @@ from law.target.local import LocalDirectoryTarget
 from law.target.collection import TargetCollection
 from law.parameter import NO_STR
 from law.parser import root_task
+from law.trace import span
 from law.util import (
     colored, is_pattern, multi_match, mask_struct, map_struct, interruptable_popen, patch_object,
     flatten,
@@ -277,7 +278,8 @@ class Sandbox(six.with_metaclass(ABCMeta, object)):
         cache_key = (self.sandbox_type, self.env_cache_key)
 
         if cache_key not in self._envs:
-            self._envs[cache_key] = self.create_env()
+            with span("create_env", "sandbox", sandbox=self.key):
+                self._envs[cache_key] = self.create_env()
 
         return self._envs[cache_key]
 
@@ -437,7 +439,8 @@ class SandboxProxy(ProxyTask):
         tmp_dir.touch()
 
         # stage-in input files
-        stagein_info = self.stagein(tmp_dir)
+        with span("stagein", "sandbox", sandbox=self.sandbox_inst.key):
+            stagein_info = self.stagein(tmp_dir)
         if stagein_info:
             # tell the sandbox
             self.sandbox_inst.stagein_info = stagein_info
@@ -451,10 +454,11 @@ class SandboxProxy(ProxyTask):
             logger.debug("configured sandbox stage-out data")
 
         # create the actual command to run
-        cmd = self.sandbox_inst.cmd(self.create_proxy_cmd())
+        with span("cmd", "sandbox", sandbox=self.sandbox_inst.key):
+            cmd = self.sandbox_inst.cmd(self.create_proxy_cmd())
 
         # run with log section before and after actual run call
-        with self._run_context(cmd):
+        with self._run_context(cmd), span("run", "sandbox", sandbox=self.sandbox_inst.key):
             code, out, err = self.sandbox_inst.run(cmd)
             if code != 0:
                 raise Exception(
@@ -464,7 +468,8 @@ class SandboxProxy(ProxyTask):
 
         # actual stage_out
         if stageout_info:
-            self.stageout(stageout_info)
+            with span("stageout", "sandbox", sandbox=self.sandbox_inst.key):
+                self.stageout(stageout_info)
 
         # post_run hook
         if callable(self.task.sandbox_post_run):
@@ -0,0 +1,166 @@
+# coding: utf-8
+
+"""
+Startup profiler that reports the import time per module of a python statement or a law command
+line invocation, based on the ``-X importtime`` interpreter option (python 3.7 or newer). Usage:
+
+.. code-block:: bash
+
+    # profile "import law"
+    python -m law.startup_profile
+
+    # profile a job-like "law run" invocation, only showing the 30 slowest law modules
+    python -m law.startup_profile --top 30 --filter law -- run my.module.MyTask --branch 0
+"""
+
+__all__ = ["ImportRecord", "profile_imports", "parse_import_times"]
+
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import OrderedDict, namedtuple
+
+
+ImportRecord = namedtuple("ImportRecord", ["module", "self_time", "cumulative_time", "depth"])
+ImportRecord.__doc__ = """
+Import timing of a single *module* with its *self_time* and *cumulative_time* in seconds, and the
+*depth* at which it was (first) imported.
+"""
+
+
+def parse_import_times(output):
+    """
+    Parses the *output* of a python process that was started with ``-X importtime`` and returns a
+    list of :py:class:`ImportRecord` objects in the order of completed imports.
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3:
+            continue
+        self_time, cum_time, name = parts
+        # skip the header
+        if not self_time.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(
+            module=name.strip(),
+            self_time=int(self_time) * 1e-6,
+            cumulative_time=int(cum_time) * 1e-6,
+            depth=depth,
+        ))
+
+    return records
+
+
+def profile_imports(statement="import law", law_args=None, repeat=1, env=None):
+    """
+    Runs a python *statement* in a new interpreter with import time reporting enabled and returns a
+    2-tuple containing a list of :py:class:`ImportRecord` objects and the total wall time of the
+    process in seconds. When *law_args* is set, the *statement* is ignored and a law command line
+    invocation with these arguments is profiled instead. When *repeat* is larger than one, the
+    process is started multiple times and the minimum times per module are reported to suppress
+    fluctuations. *env* can be a dictionary of variables that update the process environment.
+    """
+    if sys.version_info[:2] < (3, 7):
+        raise Exception("import time profiling requires python 3.7 or newer")
+
+    if law_args is not None:
+        statement = "import sys; from law.cli import run; sys.exit(run({!r}))".format(
+            list(law_args))
+
+    _env = os.environ.copy()
+    if env:
+        _env.update(env)
+
+    cmd = [sys.executable, "-X", "importtime", "-c", statement]
+
+    records = OrderedDict()
+    wall_time = None
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        p = subprocess.Popen(cmd, env=_env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        _, err = p.communicate()
+        duration = time.perf_counter() - t0
+        err = err.decode("utf-8", "replace")
+        if p.returncode not in (0, None):
+            # only report the part of the output that is not related to import times
+            msg = "\n".join(line for line in err.splitlines() if not line.startswith("import time"))
+            raise Exception("profiled process failed with exit code {}:\n{}".format(
+                p.returncode, msg))
+
+        wall_time = duration if wall_time is None else min(wall_time, duration)
+        # packages can appear more than once when a submodule is imported after the package
+        # itself, so identify records by their module name and occurrence
+        occurrences = {}
+        for rec in parse_import_times(err):
+            key = (rec.module, occurrences.setdefault(rec.module, 0))
+            occurrences[rec.module] += 1
+            prev = records.get(key)
+            if prev is not None:
+                rec = rec._replace(
+                    self_time=min(prev.self_time, rec.self_time),
+                    cumulative_time=min(prev.cumulative_time, rec.cumulative_time),
+                )
+            records[key] = rec
+
+    return list(records.values()), wall_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m law.startup_profile",
+        description="reports the import time per module of a python statement or law command",
+    )
+    parser.add_argument("--statement", "-s", default="import law", help="the python statement to "
+        "profile; default: 'import law'")
+    parser.add_argument("--top", "-n", type=int, default=25, help="number of modules to show, 0 "
+        "means all; default: 25")
+    parser.add_argument("--sort", choices=["self", "cumulative"], default="self", help="the time "
+        "to sort modules by; default: self")
+    parser.add_argument("--filter", "-f", default=None, help="only show modules starting with this "
+        "prefix")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="number of repetitions, "
+        "reporting the minimum times; default: 3")
+    parser.add_argument("law_args", nargs=argparse.REMAINDER, help="when set, profile a law "
+        "command with these arguments instead of the statement, separated by '--'")
+    args = parser.parse_args(argv)
+
+    law_args = args.law_args
+    if law_args and law_args[0] == "--":
+        law_args = law_args[1:]
+
+    records, wall_time = profile_imports(statement=args.statement, law_args=law_args or None,
+        repeat=args.repeat)
+
+    # totals
+    total_time = sum(rec.cumulative_time for rec in records if rec.depth == 0)
+    law_time = sum(rec.self_time for rec in records if rec.module.split(".", 1)[0] == "law")
+
+    # select and sort
+    attr = "self_time" if args.sort == "self" else "cumulative_time"
+    if args.filter:
+        records = [rec for rec in records if rec.module.startswith(args.filter)]
+    records = sorted(records, key=lambda rec: -getattr(rec, attr))
+    if args.top > 0:
+        records = records[:args.top]
+
+    target = "law " + " ".join(law_args) if law_args else args.statement
+    print("profiled       : {}".format(target))
+    print("wall time      : {:.1f} ms".format(wall_time * 1e3))
+    print("import time    : {:.1f} ms".format(total_time * 1e3))
+    print("law self time  : {:.1f} ms".format(law_time * 1e3))
+    print("")
+    print("{:>10}  {:>10}  {}".format("self [ms]", "cum. [ms]", "module"))
+    for rec in records:
+        print("{:>10.2f}  {:>10.2f}  {}".format(rec.self_time * 1e3, rec.cumulative_time * 1e3,
+            rec.module))
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,14 @@
 # coding: utf-8
+
+
+# submodules that are imported on first attribute access (PEP 562), as they might not be imported
+# yet when the law namespace is resolved lazily
+_lazy_modules = ["file", "local", "collection", "mirrored"]
+
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        from importlib import import_module
+        return import_module(__name__ + "." + name)
+
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
@@ -407,6 +407,7 @@ class LocalTarget(FileSystemTarget, shims.LocalTarget):
 
     def load(self, *args, **kwargs):
         # remove kwargs that might be designated for remote files
+        from law.target.remote.base import RemoteFileSystem
         kwargs = RemoteFileSystem.split_remote_kwargs(kwargs)[1]
 
         # invoke formatter
@@ -415,6 +416,7 @@ class LocalTarget(FileSystemTarget, shims.LocalTarget):
 
     def dump(self, *args, **kwargs):
         # remove kwargs that might be designated for remote files
+        from law.target.remote.base import RemoteFileSystem
         kwargs = RemoteFileSystem.split_remote_kwargs(kwargs)[1]
 
         # also remove permission settings
@@ -569,7 +571,3 @@ class LocalDirectoryTarget(FileSystemDirectoryTarget, LocalTarget):
 
 LocalTarget.file_class = LocalFileTarget
 LocalTarget.directory_class = LocalDirectoryTarget
-
-
-# trailing imports
-from law.target.remote.base import RemoteFileSystem
@@ -19,6 +19,7 @@ import six
 from law.config import Config
 from law.target.file import remove_scheme
 from law.util import make_list, is_lazy_iterable, brace_expand, parse_duration
+from law.trace import span, count
 from law.logger import get_logger
 
 
@@ -117,9 +118,11 @@ class RemoteFileInterface(six.with_metaclass(abc.ABCMeta, object)):
                             skip_indices.append(idx)
 
                         try:
-                            return func(self, *args, **kwargs)
+                            with span(func_name, "remote", fs=self.__class__.__name__):
+                                return func(self, *args, **kwargs)
                         except RetryException as e:
                             attempt += 1
+                            count("remote.retries")
 
                             # raise to the outer try-except block when there are no attempts left
                             if attempt > retries:
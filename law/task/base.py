@@ -4,12 +4,14 @@
 Custom luigi base task definitions.
 """
 
-__all__ = ["Task", "WrapperTask", "ExternalTask"]
+__all__ = ["Task", "WrapperTask", "ExternalTask", "DependencyGraph"]
 
 
 import sys
 import logging
+import threading
 from collections import OrderedDict, deque
+from multiprocessing.pool import ThreadPool
 from contextlib import contextmanager
 from abc import ABCMeta, abstractmethod
 import inspect
@@ -22,6 +24,7 @@ from law.parameter import NO_STR, CSVParameter
 from law.target.file import localize_file_targets
 from law.parser import root_task, global_cmdline_values
 from law.logger import setup_logger
+from law.trace import span
 from law.util import (
     no_value, abort, law_run, common_task_params, colored, uncolored, make_list, multi_match,
     flatten, BaseStream, human_duration, patch_object, round_discrete, empty_context, perf_counter,
@@ -34,9 +37,15 @@ logger = get_logger(__name__)
 
 getfullargspec = inspect.getfullargspec if six.PY3 else inspect.getargspec
 
+# thread-local storage of prepared parameter values, see BaseTask._create_prepared
+_prepared = threading.local()
+
 
 class BaseRegister(luigi.task_register.Register):
 
+    # cache of parameters per task class, see BaseTask.get_params
+    _params_cache = {}
+
     def __new__(metacls, classname, bases, classdict):
         # default attributes, irrespective of inheritance
         classdict.setdefault("exclude_index", False)
@@ -77,6 +86,18 @@ class BaseRegister(luigi.task_register.Register):
 
         return cls
 
+    def __setattr__(cls, attr, value):
+        # parameters of this class and of its subclasses might change
+        if isinstance(value, luigi.Parameter) or \
+                isinstance(getattr(cls, attr, None), luigi.Parameter):
+            BaseRegister._params_cache.clear()
+        super(BaseRegister, cls).__setattr__(attr, value)
+
+    def __delattr__(cls, attr):
+        if isinstance(getattr(cls, attr, None), luigi.Parameter):
+            BaseRegister._params_cache.clear()
+        super(BaseRegister, cls).__delattr__(attr)
+
 
 class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
 
@@ -123,6 +144,18 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
 
         return success
 
+    @classmethod
+    def get_params(cls):
+        """
+        Returns all parameters of this class as a list of 2-tuples containing name and
+        :py:class:`luigi.Parameter` object, just as :py:meth:`luigi.Task.get_params`, but cached per
+        class as they are requested multiple times per task instantiation.
+        """
+        params = BaseRegister._params_cache.get(cls)
+        if params is None:
+            params = BaseRegister._params_cache[cls] = super(BaseTask, cls).get_params()
+        return list(params)
+
     @classmethod
     def modify_task_attributes(cls):
         """
@@ -147,6 +180,12 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
 
     @classmethod
     def get_param_values(cls, params, args, kwargs):
+        # use prepared values once when set for this class, see _create_prepared
+        prepared = getattr(_prepared, "values", None)
+        if prepared is not None and prepared[0] is cls and not args and not kwargs:
+            _prepared.values = None
+            return list(prepared[1])
+
         # call the hook optionally modifying the values before values are assigned
         params, args, kwargs = cls.modify_param_args(params, args, kwargs)
 
@@ -173,6 +212,39 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
 
         return values
 
+    @classmethod
+    def _create_prepared(cls, values, str_params):
+        """
+        Creates an instance of this class from already normalized parameter *values*, given as a
+        list of 2-tuples in the order of :py:meth:`get_params`, and the corresponding string
+        representations *str_params* of all significant, public parameters that define the task id.
+        Other than instantiating the class regularly, this skips the resolution, normalization and
+        serialization of parameters. Instances are looked up in and stored to the luigi instance
+        cache just like in :py:meth:`luigi.task_register.Register.__call__`.
+        """
+        cache = luigi.task_register.Register._Register__instance_cache
+        key = (cls, tuple(values))
+        try:
+            hash(key)
+        except TypeError:
+            cache = None
+        if cache is not None and key in cache:
+            return cache[key]
+
+        # bypass Register.__call__ and let the constructor use the prepared values
+        _prepared.values = (cls, values)
+        _prepared.str_params = (cls, str_params)
+        try:
+            inst = type.__call__(cls)
+        finally:
+            _prepared.values = None
+            _prepared.str_params = None
+
+        if cache is not None:
+            cache[key] = inst
+
+        return inst
+
     @classmethod
     def req(cls, inst, **kwargs):
         return cls(**cls.req_params(inst, **kwargs))
@@ -180,9 +252,6 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
     @classmethod
     def req_params(cls, inst, _exclude=None, _prefer_cli=None, _skip_task_excludes=False,
             _skip_task_excludes_get=None, _skip_task_excludes_set=None, **kwargs):
-        # common/intersection params
-        params = common_task_params(inst, cls)
-
         # determine parameters to exclude
         _exclude = set() if _exclude is None else set(make_list(_exclude))
 
@@ -199,10 +268,8 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
         if not _skip_task_excludes_set:
             _exclude.update(inst.exclude_params_req, inst.exclude_params_req_set)
 
-        # remove excluded parameters
-        for name in list(params.keys()):
-            if multi_match(name, _exclude, any):
-                del params[name]
+        # common/intersection params, minus excluded ones, projected through a cached plan
+        params = {name: getattr(inst, name) for name in cls._req_params_plan(inst, _exclude)}
 
         # add kwargs
         params.update(kwargs)
@@ -210,18 +277,57 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
         # remove params that are preferably set via cli class arguments
         prefer_cli = set(cls.prefer_params_cli or ()) if _prefer_cli is None else set(_prefer_cli)
         if prefer_cli:
-            cls_args = []
-            prefix = cls.get_task_family() + "_"
-            if luigi.cmdline_parser.CmdlineParser.get_instance():
-                for key in global_cmdline_values().keys():
-                    if key.startswith(prefix):
-                        cls_args.append(key[len(prefix):])
+            cls_args = cls._cli_param_names()
             for name in prefer_cli:
                 if name in params and name in cls_args:
                     del params[name]
 
         return params
 
+    @classmethod
+    def _req_params_plan(cls, inst, exclude):
+        """
+        Returns a tuple with names of parameters that are common between this class and the class
+        of a task *inst*, and that do not match any pattern in *exclude*. The result is cached on
+        this class per instance class and set of patterns, so that repeated calls to
+        :py:meth:`req_params` reduce to a projection of parameter values.
+        """
+        plans = cls.__dict__.get("_req_params_plans")
+        if plans is None:
+            plans = {}
+            cls._req_params_plans = plans
+
+        key = (inst.__class__, frozenset(exclude))
+        plan = plans.get(key)
+        if plan is None:
+            plan = tuple(
+                name for name in common_task_params(inst, cls, names_only=True)
+                if not multi_match(name, exclude, any)
+            )
+            plans[key] = plan
+
+        return plan
+
+    @classmethod
+    def _cli_param_names(cls):
+        """
+        Returns a set of names of parameters of this class that were set via class-specific command
+        line arguments. The set is cached on this class as long as the global command line values
+        do not change.
+        """
+        if not luigi.cmdline_parser.CmdlineParser.get_instance():
+            return set()
+
+        values = global_cmdline_values()
+        cached = cls.__dict__.get("_cached_cli_param_names")
+        if cached is None or cached[0] is not values:
+            prefix = cls.get_task_family() + "_"
+            names = {key[len(prefix):] for key in (values or ()) if key.startswith(prefix)}
+            cached = (values, names)
+            cls._cached_cli_param_names = cached
+
+        return cached[1]
+
     def __init__(self, *args, **kwargs):
         super(BaseTask, self).__init__(*args, **kwargs)
 
@@ -231,15 +337,28 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
         # attribute for cached requirements if enabled
         self._cached_requirements = no_value
 
+    def to_str_params(self, only_significant=False, only_public=False):
+        # use prepared string representations once when set for this class, see _create_prepared
+        prepared = getattr(_prepared, "str_params", None)
+        if prepared is not None and prepared[0] is self.__class__ and only_significant and \
+                only_public:
+            _prepared.str_params = None
+            return dict(prepared[1])
+
+        return super(BaseTask, self).to_str_params(only_significant=only_significant,
+            only_public=only_public)
+
     def complete(self):
-        # create a flat list of all outputs
-        outputs = flatten(self.output())
+        with span("complete", "task", task=self.task_family):
+            # create a flat list of all outputs
+            outputs = flatten(self.output())
 
-        if len(outputs) == 0:
-            logger.warning("task {!r} has no outputs or no custom complete() method".format(self))
-            return True
+            if len(outputs) == 0:
+                logger.warning("task {!r} has no outputs or no custom complete() method".format(
+                    self))
+                return True
 
-        return all(t.complete() for t in outputs)
+            return all(t.complete() for t in outputs)
 
     def input(self):
         # get potentially cached requirements
@@ -293,44 +412,14 @@ class BaseTask(six.with_metaclass(BaseRegister, luigi.Task)):
 
         return task_id
 
-    def walk_deps(self, max_depth=-1, order="level", yield_last_flag=False):
-        # see https://en.wikipedia.org/wiki/Tree_traversal
-        if order not in ("level", "pre"):
-            raise ValueError("unknown traversal order '{}', use 'level' or 'pre'".format(order))
-
-        # yielding the last flag as well is only available in 'pre' order
-        if order != "pre" and yield_last_flag:
-            raise ValueError("yield_last_flag can only be used in 'pre' order, but got '{}'".format(
-                order))
+    def walk_deps(self, max_depth=-1, order="level", yield_last_flag=False, unique=False,
+            graph=None):
+        # when no graph is given, create a new one that memoizes requirements during this walk
+        if graph is None:
+            graph = DependencyGraph(self)
 
-        tasks = deque([(self, 0)])
-        while len(tasks):
-            task, depth = tasks.popleft()
-            deps = flatten(task.requires())
-            next_depth = tasks[0][1] if tasks else None
-
-            # yield objects
-            if yield_last_flag:
-                # when an additional flag should be yielded that denotes whether the object
-                # is the last one in its depth, evaluate this decision here and then yield
-                # note: this assumes that the deps were not changed by the using context
-                is_last = next_depth is None or next_depth < depth
-                yield task, deps, depth, is_last
-            else:
-                yield task, deps, depth
-
-            # define the next deps, considering the maximum depth if set
-            deps = [
-                (d, depth + 1)
-                for d in deps
-                if max_depth < 0 or depth < max_depth
-            ]
-
-            # add to the tasks yet to process, depending on the traversal order
-            if order == "level":
-                tasks.extend(deps)
-            elif order == "pre":
-                tasks.extendleft(reversed(deps))
+        return graph.walk(self, max_depth=max_depth, order=order, yield_last_flag=yield_last_flag,
+            unique=unique)
 
     def cli_args(self, exclude=None, replace=None, skip_empty_bools=True):
         exclude = set() if exclude is None else set(make_list(exclude))
@@ -717,15 +806,16 @@ class WrapperTask(Task):
         return super(WrapperTask, self)._repr_flags() + ["wrapper"]
 
     def complete(self):
-        # get potentially cached requirements
-        if self.cache_requirements:
-            if self._cached_requirements is no_value:
-                self._cached_requirements = self.requires()
-            reqs = self._cached_requirements
-        else:
-            reqs = self.requires()
+        with span("complete", "task", task=self.task_family):
+            # get potentially cached requirements
+            if self.cache_requirements:
+                if self._cached_requirements is no_value:
+                    self._cached_requirements = self.requires()
+                reqs = self._cached_requirements
+            else:
+                reqs = self.requires()
 
-        return all(task.complete() for task in flatten(reqs))
+            return all(task.complete() for task in flatten(reqs))
 
     def output(self):
         inputs = self.input()
@@ -745,6 +835,158 @@ class ExternalTask(Task):
         return super(ExternalTask, self)._repr_flags() + ["external"]
 
 
+class DependencyGraph(object):
+    """
+    Graph of the dependencies of a *root* task whose nodes are identified by their task ids. The
+    flat requirements of each task are evaluated only once and then cached, so that shared
+    sub-graphs in diamond-shaped dependency structures are not expanded once per path. When
+    *threads* is larger than one, :py:meth:`build` evaluates the requirements of independent tasks
+    concurrently. This is only safe when all ``requires()`` methods involved are thread-safe, which
+    is not the case for the caches of branch maps and branch tasks of workflows, so *threads*
+    defaults to one.
+
+    .. code-block:: python
+
+        graph = DependencyGraph(task, threads=4).build(max_depth=3)
+        for dep, next_deps, depth in task.walk_deps(max_depth=3, graph=graph):
+            ...
+    """
+
+    def __init__(self, root, threads=1):
+        super(DependencyGraph, self).__init__()
+
+        self.root = root
+        self.threads = threads
+
+        # cached flat requirements per task id
+        self._deps = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._deps)
+
+    def __contains__(self, task):
+        return task.task_id in self._deps
+
+    def deps(self, task):
+        """
+        Returns the flat list of requirements of a *task*, which are evaluated only once.
+        """
+        deps = self._deps.get(task.task_id)
+        if deps is None:
+            deps = flatten(task.requires())
+            with self._lock:
+                deps = self._deps.setdefault(task.task_id, deps)
+        return deps
+
+    def build(self, max_depth=-1, stop_fn=None):
+        """
+        Eagerly evaluates the requirements of all tasks up to a depth of *max_depth* in a breadth
+        first manner, using parallel threads within each depth level. When *stop_fn* is callable,
+        it is invoked with each task and, when *True* is returned, requirements of that task are not
+        followed any further. The graph itself is returned.
+        """
+        pool = ThreadPool(self.threads) if self.threads > 1 else None
+
+        try:
+            seen = {self.root.task_id}
+            level = [self.root]
+            depth = 0
+            while level:
+                # evaluate requirements of all tasks in this level
+                todo = [task for task in level if task not in self]
+                if pool and len(todo) > 1:
+                    pool.map(self.deps, todo)
+                else:
+                    for task in todo:
+                        self.deps(task)
+
+                # stop when the maximum depth is reached
+                if 0 <= max_depth <= depth:
+                    break
+
+                # prepare the next level
+                next_level = []
+                for task in level:
+                    if callable(stop_fn) and stop_fn(task):
+                        continue
+                    for dep in self.deps(task):
+                        if dep.task_id not in seen:
+                            seen.add(dep.task_id)
+                            next_level.append(dep)
+                level = next_level
+                depth += 1
+
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        return self
+
+    def walk(self, task=None, max_depth=-1, order="level", yield_last_flag=False, unique=False):
+        """
+        Generator that traverses the dependencies of a *task*, defaulting to the :py:attr:`root`
+        task, and yields tuples ``(task, next_deps, depth)`` up to a depth of *max_depth*. *order*
+        can be either ``"level"`` or ``"pre"`` to choose between level-order and pre-order
+        traversal. In the latter case, *yield_last_flag* can be set to add a flag to the yielded
+        tuples that denotes whether the task is the last one in its depth.
+
+        *next_deps* is a list that can be altered by the iterating context to control further
+        traversal. When *unique* is *True*, tasks that were already reached at the same or a smaller
+        depth are not traversed again, even if they appear on multiple paths in the graph. A task
+        that is first reached on a long path is still traversed again when it is reached on a
+        shorter one, so that the result of a depth limited traversal does not change.
+        """
+        # see https://en.wikipedia.org/wiki/Tree_traversal
+        if order not in ("level", "pre"):
+            raise ValueError("unknown traversal order '{}', use 'level' or 'pre'".format(order))
+
+        # yielding the last flag as well is only available in 'pre' order
+        if order != "pre" and yield_last_flag:
+            raise ValueError("yield_last_flag can only be used in 'pre' order, but got '{}'".format(
+                order))
+
+        if task is None:
+            task = self.root
+
+        # smallest depths at which tasks were reached
+        depths = {task.task_id: 0}
+        tasks = deque([(task, 0)])
+        while len(tasks):
+            task, depth = tasks.popleft()
+            # copy the cached deps since they can be altered by the iterating context
+            deps = list(self.deps(task))
+            next_depth = tasks[0][1] if tasks else None
+
+            # yield objects
+            if yield_last_flag:
+                # when an additional flag should be yielded that denotes whether the object
+                # is the last one in its depth, evaluate this decision here and then yield
+                # note: this assumes that the deps were not changed by the using context
+                is_last = next_depth is None or next_depth < depth
+                yield task, deps, depth, is_last
+            else:
+                yield task, deps, depth
+
+            # define the next deps, considering the maximum depth if set
+            if max_depth >= 0 and depth >= max_depth:
+                continue
+            next_deps = []
+            for dep in deps:
+                if unique:
+                    if depths.get(dep.task_id, depth + 2) <= depth + 1:
+                        continue
+                    depths[dep.task_id] = depth + 1
+                next_deps.append((dep, depth + 1))
+
+            # add to the tasks yet to process, depending on the traversal order
+            if order == "level":
+                tasks.extend(next_deps)
+            elif order == "pre":
+                tasks.extendleft(reversed(next_deps))
+
+
 class TaskMessageStream(BaseStream):
 
     def __init__(self, task, stdout=sys.stdout, scheduler=True, flush_cache=False, **kwargs):
@@ -11,17 +11,21 @@ __all__ = [
 
 
 import os
+import sys
 import re
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
 
 import six
 
 from law.config import Config
 from law.target.base import Target
-from law.target.file import FileSystemTarget
+from law.target.file import FileSystemTarget, FileSystemFileTarget
 from law.target.collection import TargetCollection, FileCollection
 from law.util import (
     colored, uncolored, uncolor_cre, flatten, flag_to_bool, query_choice, human_bytes,
-    is_lazy_iterable, make_list, merge_dicts, makedirs, get_terminal_width, multi_match,
+    human_duration, is_lazy_iterable, make_list, merge_dicts, makedirs, get_terminal_width,
+    multi_match, perf_counter,
 )
 from law.logger import get_logger
 
@@ -63,7 +67,11 @@ def _flatten_output(output, depth):
     return [(outp, depth, "") for outp in flatten(output)]
 
 
-def _iter_output(output, offset, ind="  "):
+def _iter_output(output, offset, ind="  ", print_fn=None):
+    if print_fn is None:
+        def print_fn(line):
+            print(line)
+
     lookup = _flatten_output(output, 0)
     while lookup:
         output, odepth, oprefix = lookup.pop(0)
@@ -76,10 +84,10 @@ def _iter_output(output, offset, ind="  "):
             # before updating the lookup list, but check if the output changes by this
             _lookup = _flatten_output(output, odepth + 1)
             if len(_lookup) > 0 and _lookup[0][0] == output:
-                print(ooffset + oprefix + colored("not a target", color="red"))
+                print_fn(ooffset + oprefix + colored("not a target", color="red"))
             else:
                 # print the key of the current structure
-                print(ooffset + oprefix)
+                print_fn(ooffset + oprefix)
 
                 # update the lookup list
                 lookup[:0] = _lookup
@@ -209,7 +217,77 @@ def print_task_deps(task, stopping_condition=1):
         _print(task_offset + task_prefix + dep.repr(color=True), text_offset)
 
 
+def _bulk_exists(targets):
+    # determine the existence of plain file targets that share the same directory with a single
+    # listing per directory, returns a dict mapping target ids to existence flags
+    groups = defaultdict(list)
+    for t in targets:
+        if isinstance(t, FileSystemFileTarget) and not isinstance(t, TargetCollection):
+            groups[(id(t.fs), t.dirname)].append(t)
+
+    exists = {}
+    for (_, dirname), _targets in six.iteritems(groups):
+        # listings only pay off for more than one target per directory
+        if len(_targets) < 2:
+            continue
+        fs = _targets[0].fs
+        try:
+            basenames = set(fs.listdir(dirname)) if fs.exists(dirname) else set()
+        except Exception as e:
+            logger.debug("bulk existence check in {} failed: {}".format(dirname, e))
+            continue
+        for t in _targets:
+            exists[id(t)] = t.basename in basenames
+
+    return exists
+
+
+def _evaluate_status_texts(targets, target_depth=0, flags=None, threads=1, progress=False):
+    # evaluates the status texts of all targets, potentially in parallel threads and in the same
+    # order as the passed targets
+    n = len(targets)
+    if not n:
+        return []
+
+    def status_text(i):
+        t, exists = targets[i], bulk_exists.get(id(targets[i]))
+        if exists is not None:
+            return t.status_text(max_depth=target_depth, flags=flags, color=True, exists=exists)
+        return t.status_text(max_depth=target_depth, flags=flags, color=True)
+
+    def print_progress(i):
+        if progress:
+            sys.stdout.write("\rchecking target status {} / {}".format(i, n))
+            sys.stdout.flush()
+
+    print_progress(0)
+    bulk_exists = _bulk_exists(targets)
+
+    results = []
+    if threads > 1 and n > 1:
+        pool = ThreadPool(min(threads, n))
+        try:
+            for i, text in enumerate(pool.imap(status_text, range(n)), 1):
+                results.append(text)
+                print_progress(i)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for i in range(n):
+            results.append(status_text(i))
+            print_progress(i + 1)
+
+    # clear the progress line
+    if progress:
+        sys.stdout.write("\r\033[K")
+        sys.stdout.flush()
+
+    return results
+
+
 def print_task_status(task, stopping_condition=0, target_depth=0, flags=None):
+    from law.task.base import DependencyGraph
     from law.workflow.base import BaseWorkflow
 
     # parse the stopping condition
@@ -240,15 +318,33 @@ def print_task_status(task, stopping_condition=0, target_depth=0, flags=None):
 
     # get other settings
     skip_seen = cfg.get_expanded_bool("task", "interactive_status_skip_seen")
+    threads = cfg.get_expanded_int("task", "interactive_status_threads")
+
+    # the status is evaluated in two phases: first, the dependency tree is traversed and all lines
+    # to print are collected, with targets whose status is to be checked being placeholders, and
+    # second, all targets are checked at once before everything is printed
+    # (lines are stored as 3-tuples (target, line, offset) with target being None for plain lines)
+    lines = []
+    add_line = lambda line, offset=None: lines.append((None, line, offset))
+
+    # evaluate requirements of all tasks to traverse, in a single thread since requires() methods
+    # and the caches they rely on (e.g. branch maps of workflows) are not guaranteed to be
+    # thread-safe
+    t0 = perf_counter()
+    stop_fn = lambda dep: family_patterns and multi_match(dep.task_family, family_patterns, any)
+    graph = DependencyGraph(task).build(max_depth=max_depth, stop_fn=stop_fn)
 
     # walk through deps
+    n_tasks = 0
     done = set()
     parents_last_flags = []
     for dep, next_deps, depth, is_last in task.walk_deps(
         max_depth=max_depth,
         order="pre",
         yield_last_flag=True,
+        graph=graph,
     ):
+        n_tasks += 1
         if family_patterns and multi_match(dep.task_family, family_patterns, mode=any):
             next_deps.clear()
 
@@ -264,7 +360,7 @@ def print_task_status(task, stopping_condition=0, target_depth=0, flags=None):
         free_offset = offset + fmt["|"]
         free_lines = "\n".join(fmt["free"] * [free_offset])
         if depth > 0 and free_lines:
-            print(free_lines)
+            add_line(free_lines)
 
         # when the dep is a workflow, independent of its create_branch_map_before_repr setting,
         # preload its branch map which updates branch parameters
@@ -286,31 +382,61 @@ def print_task_status(task, stopping_condition=0, target_depth=0, flags=None):
         text_offset_ind = text_offset + fmt["ind"] * " "
 
         # print the task line
-        _print(task_offset + task_prefix + dep.repr(color=True), text_offset)
+        add_line(task_offset + task_prefix + dep.repr(color=True), text_offset)
 
         # skip if already seen
         if skip_seen and dep in done:
-            _print(text_offset_ind + colored("outputs already checked", "yellow"), text_offset_ind)
+            add_line(text_offset_ind + colored("outputs already checked", "yellow"),
+                text_offset_ind)
             continue
 
         done.add(dep)
 
-        # compiled regex for splitting leading whitespace
-        ws_cre = re.compile(r"^(\s*)(.*)$")
-
         # start the traversing
         for output, _, oprefix, ooffset, _ in _iter_output(
             dep.output(),
             text_offset_ind,
             fmt["ind"] * " ",
+            print_fn=add_line,
         ):
-            _print(ooffset + oprefix + output.repr(color=True), ooffset + len(oprefix) * " ")
-            ooffset += fmt["ind"] * " "
-            status_text = output.status_text(max_depth=target_depth, flags=flags, color=True)
-            status_lines = status_text.split("\n")
-            _print(ooffset + status_lines[0], ooffset)
-            for line in status_lines[1:]:
-                _print(ooffset + line, ooffset + ws_cre.match(line).group(1) + fmt["ind"] * " ")
+            add_line(ooffset + oprefix + output.repr(color=True), ooffset + len(oprefix) * " ")
+            lines.append((output, None, ooffset + fmt["ind"] * " "))
+    walk_duration = perf_counter() - t0
+
+    # check the status of all targets
+    t0 = perf_counter()
+    targets = [target for target, _, _ in lines if target is not None]
+    status_texts = iter(_evaluate_status_texts(
+        targets,
+        target_depth=target_depth,
+        flags=flags,
+        threads=threads,
+        progress=sys.stdout.isatty(),
+    ))
+    check_duration = perf_counter() - t0
+
+    # compiled regex for splitting leading whitespace
+    ws_cre = re.compile(r"^(\s*)(.*)$")
+
+    # print all lines
+    for target, line, offset in lines:
+        if target is None:
+            if offset is None:
+                print(line)
+            else:
+                _print(line, offset)
+            continue
+
+        status_lines = six.next(status_texts).split("\n")
+        _print(offset + status_lines[0], offset)
+        for line in status_lines[1:]:
+            _print(offset + line, offset + ws_cre.match(line).group(1) + fmt["ind"] * " ")
+
+    # print a timing summary
+    print("")
+    print("traversed {} tasks in {}, checked {} targets in {} ({} thread{})".format(
+        n_tasks, human_duration(seconds=walk_duration), len(targets),
+        human_duration(seconds=check_duration), threads, "" if threads == 1 else "s"))
 
 
 def print_task_output(task, stopping_condition=0, scheme=True):
@@ -327,13 +453,8 @@ def print_task_output(task, stopping_condition=0, scheme=True):
     print("print task output {}, {} schemes\n".format(
         " and ".join(msg), "showing" if scheme else "hiding"))
 
-    done_deps = set()
     done_uris = set()
-    for dep, next_deps, depth in task.walk_deps(max_depth=max_depth, order="pre"):
-        if dep in done_deps:
-            continue
-        done_deps.add(dep)
-
+    for dep, next_deps, depth in task.walk_deps(max_depth=max_depth, order="pre", unique=True):
         if family_patterns and multi_match(dep.task_family, family_patterns, mode=any):
             next_deps.clear()
 
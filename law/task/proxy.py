@@ -7,6 +7,7 @@ Proxy task definition and helpers.
 __all__ = ["ProxyTask", "ProxyCommand", "get_proxy_attribute"]
 
 
+import sys
 import shlex
 
 import six
@@ -21,6 +22,19 @@ _forward_workflow_attributes = {"requires", "output", "complete", "run"}
 
 _forward_sandbox_attributes = {"input", "output", "run"}
 
+_proxied_classes = {}
+
+
+def _get_proxied_class(module_name, cls_name):
+    # returns a class that supports attribute forwarding without importing its module, since a
+    # task cannot be an instance of it when the module was not imported yet
+    cls = _proxied_classes.get(cls_name)
+    if cls is None:
+        cls = getattr(sys.modules.get(module_name), cls_name, None)
+        if cls is not None:
+            _proxied_classes[cls_name] = cls
+    return cls
+
 
 class ProxyRegister(BaseRegister):
     """
@@ -147,12 +161,15 @@ def get_proxy_attribute(cls, task, attr, proxy=True):
         # priority to workflow proxy forwarding, fallback to sandbox proxy or super class
         if (
             attr in _forward_workflow_attributes and
-            isinstance(task, BaseWorkflow) and
+            isinstance(task, _get_proxied_class("law.workflow.base", "BaseWorkflow") or ()) and
             task.is_workflow()
         ):
             return getattr(task.workflow_proxy, attr)
 
-        if attr in _forward_sandbox_attributes and isinstance(task, SandboxTask):
+        if (
+            attr in _forward_sandbox_attributes and
+            isinstance(task, _get_proxied_class("law.sandbox.base", "SandboxTask") or ())
+        ):
             # forward run method if not sandboxed
             if attr == "run" and not task.is_sandboxed():
                 return task.sandbox_proxy.run
@@ -163,8 +180,3 @@ def get_proxy_attribute(cls, task, attr, proxy=True):
                 return task._staged_output
 
     return super(cls, task).__getattribute__(attr)
-
-
-# trailing imports
-from law.workflow.base import BaseWorkflow
-from law.sandbox.base import SandboxTask
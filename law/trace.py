@@ -0,0 +1,359 @@
+# coding: utf-8
+
+"""
+Lightweight tracing of internal hot paths via spans and counters. Tracing is disabled by default
+and all instrumentation points reduce to a single global lookup in that case. When enabled, either
+through :py:func:`enable`, the ``--law-trace`` flag of ``law run`` or the ``trace.enabled`` config
+option, spans and counters are recorded in the current process and can be written as a Chrome trace
+(JSON, see https://ui.perfetto.dev or chrome://tracing) or as a text summary. Example:
+
+.. code-block:: python
+
+    import law.trace
+
+    law.trace.enable()
+
+    with law.trace.span("my_step", "user", n=10):
+        ...
+
+    law.trace.count("my_counter")
+
+    print(law.trace.get_tracer().summary())
+"""
+
+__all__ = [
+    "Tracer", "get_tracer", "is_enabled", "enable", "disable", "setup", "span", "traced", "count",
+]
+
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+from collections import OrderedDict
+
+import six
+
+from law.util import perf_counter, human_duration
+
+
+# the active tracer, None when tracing is disabled
+_tracer = None
+
+
+class Tracer(object):
+    """
+    Recorder of spans and counters of a single process. Spans are stored as tuples of name,
+    category, start time and duration (both in seconds relative to the creation of the tracer),
+    thread id and an optional dictionary of arguments. Counters are accumulated per name, while each
+    update is kept as an event as well to visualize their evolution.
+
+    .. py:attribute:: spans
+
+        type: list
+
+        Recorded spans.
+
+    .. py:attribute:: counters
+
+        type: collections.OrderedDict
+
+        Current values of counters, mapped to their names.
+    """
+
+    def __init__(self):
+        super(Tracer, self).__init__()
+
+        self.pid = os.getpid()
+        self.start_time = time.time()
+        self._t0 = perf_counter()
+
+        self.spans = []
+        self.counters = OrderedDict()
+        self._counter_events = []
+        self._lock = threading.Lock()
+
+    def now(self):
+        """
+        Returns the number of seconds since the creation of the tracer.
+        """
+        return perf_counter() - self._t0
+
+    def add_span(self, name, category, start, duration, args=None):
+        """
+        Records a span given its *name*, *category*, *start* time and *duration*, both in seconds
+        relative to the creation of the tracer, and optional *args*.
+        """
+        tid = threading.current_thread().ident
+        with self._lock:
+            self.spans.append((name, category, start, duration, tid, args))
+
+    def count(self, name, value=1):
+        """
+        Increments the counter *name* by *value*.
+        """
+        t = self.now()
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self._counter_events.append((name, t, self.counters[name]))
+
+    def chrome_trace(self):
+        """
+        Returns a dictionary in the Chrome trace event format containing all spans as complete
+        events and all counter updates as counter events.
+        """
+        to_us = lambda t: round(t * 1e6, 3)
+
+        events = [{
+            "name": "process_name",
+            "ph": "M",
+            "pid": self.pid,
+            "args": {"name": " ".join(sys.argv) or "python"},
+        }]
+
+        with self._lock:
+            for name, category, start, duration, tid, args in self.spans:
+                event = {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": to_us(start),
+                    "dur": to_us(duration),
+                    "pid": self.pid,
+                    "tid": tid,
+                }
+                if args:
+                    event["args"] = {k: v if isinstance(v, (six.string_types, int, float, bool))
+                        else str(v) for k, v in six.iteritems(args)}
+                events.append(event)
+
+            for name, t, value in self._counter_events:
+                events.append({
+                    "name": name,
+                    "ph": "C",
+                    "ts": to_us(t),
+                    "pid": self.pid,
+                    "args": {"value": value},
+                })
+
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"start_time": self.start_time},
+        }
+
+    def summary(self):
+        """
+        Returns a text summary with the number of calls as well as the total, mean and maximum
+        duration per span name, sorted by total duration, followed by the values of all counters.
+        """
+        stats = OrderedDict()
+        with self._lock:
+            for name, category, _, duration, _, _ in self.spans:
+                key = (category, name)
+                if key not in stats:
+                    stats[key] = [0, 0.0, 0.0]
+                s = stats[key]
+                s[0] += 1
+                s[1] += duration
+                s[2] = max(s[2], duration)
+            counters = list(self.counters.items())
+
+        lines = ["law trace summary (pid {}, {})".format(self.pid,
+            human_duration(seconds=round(self.now(), 1)))]
+
+        if stats:
+            lines.append("")
+            lines.append("{:>8}  {:>12}  {:>12}  {:>12}  {}".format(
+                "calls", "total [ms]", "mean [ms]", "max [ms]", "span"))
+            for (category, name), (n, total, max_) in sorted(stats.items(),
+                    key=lambda tpl: -tpl[1][1]):
+                lines.append("{:>8}  {:>12.2f}  {:>12.2f}  {:>12.2f}  {}.{}".format(
+                    n, total * 1e3, total * 1e3 / n, max_ * 1e3, category, name))
+
+        if counters:
+            lines.append("")
+            lines.append("{:>12}  {}".format("value", "counter"))
+            for name, value in counters:
+                lines.append("{:>12}  {}".format(value, name))
+
+        return "\n".join(lines)
+
+    def dump(self, path, fmt=None):
+        """
+        Writes the trace to a file at *path*. *fmt* can be ``"chrome"`` or ``"text"`` and defaults
+        to ``"chrome"`` for files ending with ``".json"`` and to ``"text"`` otherwise. The
+        placeholder ``"{pid}"`` in *path* is replaced by the process id. Returns the path.
+        """
+        path = os.path.expandvars(os.path.expanduser(path)).replace("{pid}", str(self.pid))
+        if fmt is None:
+            fmt = "chrome" if path.endswith(".json") else "text"
+        if fmt not in ("chrome", "text"):
+            raise ValueError("unknown trace format '{}', must be 'chrome' or 'text'".format(fmt))
+
+        dirname = os.path.dirname(path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+
+        with open(path, "w") as f:
+            if fmt == "chrome":
+                json.dump(self.chrome_trace(), f)
+            else:
+                f.write(self.summary() + "\n")
+
+        return path
+
+
+class _Span(object):
+
+    __slots__ = ["tracer", "name", "category", "args", "start"]
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = self.tracer.now() - self.start
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        self.tracer.add_span(self.name, self.category, self.start, duration, self.args)
+
+
+class _NullSpan(object):
+
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return
+
+
+_null_span = _NullSpan()
+
+
+def get_tracer():
+    """
+    Returns the active :py:class:`Tracer`, or *None* when tracing is disabled.
+    """
+    return _tracer
+
+
+def is_enabled():
+    """
+    Returns *True* when tracing is enabled, and *False* otherwise.
+    """
+    return _tracer is not None
+
+
+def enable(output=None, fmt=None):
+    """
+    Enables tracing and returns the active :py:class:`Tracer`. When tracing is already enabled, the
+    existing tracer is kept. When *output* is set, the trace is written to this path in the format
+    *fmt* at interpreter exit (see :py:meth:`Tracer.dump`). When *output* is ``"-"``, a text summary
+    is printed to stderr instead.
+    """
+    global _tracer
+
+    if _tracer is None:
+        _tracer = Tracer()
+
+    if output:
+        atexit.register(_write, _tracer, output, fmt)
+
+    return _tracer
+
+
+def disable():
+    """
+    Disables tracing and returns the previously active :py:class:`Tracer` or *None*.
+    """
+    global _tracer
+
+    tracer = _tracer
+    _tracer = None
+
+    return tracer
+
+
+def setup():
+    """
+    Enables tracing when the ``trace.enabled`` config option is *True*, writing the trace to the
+    location defined by ``trace.output``.
+    """
+    from law.config import Config
+
+    cfg = Config.instance()
+    if cfg.get_expanded_bool("trace", "enabled", False):
+        enable(output=cfg.get_expanded("trace", "output", None) or "-",
+            fmt=cfg.get_expanded("trace", "format", None))
+
+
+def _write(tracer, output, fmt=None):
+    # only write in the process that created the tracer, e.g. not in forked workers
+    if tracer.pid != os.getpid():
+        return
+
+    if output == "-":
+        sys.stderr.write(tracer.summary() + "\n")
+    else:
+        path = tracer.dump(output, fmt=fmt)
+        sys.stderr.write("law trace written to {}\n".format(path))
+
+
+def span(name, category="law", **kwargs):
+    """
+    Returns a context manager that records a span with *name* and *category* and all *kwargs* as
+    arguments. When tracing is disabled, a shared no-op context manager is returned.
+
+    .. code-block:: python
+
+        with span("branch_map", "workflow", task=task.task_family):
+            ...
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _null_span
+    return _Span(tracer, name, category, kwargs or None)
+
+
+def traced(name=None, category="law"):
+    """
+    Decorator that records a span for each call of the decorated function, using *name* (defaulting
+    to the name of the function) and *category*. When tracing is disabled, the function is called
+    directly.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with _Span(tracer, span_name, category, None):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, value=1):
+    """
+    Increments the counter *name* by *value* when tracing is enabled.
+    """
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, value=value)
@@ -9,11 +9,15 @@ __all__ = [
     "law_home_path", "law_run", "print_err", "abort", "import_file", "get_terminal_width",
     "is_classmethod", "is_number", "is_float", "try_int", "round_discrete", "str_to_int",
     "flag_to_bool", "empty_context", "common_task_params", "colored", "uncolored", "query_choice",
-    "is_pattern", "brace_expand", "range_expand", "range_join", "multi_match", "is_iterable",
+    "is_pattern", "brace_expand", "range_expand", "range_join", "BranchRangeSet", "multi_match",
+    "is_iterable",
     "is_lazy_iterable", "make_list", "make_tuple", "make_set", "make_unique", "is_nested",
-    "flatten", "merge_dicts", "unzip", "which", "map_verbose", "map_struct", "mask_struct",
-    "tmp_file", "perf_counter", "interruptable_popen", "kill_process", "readable_popen",
-    "create_hash", "create_random_string", "copy_no_perm", "makedirs", "user_owns_file",
+    "flatten", "merge_dicts", "unzip", "which", "map_verbose", "prefetch_map", "map_struct",
+    "mask_struct",
+    "tmp_file", "perf_counter", "interruptable_popen", "kill_process", "process_tree_usage",
+    "ResourceMonitor", "aggregate_resources", "ResourceTotals", "readable_popen",
+    "create_hash", "create_random_string", "copy_no_perm", "makedirs", "SharedState",
+    "process_alive", "user_owns_file",
     "increment_path", "iter_chunks", "human_bytes", "parse_bytes", "human_duration",
     "parse_duration", "is_file_exists_error", "send_mail", "DotDict", "ShorthandDict",
     "open_compat", "patch_object", "join_generators", "quote_cmd", "escape_markdown",
@@ -26,12 +30,14 @@ import sys
 import types
 import re
 import math
+import bisect
 import fnmatch
 import itertools
 import functools
 import tempfile
 import subprocess
 import signal
+import errno
 import hashlib
 import uuid
 import shutil
@@ -52,6 +58,11 @@ import logging
 
 import six
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 try:
     import ipykernel
     import ipykernel.iostream
@@ -430,18 +441,21 @@ def empty_context(obj=None):
     yield obj
 
 
-def common_task_params(task_instance, task_cls):
+def common_task_params(task_instance, task_cls, names_only=False):
     """
     Returns the parameters that are common between a *task_instance* and a *task_cls* in a
     dictionary with values taken directly from the task instance. The difference with respect to
     ``luigi.util.common_params`` is that the values are not parsed using the parameter objects of
-    the task class, which might be faster for some purposes.
+    the task class, which might be faster for some purposes. When *names_only* is *True*, only a
+    list of names of common parameters is returned in the order of the instance's parameters.
     """
-    task_cls_param_names = [name for name, _ in task_cls.get_params()]
+    task_cls_param_names = {name for name, _ in task_cls.get_params()}
     common_param_names = [
         name for name, _ in task_instance.get_params()
         if name in task_cls_param_names
     ]
+    if names_only:
+        return common_param_names
     return {name: getattr(task_instance, name) for name in common_param_names}
 
 
@@ -711,6 +725,21 @@ def range_expand(s, include_end=False, min_value=None, max_value=None, sep=":"):
         range_expand(["5-8", "10-"], max_value=12, include_end=True)
         # -> [5, 6, 7, 8, 10, 11, 12]
     """
+    # collect half-open intervals, then materialize only numbers not covered by previous ones
+    numbers = []
+    covered = []
+    for start, stop in _range_intervals(s, include_end=include_end, min_value=min_value,
+            max_value=max_value, sep=sep):
+        for _start, _stop in _interval_subtract(covered, start, stop):
+            numbers.extend(six.moves.range(_start, _stop))
+        _interval_insert(covered, start, stop)
+
+    return numbers
+
+
+def _range_intervals(s, include_end=False, min_value=None, max_value=None, sep=":"):
+    # parses ranges and single values as accepted by range_expand into a list of half-open interval
+    # tuples in the order of appearance, clipped to min_value and max_value, skipping empty ones
     def to_int(v, s=None):
         try:
             return int(v)
@@ -721,7 +750,12 @@ def range_expand(s, include_end=False, min_value=None, max_value=None, sep=":"):
     if isinstance(s, tuple):
         s = [s]
 
-    numbers = []
+    # upper limit in python semantics
+    py_max_value = None
+    if max_value is not None:
+        py_max_value = (max_value + 1) if include_end else max_value
+
+    intervals = []
     for s in make_list(s):
         start, stop, value = None, None, None
         single_value = False
@@ -748,8 +782,9 @@ def range_expand(s, include_end=False, min_value=None, max_value=None, sep=":"):
                 single_value = True
 
         if single_value:
-            # add a single value
-            numbers.append(to_int(value))
+            # single values are intervals of length one
+            start = to_int(value)
+            stop = start + 1
 
         else:
             # build the range
@@ -769,30 +804,60 @@ def range_expand(s, include_end=False, min_value=None, max_value=None, sep=":"):
             stop = to_int(stop)
             if start > stop:
                 start, stop = stop, start
+            stop += int(bool(include_end))
+
+        # apply limits
+        if min_value is not None:
+            start = max(start, min_value)
+        if py_max_value is not None:
+            stop = min(stop, py_max_value)
+
+        if start < stop:
+            intervals.append((start, stop))
+
+    return intervals
+
+
+def _interval_subtract(covered, start, stop):
+    # returns the parts of the half-open interval [start, stop) that are not contained in covered,
+    # a sorted list of disjoint [start, stop] pairs
+    parts = []
+    i = max(bisect.bisect_right(covered, [start]) - 1, 0)
+    while start < stop and i < len(covered):
+        c_start, c_stop = covered[i]
+        if c_start >= stop:
+            break
+        if c_stop > start:
+            if c_start > start:
+                parts.append((start, c_start))
+            start = max(start, c_stop)
+        i += 1
+    if start < stop:
+        parts.append((start, stop))
+    return parts
 
-            # add numbers
-            numbers.extend(range(start, stop + int(bool(include_end))))
-
-    # remove duplicates preserving the order
-    numbers = make_unique(numbers)
-
-    # apply limits
-    if min_value is not None:
-        numbers = [num for num in numbers if num >= min_value]
-    if max_value is not None:
-        py_max_value = (max_value + 1) if include_end else max_value
-        numbers = [num for num in numbers if num < py_max_value]
 
-    return numbers
+def _interval_insert(covered, start, stop):
+    # inserts the half-open interval [start, stop) into covered, a sorted list of disjoint
+    # [start, stop] pairs, merging overlapping and adjacent intervals in-place
+    i = bisect.bisect_left(covered, [start])
+    if i > 0 and covered[i - 1][1] >= start:
+        i -= 1
+    j = i
+    while j < len(covered) and covered[j][0] <= stop:
+        start = min(start, covered[j][0])
+        stop = max(stop, covered[j][1])
+        j += 1
+    covered[i:j] = [[start, stop]]
 
 
 def range_join(numbers, to_str=False, include_end=False, sep=",", range_sep=":"):
     """
-    Takes a sequence of positive integer numbers given either as integer or string types, and
-    returns a sequence 1- and 2-tuples, denoting either single numbers or start and end values of
-    possible ranges. Unless *include_end* is *True*, end values are not included. When *to_str* is
-    *True*, a string is returned in a format consistent to :py:func:`range_expand` with ranges
-    constructed by *range_sep* and merged with *sep*. Example:
+    Takes a sequence of positive integer numbers given either as integer or string types, or a
+    :py:class:`BranchRangeSet`, and returns a sequence 1- and 2-tuples, denoting either single
+    numbers or start and end values of possible ranges. Unless *include_end* is *True*, end values
+    are not included. When *to_str* is *True*, a string is returned in a format consistent to
+    :py:func:`range_expand` with ranges constructed by *range_sep* and merged with *sep*. Example:
 
     .. code-block:: python
 
@@ -811,31 +876,8 @@ def range_join(numbers, to_str=False, include_end=False, sep=",", range_sep=":")
     if not numbers:
         return "" if to_str else []
 
-    # check type, convert, make unique and sort
-    _numbers = []
-    for n in numbers:
-        if isinstance(n, six.string_types):
-            try:
-                n = int(n)
-            except ValueError:
-                raise ValueError("invalid number format '{}'".format(n))
-        if isinstance(n, six.integer_types):
-            _numbers.append(n)
-        else:
-            raise TypeError("cannot handle non-integer value '{}' in numbers to join".format(n))
-    numbers = sorted(set(_numbers))
-
-    # iterate through numbers, keep track of last starts and stops and fill a list of range tuples
-    ranges = []
-    start = stop = numbers[0]
-    for n in numbers[1:]:
-        if n == stop + 1:
-            stop += 1
-        else:
-            ranges.append((start,) if start == stop else (start, stop + int(bool(not include_end))))
-            start = stop = n
-    # add the last one
-    ranges.append((start,) if start == stop else (start, stop + int(bool(not include_end))))
+    # build ranges from contiguous intervals
+    ranges = BranchRangeSet.from_numbers(numbers).to_ranges(include_end=include_end)
 
     # convert to string representation
     if to_str:
@@ -847,6 +889,214 @@ def range_join(numbers, to_str=False, include_end=False, sep=",", range_sep=":")
     return ranges
 
 
+def _merge_intervals(intervals):
+    # sorts and merges overlapping and adjacent half-open intervals, skipping empty ones
+    merged = []
+    for start, stop in sorted(intervals):
+        if start >= stop:
+            continue
+        if merged and start <= merged[-1][1]:
+            if stop > merged[-1][1]:
+                merged[-1] = (merged[-1][0], stop)
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+class BranchRangeSet(object):
+    """
+    Compact, immutable set of integers such as branch numbers, stored as a sorted tuple of disjoint,
+    half-open *intervals* (*start*, *stop*) which are merged when overlapping or adjacent. It
+    supports union (``|``), intersection (``&``), difference (``-``), containment checks, iteration
+    in ascending order and its length without materializing all contained numbers. Example:
+
+    .. code-block:: python
+
+        s = BranchRangeSet.from_ranges([(0, 5), (7,), (4, 6)])
+        # -> BranchRangeSet([(0, 6), (7, 8)])
+
+        len(s)
+        # -> 7
+
+        s - BranchRangeSet([(2, 4)])
+        # -> BranchRangeSet([(0, 2), (4, 6), (7, 8)])
+
+        s.to_ranges()
+        # -> [(0, 6), (7,)]
+    """
+
+    @classmethod
+    def from_numbers(cls, numbers):
+        """
+        Creates a new instance from a sequence of integer *numbers*, given either as integer or
+        string types.
+        """
+        if isinstance(numbers, cls):
+            return numbers
+        if six.PY3 and isinstance(numbers, range) and numbers.step == 1:
+            return cls([(numbers.start, numbers.stop)])
+
+        # check type, convert, make unique and sort
+        _numbers = []
+        for n in numbers:
+            if isinstance(n, six.string_types):
+                try:
+                    n = int(n)
+                except ValueError:
+                    raise ValueError("invalid number format '{}'".format(n))
+            if isinstance(n, six.integer_types):
+                _numbers.append(n)
+            else:
+                raise TypeError("cannot handle non-integer value '{}' in numbers".format(n))
+        numbers = sorted(set(_numbers))
+
+        # iterate through numbers, keep track of starts and stops of contiguous intervals
+        inst = cls()
+        if numbers:
+            intervals = []
+            start = stop = numbers[0]
+            for n in numbers[1:]:
+                if n != stop + 1:
+                    intervals.append((start, stop + 1))
+                    start = n
+                stop = n
+            intervals.append((start, stop + 1))
+            inst._intervals = tuple(intervals)
+
+        return inst
+
+    @classmethod
+    def from_ranges(cls, ranges, include_end=False, min_value=None, max_value=None, sep=":"):
+        """
+        Creates a new instance from *ranges* in any format accepted by :py:func:`range_expand`,
+        which also describes the meaning of *include_end*, *min_value*, *max_value* and *sep*.
+        """
+        return cls(_range_intervals(ranges, include_end=include_end, min_value=min_value,
+            max_value=max_value, sep=sep))
+
+    def __init__(self, intervals=None):
+        super(BranchRangeSet, self).__init__()
+
+        self._intervals = tuple(_merge_intervals(intervals or []))
+
+    @property
+    def intervals(self):
+        return self._intervals
+
+    def min(self):
+        """
+        Returns the smallest number in the set, or *None* when empty.
+        """
+        return self._intervals[0][0] if self._intervals else None
+
+    def max(self):
+        """
+        Returns the largest number in the set, or *None* when empty.
+        """
+        return (self._intervals[-1][1] - 1) if self._intervals else None
+
+    def union(self, other):
+        """
+        Returns a new set containing numbers in this and in the *other* set.
+        """
+        other = self.from_numbers(other)
+        return self.__class__(self._intervals + other._intervals)
+
+    def intersection(self, other):
+        """
+        Returns a new set containing numbers in both this and the *other* set.
+        """
+        other = self.from_numbers(other)
+        a, b = self._intervals, other._intervals
+        intervals = []
+        i = j = 0
+        while i < len(a) and j < len(b):
+            start = max(a[i][0], b[j][0])
+            stop = min(a[i][1], b[j][1])
+            if start < stop:
+                intervals.append((start, stop))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+
+        inst = self.__class__()
+        inst._intervals = tuple(intervals)
+        return inst
+
+    def difference(self, other):
+        """
+        Returns a new set containing numbers in this but not in the *other* set.
+        """
+        other = self.from_numbers(other)
+        b = other._intervals
+        intervals = []
+        j = 0
+        for start, stop in self._intervals:
+            # skip intervals of other that end before start
+            while j < len(b) and b[j][1] <= start:
+                j += 1
+            k = j
+            while k < len(b) and b[k][0] < stop:
+                if b[k][0] > start:
+                    intervals.append((start, b[k][0]))
+                start = max(start, b[k][1])
+                k += 1
+            if start < stop:
+                intervals.append((start, stop))
+
+        inst = self.__class__()
+        inst._intervals = tuple(intervals)
+        return inst
+
+    def to_ranges(self, include_end=False):
+        """
+        Returns a list of 1- and 2-tuples denoting single numbers or start and end values of ranges
+        in the same format as :py:func:`range_join`. Unless *include_end* is *True*, end values are
+        not included.
+        """
+        return [
+            (start,) if stop - start == 1 else (start, stop - int(bool(include_end)))
+            for start, stop in self._intervals
+        ]
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __contains__(self, number):
+        i = bisect.bisect_right(self._intervals, (number, float("inf"))) - 1
+        return i >= 0 and self._intervals[i][0] <= number < self._intervals[i][1]
+
+    def __iter__(self):
+        for start, stop in self._intervals:
+            for n in six.moves.range(start, stop):
+                yield n
+
+    def __len__(self):
+        return sum(stop - start for start, stop in self._intervals)
+
+    def __bool__(self):
+        return bool(self._intervals)
+
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        if not isinstance(other, BranchRangeSet):
+            return NotImplemented
+        return self._intervals == other._intervals
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __hash__(self):
+        return hash(self._intervals)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, list(self._intervals))
+
+
 def multi_match(name, patterns, mode=any, regex=None):
     """
     Compares *name* to multiple *patterns* and returns *True* in case of at least one match (*mode*
@@ -1166,6 +1416,91 @@ def map_verbose(func, seq, msg="{}", every=25, start=True, end=True, offset=0, c
     return results
 
 
+def prefetch_map(func, seq, prefetch=1, size=None, max_size=None):
+    """
+    Generator that yields the results of *func* applied to all elements of *seq* in order, while
+    evaluating up to *prefetch* upcoming elements concurrently in background threads. This is
+    helpful to hide latencies of I/O bound operations, e.g. when fetching remote files that are
+    processed one after another. A *prefetch* value smaller than 1 disables the concurrency.
+
+    When *max_size* is set, *size* should be a callable that receives a result and returns its
+    size, e.g. in bytes. No new evaluations are started as long as the summed size of all results
+    that were computed but not yet fully consumed exceeds *max_size*. A result is considered
+    consumed when the next one is requested. Exceptions raised by *func* are re-raised when the
+    corresponding result is requested. Example:
+
+    .. code-block:: python
+
+        fetch = lambda target: target.copy_to_local(...)
+        for local_path in prefetch_map(fetch, targets, prefetch=4):
+            process(local_path)
+    """
+    if prefetch < 1:
+        for obj in seq:
+            yield func(obj)
+        return
+
+    if max_size is not None and not callable(size):
+        raise ValueError("size must be callable when max_size is set, got {!r}".format(size))
+
+    lock = threading.Lock()
+    state = {"buffered": 0}
+
+    class Job(object):
+
+        def __init__(self, obj):
+            super(Job, self).__init__()
+
+            self.obj = obj
+            self.result = None
+            self.error = None
+            self.size = 0
+            self.thread = threading.Thread(target=self.run)
+            self.thread.daemon = True
+
+        def run(self):
+            try:
+                self.result = func(self.obj)
+                if max_size is not None:
+                    self.size = size(self.result) or 0
+            except (Exception, KeyboardInterrupt):
+                self.error = sys.exc_info()
+            with lock:
+                state["buffered"] += self.size
+
+    seq = iter(seq)
+    jobs = collections.deque()
+
+    def fill():
+        while len(jobs) < prefetch:
+            # at least one job is running at all times, others only when the size budget allows
+            if jobs and max_size is not None:
+                with lock:
+                    if state["buffered"] >= max_size:
+                        return
+            try:
+                obj = six.next(seq)
+            except StopIteration:
+                return
+            job = Job(obj)
+            jobs.append(job)
+            job.thread.start()
+
+    fill()
+    while jobs:
+        job = jobs.popleft()
+        job.thread.join()
+        if job.error:
+            six.reraise(*job.error)
+
+        # start further jobs while the current result is consumed
+        fill()
+        yield job.result
+
+        with lock:
+            state["buffered"] -= job.size
+
+
 def map_struct(func, struct, map_dict=True, map_list=True, map_tuple=False, map_set=False,
         cls=None, custom_mappings=None):
     """
@@ -1477,6 +1812,365 @@ def kill_process(p, kill_group=False, kill_timeout=None):
                 os.killpg(pid, signal.SIGKILL)
 
 
+def process_tree_usage(pid=None, io=False):
+    """
+    Returns a dictionary with the summed resident set size ``"rss"`` in bytes and consumed CPU time
+    ``"cpu"`` in seconds of all live processes in the tree starting at *pid*, which defaults to the
+    current process. When *io* is *True*, the number of bytes read and written by each process,
+    obtained from ``rchar`` and ``wchar`` in ``/proc/<pid>/io``, are added as ``"io"``, mapped to
+    process ids. *None* is returned when ``/proc`` is not available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    if pid is None:
+        pid = os.getpid()
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    clk_tck = float(os.sysconf("SC_CLK_TCK"))
+
+    stats = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(entry), "r") as f:
+                # skip the command which might contain spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (IOError, OSError, IndexError):
+            continue
+        # fields start at the state (3rd field in the man page)
+        stats[int(entry)] = (int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21]))
+
+    children = {}
+    for _pid, (ppid, _, _) in six.iteritems(stats):
+        children.setdefault(ppid, []).append(_pid)
+
+    rss, cpu, io_counters = 0, 0, {}
+    queue = [pid]
+    while queue:
+        _pid = queue.pop()
+        if _pid not in stats:
+            continue
+        _, ticks, pages = stats[_pid]
+        rss += pages * page_size
+        cpu += ticks
+        queue.extend(children.get(_pid, []))
+
+        if io:
+            try:
+                with open("/proc/{}/io".format(_pid), "r") as f:
+                    counters = dict(line.split(":", 1) for line in f if ":" in line)
+                io_counters[_pid] = (int(counters["rchar"]), int(counters["wchar"]))
+            except (IOError, OSError, KeyError, ValueError):
+                pass
+
+    usage = {"rss": rss, "cpu": round(cpu / clk_tck, 2)}
+    if io:
+        usage["io"] = io_counters
+
+    return usage
+
+
+class ResourceMonitor(object):
+    """
+    Monitor that accounts resources used by the current process and its children between
+    :py:meth:`start` and :py:meth:`stop`. The resident set size (RSS) of the process tree and I/O
+    counters are sampled by a background thread every *interval* seconds, while CPU times are
+    obtained from ``resource.getrusage`` for both the process itself and its terminated children.
+    On systems without ``/proc``, the maximum RSS falls back to the peak value of the process as
+    reported by ``getrusage`` and I/O counters are not available. Example:
+
+    .. code-block:: python
+
+        with ResourceMonitor(interval=1.0) as mon:
+            do_work()
+
+        print(mon.summary)
+        # -> {"wall_time": 12.3, "cpu_time": 11.9, "cpu_efficiency": 0.97, "max_rss": ..., ...}
+
+    .. py:attribute:: summary
+
+        type: dict, None
+
+        The summary of accounted resources after :py:meth:`stop` was called, containing the
+        ``"wall_time"``, ``"cpu_user"``, ``"cpu_sys"`` and ``"cpu_time"`` in seconds, the
+        ``"cpu_efficiency"`` as the ratio of CPU and wall time, the ``"max_rss"`` and ``"mean_rss"``
+        in bytes, the number of bytes ``"read"`` and ``"written"``, and the number of ``"samples"``.
+    """
+
+    def __init__(self, interval=1.0):
+        super(ResourceMonitor, self).__init__()
+
+        self.interval = max(float(interval), 0.01)
+        self.summary = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _reset(self):
+        self._t0 = None
+        self._rusage0 = None
+        self._max_rss = 0
+        self._sum_rss = 0
+        self._n_samples = 0
+        self._io0 = {}
+        self._io = {}
+
+    @classmethod
+    def _rusage(cls):
+        if resource is None:
+            return None
+        self_usage = resource.getrusage(resource.RUSAGE_SELF)
+        children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return (
+            self_usage.ru_utime + children_usage.ru_utime,
+            self_usage.ru_stime + children_usage.ru_stime,
+            self_usage.ru_maxrss,
+        )
+
+    def sample(self):
+        """
+        Samples the RSS and I/O counters of the process tree once.
+        """
+        usage = process_tree_usage(io=True)
+        if usage is None:
+            return
+
+        with self._lock:
+            self._max_rss = max(self._max_rss, usage["rss"])
+            self._sum_rss += usage["rss"]
+            self._n_samples += 1
+            # keep the last seen counters per process to account for terminated processes as well
+            self._io.update(usage["io"])
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        """
+        Starts the accounting.
+        """
+        if self._thread is not None:
+            return
+
+        self._reset()
+        self.summary = None
+        self._stop_event.clear()
+        self._t0 = perf_counter()
+        self._rusage0 = self._rusage()
+        self.sample()
+        # counters of processes already running at this point serve as a baseline
+        self._io0 = dict(self._io)
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the accounting, stores the result in :py:attr:`summary` and returns it.
+        """
+        if self._thread is None:
+            return self.summary
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.sample()
+
+        wall_time = perf_counter() - self._t0
+        rusage = self._rusage()
+        cpu_user = cpu_sys = None
+        if rusage and self._rusage0:
+            cpu_user = rusage[0] - self._rusage0[0]
+            cpu_sys = rusage[1] - self._rusage0[1]
+
+        # fallback for the maximum rss, ru_maxrss is given in bytes on macos and kB otherwise
+        max_rss = self._max_rss or None
+        if not max_rss and rusage:
+            max_rss = rusage[2] * (1 if sys.platform == "darwin" else 1024)
+
+        # sum up i/o counters of all processes seen
+        read = written = None
+        if self._io:
+            read = written = 0
+            for pid, (r, w) in six.iteritems(self._io):
+                r0, w0 = self._io0.get(pid, (0, 0))
+                read += r - r0
+                written += w - w0
+
+        cpu_time = None if cpu_user is None else cpu_user + cpu_sys
+        self.summary = {
+            "wall_time": round(wall_time, 3),
+            "cpu_user": None if cpu_user is None else round(cpu_user, 3),
+            "cpu_sys": None if cpu_sys is None else round(cpu_sys, 3),
+            "cpu_time": None if cpu_time is None else round(cpu_time, 3),
+            "cpu_efficiency": round(cpu_time / wall_time, 3) if cpu_time and wall_time else None,
+            "max_rss": max_rss,
+            "mean_rss": int(self._sum_rss / self._n_samples) if self._n_samples else None,
+            "read": read,
+            "written": written,
+            "samples": self._n_samples,
+        }
+
+        return self.summary
+
+    @classmethod
+    def format_summary(cls, summary):
+        """
+        Returns a short, human-readable representation of a resource *summary* as created by
+        :py:meth:`stop` or :py:func:`aggregate_resources`.
+        """
+        def fmt_bytes(n):
+            return "{:.1f} {}".format(*human_bytes(n)) if n is not None else "n/a"
+
+        parts = ["wall time {}".format(human_duration(seconds=round(summary["wall_time"], 1)))]
+        if summary.get("cpu_time") is not None:
+            parts.append("cpu time {}".format(human_duration(seconds=round(summary["cpu_time"], 1))))
+        if summary.get("cpu_efficiency") is not None:
+            parts.append("cpu efficiency {:.1f}%".format(100 * summary["cpu_efficiency"]))
+        parts.append("max rss {}".format(fmt_bytes(summary.get("max_rss"))))
+        if summary.get("read") is not None:
+            parts.append("read {}".format(fmt_bytes(summary["read"])))
+            parts.append("written {}".format(fmt_bytes(summary["written"])))
+
+        return ", ".join(parts)
+
+
+def aggregate_resources(summaries):
+    """
+    Aggregates a sequence of resource *summaries* as created by :py:meth:`ResourceMonitor.stop` and
+    returns a new summary with the summed times and I/O counters, the maximum of ``"max_rss"``, the
+    mean of ``"mean_rss"``, the overall ``"cpu_efficiency"`` and the number of aggregated summaries
+    as ``"count"``. *None* is returned for empty *summaries*. See :py:class:`ResourceTotals` for
+    aggregations that are updated incrementally.
+    """
+    return ResourceTotals(summaries).summary()
+
+
+class ResourceTotals(object):
+    """
+    Running totals of resource *summaries* as created by :py:meth:`ResourceMonitor.stop`. Summaries
+    can be added and removed incrementally, and :py:meth:`summary` returns the same aggregate as
+    :py:func:`aggregate_resources` would for all summaries added and not removed so far.
+
+    .. code-block:: python
+
+        totals = ResourceTotals()
+        totals.add(summary_a)
+        totals.add(summary_b)
+        totals.remove(summary_a)  # e.g. to replace it with an updated summary
+        totals.summary()
+    """
+
+    sum_keys = ("wall_time", "cpu_user", "cpu_sys", "cpu_time", "read", "written", "samples")
+
+    def __init__(self, summaries=None):
+        super(ResourceTotals, self).__init__()
+
+        # per key, the sum and the number of summaries with a value
+        self._sums = {key: [0, 0] for key in self.sum_keys + ("mean_rss",)}
+        self._count = 0
+        self._n = 0
+
+        # occurrences of max_rss values and their current maximum, recomputed lazily
+        self._max_rss = collections.Counter()
+        self._max_rss_value = None
+        self._max_rss_dirty = False
+
+        for summary in (summaries or []):
+            self.add(summary)
+
+    def __len__(self):
+        return self._n
+
+    def _update(self, summary, sign):
+        for key, entry in six.iteritems(self._sums):
+            if summary.get(key) is not None:
+                entry[0] += sign * summary[key]
+                entry[1] += sign
+        self._count += sign * summary.get("count", 1)
+        self._n += sign
+
+    def add(self, summary):
+        """
+        Adds a resource *summary*. Empty summaries are ignored.
+        """
+        if not summary:
+            return
+
+        self._update(summary, 1)
+
+        max_rss = summary.get("max_rss")
+        if max_rss is not None:
+            self._max_rss[max_rss] += 1
+            if not self._max_rss_dirty and (self._max_rss_value is None or
+                    max_rss > self._max_rss_value):
+                self._max_rss_value = max_rss
+
+    def remove(self, summary):
+        """
+        Removes a resource *summary* that was previously added. Empty summaries are ignored.
+        """
+        if not summary:
+            return
+
+        self._update(summary, -1)
+
+        max_rss = summary.get("max_rss")
+        if max_rss is not None and self._max_rss[max_rss] > 0:
+            self._max_rss[max_rss] -= 1
+            if self._max_rss[max_rss] == 0:
+                del self._max_rss[max_rss]
+                if max_rss == self._max_rss_value:
+                    self._max_rss_dirty = True
+
+    def summary(self):
+        """
+        Returns the aggregated summary, or *None* when no summaries are contained.
+        """
+        if self._n <= 0:
+            return None
+
+        def total(key, ndigits=3):
+            value, n = self._sums[key]
+            return round(value, ndigits) if n > 0 else None
+
+        if self._max_rss_dirty:
+            self._max_rss_value = max(self._max_rss) if self._max_rss else None
+            self._max_rss_dirty = False
+
+        mean_rss, n_mean_rss = self._sums["mean_rss"]
+
+        agg = {
+            "count": self._count,
+            "wall_time": total("wall_time"),
+            "cpu_user": total("cpu_user"),
+            "cpu_sys": total("cpu_sys"),
+            "cpu_time": total("cpu_time"),
+            "max_rss": self._max_rss_value,
+            "mean_rss": int(mean_rss / n_mean_rss) if n_mean_rss > 0 else None,
+            "read": total("read", 0),
+            "written": total("written", 0),
+            "samples": total("samples", 0),
+        }
+        agg["cpu_efficiency"] = round(agg["cpu_time"] / agg["wall_time"], 3) \
+            if agg["cpu_time"] and agg["wall_time"] else None
+
+        return agg
+
+
 def readable_popen(*args, **kwargs):
     """
     Creates a :py:class:`Popen` object and a generator function yielding the output line-by-line as
@@ -1587,6 +2281,73 @@ def makedirs(path, perm=None):
             os.umask(umask)
 
 
+class SharedState(object):
+    """
+    State dictionary that is stored in a pickle file at *path* and shared between processes on the
+    same machine. Accesses are serialized by an exclusive lock on a file next to it, so that also
+    threads in the same process can safely share a state. Example:
+
+    .. code-block:: python
+
+        state = SharedState("/tmp/my_state.pkl")
+        with state.locked() as data:
+            data["count"] = data.get("count", 0) + 1
+    """
+
+    def __init__(self, path):
+        super(SharedState, self).__init__()
+
+        self.path = os.path.abspath(os.path.expandvars(os.path.expanduser(str(path))))
+        self.lock_path = self.path + ".lock"
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Context manager that acquires the lock and yields the state dictionary, which is written
+        back to the file when the context is left without an exception.
+        """
+        import fcntl
+
+        makedirs(os.path.dirname(self.path))
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                data = self.read()
+                yield data
+
+                tmp_path = "{}.{}.{}.tmp".format(self.path, os.getpid(),
+                    threading.current_thread().ident)
+                with open(tmp_path, "wb") as f:
+                    six.moves.cPickle.dump(data, f, protocol=2)
+                os.rename(tmp_path, self.path)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def read(self):
+        """
+        Returns the current state without locking. An empty dictionary is returned when the file
+        does not exist yet or cannot be read.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = six.moves.cPickle.load(f)
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+def process_alive(pid):
+    """
+    Returns whether a process with *pid* is alive on the current machine.
+    """
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        # EPERM means the process exists but belongs to someone else
+        return e.errno == errno.EPERM
+    return True
+
+
 def user_owns_file(path, uid=None):
     """
     Returns whether a file located at *path* is owned by the user with *uid*. When *uid* is *None*,
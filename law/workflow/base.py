@@ -26,9 +26,10 @@ from law.task.proxy import ProxyTask, ProxyAttributeTask
 from law.target.collection import TargetCollection
 from law.target.local import LocalFileTarget
 from law.parameter import NO_STR, MultiRangeParameter, CSVParameter
+from law.trace import span, count
 from law.util import (
-    no_value, make_list, make_set, iter_chunks, range_expand, range_join, create_hash,
-    is_classmethod, DotDict,
+    no_value, make_list, make_set, iter_chunks, range_join, create_hash, is_classmethod, DotDict,
+    BranchRangeSet,
 )
 from law.logger import get_logger
 
@@ -110,11 +111,12 @@ class BaseWorkflowProxy(ProxyTask):
         anything else than *NotImplemented* returns the value, or just does the default completion
         check otherwise.
         """
-        complete = self.task.workflow_complete()
-        if complete is not NotImplemented:
-            return complete
+        with span("workflow_complete", "task", task=self.task.task_family):
+            complete = self.task.workflow_complete()
+            if complete is not NotImplemented:
+                return complete
 
-        return super(BaseWorkflowProxy, self).complete()
+            return super(BaseWorkflowProxy, self).complete()
 
     def requires(self):
         """
@@ -632,6 +634,15 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
         Whether workflow requirements should be evaluated only cached and cached afterwards in the
         :py:attr:`_cached_workflow_requirements` attribute. Defaults to *False*.
 
+    .. py:classattribute:: bulk_branch_tasks
+
+        type: bool
+
+        Whether :py:meth:`make_branch_tasks` is allowed to create branch tasks from the normalized
+        parameters of a first branch task instead of requiring each one separately. This is not done
+        when :py:meth:`modify_param_args` or :py:meth:`modify_param_values` are overwritten, as
+        their results might depend on the branch value. Defaults to *True*.
+
     .. py:classattribute:: cache_branch_map_default
 
         type: bool
@@ -725,6 +736,7 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
     reset_branch_map_before_run = False
     create_branch_map_before_repr = False
     cache_workflow_requirements = False
+    bulk_branch_tasks = True
     cache_branch_map_default = True
     passthrough_requested_workflow = True
     workflow_run_decorators = None
@@ -929,9 +941,9 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
 
             # check if _branches match branches when set
             if branches:
-                branches = range_expand(list(branches), include_end=True, min_value=0,
+                branches = BranchRangeSet.from_ranges(list(branches), include_end=True, min_value=0,
                     max_value=max(branch_map))
-                if set(branches) != set(_branches):
+                if branches != BranchRangeSet.from_numbers(_branches):
                     raise ValueError(
                         "workflow parameters {} expanded in {} to branches ({}) do not match "
                         "passed branches ({})".format(
@@ -1215,24 +1227,17 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
 
         # rejoin branch ranges when given
         if self.branches:
-            # get minimum and maximum branches
-            branches = set(full_branch_map.keys())
-            min_branch = min(branches)
-            max_branch = max(branches) + 1
-
-            # get expanded branch values
-            branches = range_expand(
+            # get all and requested branches, limited to the minimum and maximum branches
+            all_branches = BranchRangeSet.from_numbers(full_branch_map.keys())
+            branches = BranchRangeSet.from_ranges(
                 list(self.branches),
-                min_value=min_branch,
-                max_value=max_branch,
+                min_value=all_branches.min(),
+                max_value=all_branches.max() + 1,
             )
 
             # assign back to branches attribute, use an empty tuple in case all branches are used
-            use_all = (
-                len(branches) == len(full_branch_map) and
-                set(branches) == set(full_branch_map)
-            )
-            self.branches = () if use_all else tuple(range_join(branches))
+            use_all = branches == all_branches
+            self.branches = () if use_all else tuple(branches.to_ranges())
 
     def _reduce_branch_map(self, branch_map):
         if self.is_branch():
@@ -1243,16 +1248,13 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
 
         # apply branch ranges
         if self.branches:
-            branches = set(branch_map.keys())
-            min_branch = min(branches)
-            max_branch = max(branches) + 1
-
-            requested = range_expand(
+            branches = BranchRangeSet.from_numbers(branch_map.keys())
+            requested = BranchRangeSet.from_ranges(
                 list(self.branches),
-                min_value=min_branch,
-                max_value=max_branch,
+                min_value=branches.min(),
+                max_value=branches.max() + 1,
             )
-            remove_branches |= branches - set(requested)
+            remove_branches = branches - requested
 
         # remove from branch map
         for b in remove_branches:
@@ -1273,24 +1275,26 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
 
         branch_map = self._branch_map
         if branch_map is None:
-            # create a new branch map
-            args = ()
-            if is_classmethod(self.create_branch_map, self.__class__):
-                params = OrderedDict([
-                    (param_name, getattr(self, param_name))
-                    for param_name, _ in self.get_params()
-                ])
-                args = (params,)
-            branch_map = self.create_branch_map(*args)
-
-            # some type and sanity checks
-            branch_map = self._sanitize_branch_map(branch_map, self.force_contiguous_branches)
-
-            # post-process
-            if reset_boundaries:
-                self._reset_branch_boundaries(branch_map)
-            if reduce_branches:
-                self._reduce_branch_map(branch_map)
+            with span("branch_map", "workflow", task=self.task_family):
+                # create a new branch map
+                args = ()
+                if is_classmethod(self.create_branch_map, self.__class__):
+                    params = OrderedDict([
+                        (param_name, getattr(self, param_name))
+                        for param_name, _ in self.get_params()
+                    ])
+                    args = (params,)
+                branch_map = self.create_branch_map(*args)
+
+                # some type and sanity checks
+                branch_map = self._sanitize_branch_map(branch_map, self.force_contiguous_branches)
+                count("workflow.branches", len(branch_map))
+
+                # post-process
+                if reset_boundaries:
+                    self._reset_branch_boundaries(branch_map)
+                if reduce_branches:
+                    self._reduce_branch_map(branch_map)
 
             # cache it
             if self.cache_branch_map:
@@ -1323,9 +1327,7 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
 
         if self._branch_tasks is None:
             # get all branch tasks according to the map
-            branch_tasks = OrderedDict()
-            for b in self.get_branch_map():
-                branch_tasks[b] = self.as_branch(branch=b)
+            branch_tasks = self.make_branch_tasks(self.get_branch_map())
 
             # return the task when we are not going to cache it
             if not self.cache_branch_map:
@@ -1336,6 +1338,71 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
 
         return self._branch_tasks
 
+    def make_branch_tasks(self, branches=None):
+        """
+        Creates branch tasks for *branches*, defaulting to all branches in the branch map, and
+        returns them in a dictionary mapping branch numbers to tasks. The tasks are identical to
+        those returned by :py:meth:`as_branch`, but only the first one is created through
+        :py:meth:`req`. Parameters of all others are derived from its normalized values, differing
+        only in their branch value, and so are the string representations that define their task
+        ids, so that the parameter resolution, normalization and serialization is done only once.
+        Tasks are stored in the luigi instance cache in the process. When the workflow uses
+        :py:class:`WorkflowParameter` objects, overrides :py:meth:`modify_param_args` or
+        :py:meth:`modify_param_values`, or when :py:attr:`bulk_branch_tasks` is *False*, all tasks
+        are created with :py:meth:`as_branch`.
+        """
+        if self.is_branch():
+            return self.as_workflow().make_branch_tasks(branches=branches)
+
+        if branches is None:
+            branches = self.get_branch_map().keys()
+
+        bulk = self.bulk_branch_tasks and not self._workflow_param_names and \
+            not self._modifies_param_values()
+
+        branch_tasks = OrderedDict()
+        template = None
+        for b in branches:
+            if b in branch_tasks:
+                continue
+
+            # the first task serves as a template
+            if template is None or not bulk:
+                branch_tasks[b] = self.as_branch(branch=b)
+                if template is None:
+                    template = branch_tasks[b]
+                    cls = template.__class__
+                    params = cls.get_params()
+                    branch_param = dict(params)["branch"]
+                    values = [(name, template.param_kwargs[name]) for name, _ in params]
+                    branch_idx = [name for name, _ in params].index("branch")
+                    str_params = template.to_str_params(only_significant=True, only_public=True)
+                    update_str_branch = "branch" in str_params
+                continue
+
+            # only update the branch value and its string representation
+            value = branch_param.normalize(b)
+            values[branch_idx] = ("branch", value)
+            if update_str_branch:
+                str_params["branch"] = branch_param.serialize(value)
+            branch_tasks[b] = cls._create_prepared(list(values), str_params)
+            if branch_tasks[b]._workflow_task is None:
+                branch_tasks[b]._workflow_task = self
+
+        return branch_tasks
+
+    @classmethod
+    def _modifies_param_values(cls):
+        # whether parameter hooks are overwritten by subclasses of BaseWorkflow, in which case
+        # values might depend on the branch and branch tasks cannot be created from a template
+        for attr in ("modify_param_args", "modify_param_values"):
+            for _cls in cls.__mro__:
+                if attr in _cls.__dict__:
+                    if issubclass(_cls, BaseWorkflow) and _cls is not BaseWorkflow:
+                        return True
+                    break
+        return False
+
     def get_branch_chunks(self, chunk_size):
         """
         Returns a list of chunks of branch numbers defined in this workflow with a certain
@@ -1402,7 +1469,7 @@ class BaseWorkflow(six.with_metaclass(WorkflowRegister, ProxyAttributeTask)):
         if not self.branches:
             return "{}To{}".format(min(branch_map.keys()), max(branch_map.keys()) + 1)
 
-        ranges = range_join(list(branch_map.keys()))
+        ranges = range_join(BranchRangeSet.from_numbers(branch_map.keys()))
         if len(ranges) > max_ranges:
             return "{}_ranges_{}".format(len(ranges), create_hash(ranges))
 
@@ -12,6 +12,7 @@ import sys
 import time
 import re
 import copy
+import json
 import random
 import threading
 from collections import OrderedDict, defaultdict
@@ -21,11 +22,16 @@ import luigi
 import six
 
 from law.workflow.base import BaseWorkflow, BaseWorkflowProxy
+from law.workflow.scheduling import BranchRuntimeHistory, get_scheduling_policy, pack_branches
 from law.job.dashboard import NoJobDashboard
+from law.target.file import FileSystemDirectoryTarget, get_path
+from law.target.local import LocalDirectoryTarget
+from law.config import Config
 from law.parameter import NO_FLOAT, NO_INT, get_param, DurationParameter
 from law.util import (
     no_value, is_number, colored, iter_chunks, merge_dicts, human_duration, DotDict, ShorthandDict,
-    InsertableDict,
+    InsertableDict, ResourceMonitor, ResourceTotals, aggregate_resources, make_list, create_hash,
+    create_random_string,
 )
 from law.logger import get_logger
 
@@ -33,11 +39,49 @@ from law.logger import get_logger
 logger = get_logger(__name__)
 
 
+# prefix of lines in job logs that report the runtime of a branch, see law_job.sh
+branch_runtime_prefix = "law_job_branch_runtime:"
+
+# prefix of lines in job logs that report resource summaries of a branch, see law_job.sh
+branch_resources_prefix = "law_job_branch_resources:"
+
+
+@luigi.Task.event_handler(luigi.Event.PROCESSING_TIME)
+def _report_branch_runtime(task, processing_time):
+    # when running inside a law job, append the runtime of branch tasks to the file that is read by
+    # law_job.sh to report runtimes in the job log
+    runtimes_file = os.getenv("LAW_JOB_RUNTIMES_FILE")
+    if not runtimes_file or not isinstance(task, BaseWorkflow) or not task.is_branch():
+        return
+
+    try:
+        with open(runtimes_file, "a") as f:
+            f.write("{} {:.3f}\n".format(task.branch, processing_time))
+    except (IOError, OSError) as e:
+        logger.warning("could not report runtime of {}: {}".format(task.task_id, e))
+
+
+@luigi.Task.event_handler(luigi.Event.START)
+def _report_branch_start(task):
+    # when running inside a law job with heartbeats enabled, append started branch tasks to the file
+    # that is read by the heartbeat writer to report currently running branches
+    started_file = os.getenv("LAW_JOB_STARTED_FILE")
+    if not started_file or not isinstance(task, BaseWorkflow) or not task.is_branch():
+        return
+
+    try:
+        with open(started_file, "a") as f:
+            f.write("{}\n".format(task.branch))
+    except (IOError, OSError) as e:
+        logger.warning("could not report start of {}: {}".format(task.task_id, e))
+
+
 class JobData(ShorthandDict):
     """
     Sublcass of :py:class:`law.util.ShorthandDict` that adds shorthands for the attributes *jobs*,
-    *unsubmitted_jobs*, *tasks_per_job*, and *dashboard_config*. This container object is used to
-    store and keep track of per job information in :py:class:`BaseRemoteWorkflow`.
+    *unsubmitted_jobs*, *tasks_per_job*, *branch_runtimes*, *branch_resources*, *resources* and
+    *dashboard_config*. This container object is used to store and keep track of per job information
+    in :py:class:`BaseRemoteWorkflow`.
 
     .. py:classattribute:: dummy_job_id
 
@@ -51,6 +95,9 @@ class JobData(ShorthandDict):
         "unsubmitted_jobs": {},  # job_num -> branches
         "attempts": {},  # job_num -> current attempt
         "tasks_per_job": 1,
+        "branch_runtimes": {},  # branch -> runtime in seconds
+        "branch_resources": {},  # branch -> resource summary, see law.decorator.account_resources
+        "resources": {},  # resource summary aggregated over all branches
         "dashboard_config": {},
     }
 
@@ -74,7 +121,7 @@ class JobData(ShorthandDict):
         """"""
         other = dict(other)
         # ensure that keys (i.e. job nums) in job dicts are integers
-        for key in ["jobs", "unsubmitted_jobs", "attempts"]:
+        for key in ["jobs", "unsubmitted_jobs", "attempts", "branch_runtimes", "branch_resources"]:
             if key in other:
                 cls = other[key].__class__
                 other[key] = cls((int(job_num), val) for job_num, val in six.iteritems(other[key]))
@@ -218,6 +265,10 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         # set of existing branches that is kept track of during processing
         self._existing_branches = None
 
+        # set of branches reported as done in heartbeats, only used to display the progress as
+        # their outputs are not checked
+        self._heartbeat_done_branches = set()
+
         # flag denoting if jobs were cancelled or cleaned up (i.e. controlled)
         self._controlled_jobs = False
 
@@ -237,10 +288,423 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         # process_resources()
         self._initial_process_resources = None
 
+        # running totals of resource summaries of all branches, created lazily
+        self._resource_totals = None
+
+        # the scheduling policy deciding the order of job submissions
+        self.scheduling_policy = get_scheduling_policy(task.scheduling_policy)
+
+        # history of branch runtimes, created lazily when required
+        self._runtime_history = no_value
+
+        # times when jobs were submitted or first seen running per job num, to measure runtimes
+        self._job_start_times = {}
+
+        # observed runtimes of finished jobs
+        self._job_runtimes = []
+
+        # ids of speculatively submitted copies of straggling jobs per job num, their extra
+        # submission data (e.g. log files) per copy id, and job nums currently being submitted as
+        # copies
+        self._speculative_jobs = OrderedDict()
+        self._speculative_extra = {}
+        self._speculative_submission = set()
+
+        # directory target for heartbeats written by jobs, created lazily
+        self._heartbeat_directory = no_value
+
+        # last heartbeat sequence numbers per job num and the local times when they advanced
+        self._heartbeat_progress = {}
+
     @property
     def job_data_cls(self):
         return JobData
 
+    @property
+    def runtime_history(self):
+        """
+        The :py:class:`law.workflow.scheduling.BranchRuntimeHistory` of the task family when
+        required by the :py:attr:`scheduling_policy` or for adaptive packing of branches into jobs
+        (see :py:attr:`BaseRemoteWorkflow.target_job_duration`), and *None* otherwise.
+        """
+        if self._runtime_history is no_value:
+            self._runtime_history = None
+            adaptive = self.task.target_job_duration not in (None, NO_FLOAT)
+            if self.scheduling_policy.uses_runtimes or adaptive:
+                self._runtime_history = BranchRuntimeHistory(self.task.task_family,
+                    key=self.runtime_history_key())
+        return self._runtime_history
+
+    def runtime_history_key(self):
+        """
+        Returns the key of the :py:attr:`runtime_history` that distinguishes runtimes of workflows
+        of the same task family, given by a hash of all significant parameters except for those
+        that only control the workflow or job submission and do not change what branches compute.
+        """
+        task = self.task
+        exclude = set(task.exclude_params_branch) | set(task.exclude_params_workflow)
+        params = sorted(
+            (name, value)
+            for name, value in six.iteritems(task.to_str_params(only_significant=True))
+            if name not in exclude
+        )
+        return create_hash(params)
+
+    def get_branch_chunks(self):
+        """
+        Returns a list of lists of branches that are processed per job. When the
+        :py:attr:`BaseRemoteWorkflow.target_job_duration` is set and the runtime history contains
+        branch runtimes, branches are packed so that the expected duration of jobs matches the
+        target duration. Otherwise, branches are chunked according to
+        :py:attr:`BaseRemoteWorkflow.tasks_per_job`. Packing only applies to new jobs, while jobs
+        that are retried keep their branches.
+        """
+        task = self.task
+        branches = sorted(task.branch_map.keys())
+
+        history = self.runtime_history
+        if task.target_job_duration not in (None, NO_FLOAT) and history and history.runtimes:
+            return pack_branches(branches, history.runtimes, task.target_job_duration * 60.0)
+
+        return list(iter_chunks(branches, task.tasks_per_job))
+
+    def _read_branch_runtimes(self, job_num):
+        # read runtimes of branches reported in the log file of a job, see law_job.sh
+        log_file = self.job_data.jobs[job_num]["extra"].get("log")
+        if not isinstance(log_file, six.string_types) or not os.path.isfile(log_file):
+            return {}
+
+        runtimes = {}
+        try:
+            with open(log_file, "r") as f:
+                for line in f:
+                    if not line.startswith(branch_runtime_prefix):
+                        continue
+                    branch, runtime = line[len(branch_runtime_prefix):].split()
+                    runtimes[int(branch)] = float(runtime)
+        except (IOError, OSError, ValueError) as e:
+            logger.debug("could not read branch runtimes from {}: {}".format(log_file, e))
+
+        return runtimes
+
+    def _read_branch_resources(self, job_num):
+        # read resource summaries of branches reported in the log file of a job, see law_job.sh
+        log_file = self.job_data.jobs[job_num]["extra"].get("log")
+        if not isinstance(log_file, six.string_types) or not os.path.isfile(log_file):
+            return {}
+
+        resources = {}
+        try:
+            with open(log_file, "r") as f:
+                for line in f:
+                    if not line.startswith(branch_resources_prefix):
+                        continue
+                    branch, summary = line[len(branch_resources_prefix):].strip().split(" ", 1)
+                    resources[int(branch)] = json.loads(summary)
+        except (IOError, OSError, ValueError) as e:
+            logger.debug("could not read branch resources from {}: {}".format(log_file, e))
+
+        return resources
+
+    def _record_job_resources(self, job_num, resources):
+        # store resource summaries of branches, aggregated per job and over all branches
+        branch_resources = self.job_data.branch_resources
+        resources = {
+            branch: summary
+            for branch, summary in six.iteritems(resources or {})
+            if branch_resources.get(branch) != summary
+        }
+        if not resources:
+            return
+
+        # update the running totals over all branches, initially filled with existing summaries
+        if self._resource_totals is None:
+            self._resource_totals = ResourceTotals(six.itervalues(branch_resources))
+        for branch, summary in six.iteritems(resources):
+            self._resource_totals.remove(branch_resources.get(branch))
+            self._resource_totals.add(summary)
+        branch_resources.update(resources)
+
+        data = self.job_data.jobs[job_num]
+        job_resources = aggregate_resources(
+            self.job_data.branch_resources.get(b) for b in data["branches"]
+        )
+        if job_resources:
+            data["extra"]["resources"] = job_resources
+
+        self.job_data["resources"] = self._resource_totals.summary() or {}
+
+    @property
+    def _speculative_execution(self):
+        return self.task.speculative_factor not in (None, NO_FLOAT) and \
+            self.task.speculative_factor > 0
+
+    @property
+    def _tracks_runtimes(self):
+        return self.runtime_history is not None or self._speculative_execution
+
+    def _record_job_runtime(self, job_num, status):
+        # keep track of start times of jobs and store runtimes of finished jobs in the history
+        if not self._tracks_runtimes:
+            return
+
+        now = time.time()
+        if status == self.job_manager.RUNNING:
+            _, running = self._job_start_times.get(job_num, (None, False))
+            if not running:
+                self._job_start_times[job_num] = (now, True)
+        elif status == self.job_manager.FINISHED:
+            start, _ = self._job_start_times.pop(job_num, (None, False))
+            if start is not None:
+                self._job_runtimes.append(now - start)
+
+            history = self.runtime_history
+            if history is None:
+                return
+
+            # prefer runtimes reported by the job, fallback to the observed job runtime
+            branches = self.job_data.jobs[job_num]["branches"]
+            runtimes = self._read_branch_runtimes(job_num)
+            if not runtimes and start is not None and branches:
+                runtime = (now - start) / float(len(branches))
+                runtimes = {b: runtime for b in branches}
+
+            self.job_data.branch_runtimes.update(runtimes)
+            history.update(runtimes)
+
+    @property
+    def heartbeat_directory(self):
+        """
+        The directory target to which jobs write heartbeats as returned by
+        :py:meth:`BaseRemoteWorkflow.job_heartbeat_directory`, or *None* when heartbeats are
+        disabled.
+        """
+        if self._heartbeat_directory is no_value:
+            self._heartbeat_directory = None
+            directory = self.task.job_heartbeat_directory()
+            if directory is not None:
+                if not isinstance(directory, FileSystemDirectoryTarget):
+                    directory = LocalDirectoryTarget(get_path(directory))
+                directory.touch()
+                self._heartbeat_directory = directory
+        return self._heartbeat_directory
+
+    def heartbeat_render_variables(self):
+        """
+        Returns a dictionary with render variables for the law job script that configure the job-side
+        heartbeat writer, see :py:mod:`law.job.heartbeat`. It contains a new token that identifies
+        the submission and that is stored in the job data through
+        :py:meth:`get_extra_submission_data`. The dictionary is empty when heartbeats are disabled.
+        """
+        directory = self.heartbeat_directory
+        if directory is None:
+            return {}
+
+        # import here to avoid loading the module when executed as a script in jobs
+        from law.job.heartbeat import encode_location
+
+        interval = Config.instance().get_expanded_float("job", "job_heartbeat_interval")
+        return {
+            "heartbeat_location": encode_location(directory),
+            "heartbeat_interval": str(interval),
+            "heartbeat_token": create_random_string(l=10),
+        }
+
+    def _read_heartbeats(self, running_jobs):
+        # reads heartbeats of running jobs at once, tracks branches reported as done for the
+        # progress and flags jobs whose heartbeats did not advance within the configured stall time
+        directory = self.heartbeat_directory
+        if directory is None or not running_jobs:
+            return
+
+        from law.job.heartbeat import heartbeat_file_name
+
+        # map file names to job nums, only considering files of the current submission of each job
+        names = {}
+        for job_num in running_jobs:
+            data = self.job_data.jobs[job_num]
+            token = data["extra"].get("heartbeat_token")
+            if data["branches"] and token:
+                names[heartbeat_file_name(data["branches"], token)] = job_num
+
+        # list the directory only once
+        try:
+            existing = set(directory.listdir(pattern="heartbeat_*.json", type="f"))
+        except Exception as e:
+            logger.warning("could not list heartbeat directory {}: {}".format(directory.path, e))
+            return
+
+        # stalls are measured with the local clock only, based on when the heartbeat sequence
+        # number of a job last advanced, so that clock offsets between hosts do not matter
+        stall_time = Config.instance().get_expanded_float("job", "job_heartbeat_stall_time")
+        now = time.time()
+        for name in sorted(existing & set(names)):
+            job_num = names[name]
+            data = self.job_data.jobs[job_num]
+            try:
+                record = directory.child(name, type="f").load(formatter="json")
+            except Exception as e:
+                logger.debug("could not load heartbeat {}: {}".format(name, e))
+                continue
+
+            prev_record = data["extra"].get("heartbeat") or {}
+            data["extra"]["heartbeat"] = record
+
+            # store resource summaries of branches that are already done, when changed
+            resources = record.get("resources")
+            if resources and resources != prev_record.get("resources"):
+                self._record_job_resources(job_num, {
+                    int(branch): summary
+                    for branch, summary in six.iteritems(resources)
+                })
+
+            # keep track of branches reported as done for the progress
+            self._heartbeat_done_branches |= set(record.get("done") or []) & set(data["branches"])
+
+            # remember when the heartbeat advanced
+            seq = (record.get("token"), record.get("seq"))
+            last_seq, last_time = self._heartbeat_progress.get(job_num, (None, now))
+            if seq != last_seq:
+                last_time = now
+            self._heartbeat_progress[job_num] = (seq, last_time)
+
+            # flag stalled jobs once
+            stalled = record.get("status") != "stopped" and now - last_time > stall_time
+            if stalled and not data["extra"].get("stalled"):
+                self.task.publish_message("job {} ({}) stalled, last heartbeat {} ago".format(
+                    job_num, data["job_id"], human_duration(seconds=int(now - last_time))))
+            data["extra"]["stalled"] = stalled
+
+    def _cancel_job_ids(self, job_ids):
+        # cancels jobs given by job_ids and returns errors
+        cancel_kwargs = merge_dicts(self._setup_job_manager(), self._get_job_kwargs("cancel"))
+        if self.job_manager.job_grouping_cancel:
+            return self.job_manager.cancel_group(job_ids, **cancel_kwargs)
+        return self.job_manager.cancel_batch(job_ids, **cancel_kwargs)
+
+    def _submit_speculative_jobs(self, running_jobs):
+        # submits copies of running jobs whose runtime exceeds a multiple of the median runtime of
+        # finished jobs, limited by the number of free slots
+        task = self.task
+        if len(self._job_runtimes) < max(task.speculative_min_finished, 1):
+            return
+
+        runtimes = sorted(self._job_runtimes)
+        n = len(runtimes)
+        median = runtimes[n // 2] if n % 2 else 0.5 * (runtimes[n // 2 - 1] + runtimes[n // 2])
+        max_runtime = task.speculative_factor * median
+
+        n_free = self.poll_data.n_parallel - self.poll_data.n_active - len(self._speculative_jobs)
+        now = time.time()
+        for job_num in sorted(running_jobs):
+            if n_free <= 0:
+                break
+            if job_num in self._speculative_jobs:
+                continue
+            start, running = self._job_start_times.get(job_num, (None, False))
+            if not running or now - start <= max_runtime:
+                continue
+
+            # submit the copy with its own job and log files, but keep the id of the original job
+            # since the submission methods set ids early
+            data = self.job_data.jobs[job_num]
+            job_id = data["job_id"]
+            submit = self._submit_group if self.job_manager.job_grouping_submit else \
+                self._submit_batch
+            self._speculative_submission.add(job_num)
+            try:
+                job_ids, submission_data = submit(OrderedDict([(job_num, data["branches"])]))
+            finally:
+                data["job_id"] = job_id
+                self._speculative_submission.discard(job_num)
+
+            copy_id = job_ids[0] if job_ids else None
+            if isinstance(copy_id, Exception) or copy_id is None:
+                logger.warning("speculative submission of job {} failed: {}".format(
+                    job_num, copy_id))
+                continue
+
+            # store extra data such as the log file of the copy under its id
+            files = submission_data[job_num]
+            self._speculative_extra[copy_id] = self.get_extra_submission_data(files["job"],
+                copy_id, files["config"], log=files.get("log"))
+
+            self._speculative_jobs[job_num] = copy_id
+            data["extra"]["speculative_job_id"] = copy_id
+            n_free -= 1
+            task.publish_message("job {} running for {}, submitted speculative copy {}".format(
+                job_num, human_duration(seconds=round(now - start)), copy_id))
+
+    def _poll_speculative_jobs(self, states_by_id, query_kwargs):
+        # queries speculative copies of jobs, lets the first one to finish win by updating the
+        # states of the original jobs in states_by_id, and cancels the obsolete job
+        task = self.task
+        job_man = self.job_manager
+
+        copy_states = job_man.query_brokered(list(self._speculative_jobs.values()), **query_kwargs)
+        cancel_ids = []
+        for job_num, copy_id in list(self._speculative_jobs.items()):
+            copy_state = copy_states.get(copy_id)
+            if not isinstance(copy_state, dict):
+                continue
+
+            data = self.job_data.jobs[job_num]
+            state = states_by_id.get(data["job_id"])
+            status = state and state["status"]
+            copy_status = copy_state["status"]
+
+            if status == job_man.FINISHED:
+                # the original job finished first
+                if copy_status in (job_man.PENDING, job_man.RUNNING):
+                    cancel_ids.append(copy_id)
+            elif status in (job_man.FAILED, job_man.RETRY):
+                # the original job failed, continue with the copy if still active
+                if copy_status not in (job_man.PENDING, job_man.RUNNING, job_man.FINISHED):
+                    del self._speculative_jobs[job_num]
+                    continue
+                self._adopt_speculative_job(job_num, copy_id, copy_state, states_by_id)
+            elif copy_status == job_man.FINISHED:
+                # the copy finished first
+                cancel_ids.append(data["job_id"])
+                self._adopt_speculative_job(job_num, copy_id, copy_state, states_by_id)
+                task.publish_message("speculative copy {} of job {} finished first".format(
+                    copy_id, job_num))
+            elif copy_status in (job_man.FAILED, job_man.RETRY):
+                # the copy failed, continue with the original job
+                pass
+            else:
+                continue
+
+            del self._speculative_jobs[job_num]
+            self._speculative_extra.pop(copy_id, None)
+
+        if cancel_ids:
+            errors = self._cancel_job_ids(cancel_ids)
+            if errors:
+                logger.warning("{} error(s) occured while cancelling obsolete jobs: {}".format(
+                    len(errors), errors[0]))
+
+    def _adopt_speculative_job(self, job_num, copy_id, copy_state, states_by_id):
+        # continues job job_num with its speculative copy, including the extra data of the copy
+        data = self.job_data.jobs[job_num]
+        data["job_id"] = copy_id
+        data["extra"].update(self._speculative_extra.get(copy_id, {}))
+        if isinstance(copy_state.get("extra"), dict):
+            data["extra"].update(copy_state["extra"])
+        states_by_id[copy_id] = copy_state
+
+    def _cancel_speculative_jobs(self):
+        # cancels all remaining speculative copies of jobs
+        if not self._speculative_jobs:
+            return
+
+        errors = self._cancel_job_ids(list(self._speculative_jobs.values()))
+        if errors:
+            logger.warning("{} error(s) occured while cancelling speculative jobs: {}".format(
+                len(errors), errors[0]))
+        self._speculative_jobs.clear()
+        self._speculative_extra.clear()
+
     @abstractmethod
     def create_job_manager(self, **kwargs):
         """
@@ -288,6 +752,22 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         """
         return
 
+    def job_file_postfix(self, job_num, branches):
+        """
+        Returns the postfix of job and log files of the job(s) *job_num*, which might also be a list
+        for grouped submission, covering *branches*. It is the pythonic range made from branches,
+        e.g. ``[0, 1, 2, 4] -> "_0To5"``, plus an attempt suffix for speculative copies of jobs so
+        that they do not share files with the original jobs.
+        """
+        postfix = "_{}To{}".format(min(branches), max(branches) + 1)
+
+        copy_nums = set(make_list(job_num)) & self._speculative_submission
+        if copy_nums:
+            job_num = min(copy_nums)
+            postfix += "_copy{}".format(self.job_data.attempts.get(job_num, 0))
+
+        return postfix
+
     def destination_info(self):
         """
         Hook that can return a string containing information on the location that jobs are submitted
@@ -317,6 +797,9 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         extra = {}
         if log:
             extra["log"] = str(log)
+        token = (getattr(config, "render_variables", None) or {}).get("heartbeat_token")
+        if token:
+            extra["heartbeat_token"] = token
         return extra
 
     @property
@@ -554,7 +1037,7 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         resources = self._initial_process_resources
         if not task.is_controlling_remote_jobs() and (resources is None or force):
             get_job_resources = self._get_task_attribute("job_resources")
-            branch_chunks = iter_chunks(task.branch_map.keys(), task.tasks_per_job)
+            branch_chunks = self.get_branch_chunks()
             resources = {
                 job_num: get_job_resources(job_num, branches)
                 for job_num, branches in enumerate(branch_chunks, 1)
@@ -705,8 +1188,7 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
             # submit
             if not self._submitted:
                 # set the initial list of unsubmitted jobs
-                branches = sorted(task.branch_map.keys())
-                branch_chunks = list(iter_chunks(branches, task.tasks_per_job))
+                branch_chunks = self.get_branch_chunks()
                 self.job_data.unsubmitted_jobs = OrderedDict(
                     (i + 1, branches) for i, branches in enumerate(branch_chunks)
                 )
@@ -730,6 +1212,14 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
             if self.job_file_factory:
                 self.job_file_factory.cleanup_dir(force=False)
 
+            # cancel remaining speculative copies of jobs
+            self._cancel_speculative_jobs()
+
+            # release the scheduling policy and store runtimes
+            self.scheduling_policy.release(self)
+            if self.runtime_history is not None:
+                self.runtime_history.save()
+
     def cancel(self):
         """
         Cancels running jobs. The job ids are read from the submission file which has to exist
@@ -827,12 +1317,20 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         # collect data of jobs that should be submitted: num -> branches
         submit_jobs = OrderedDict()
 
+        # maximum number of active jobs after submission, subject to the scheduling policy
+        n_free = self.poll_data.n_parallel - self.poll_data.n_active
+        n_parallel = self.poll_data.n_active + self.scheduling_policy.limit(self, n_free)
+
         # keep track of the list of unsubmitted job nums before retry jobs are handled to control
         # whether they are resubmitted immediately or at the end (subject to shuffling)
         unsubmitted_job_nums = list(self.job_data.unsubmitted_jobs.keys())
         if task.shuffle_jobs:
             random.shuffle(unsubmitted_job_nums)
 
+        # retry jobs that could not be submitted right away, kept before or after all others
+        retry_job_nums_first = []
+        retry_job_nums_last = []
+
         # handle jobs for resubmission
         if retry_jobs:
             for job_num, branches in six.iteritems(retry_jobs):
@@ -844,18 +1342,25 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                 # are configured to be tried last, add the jobs back to the unsubmitted ones and
                 # update the job id
                 n = self.poll_data.n_active + len(submit_jobs)
-                if n >= self.poll_data.n_parallel or task.append_retry_jobs:
+                if n >= n_parallel or task.append_retry_jobs:
                     self.job_data.jobs.pop(job_num, None)
                     self.job_data.unsubmitted_jobs[job_num] = branches
                     if task.append_retry_jobs:
-                        unsubmitted_job_nums.append(job_num)
+                        retry_job_nums_last.append(job_num)
                     else:
-                        unsubmitted_job_nums.insert(0, job_num)
+                        retry_job_nums_first.insert(0, job_num)
                     continue
 
                 # mark job for resubmission
                 submit_jobs[job_num] = sorted(branches)
 
+        # let the scheduling policy decide the order of unsubmitted jobs, except for retry jobs
+        unsubmitted_job_nums = (
+            retry_job_nums_first +
+            self.scheduling_policy.order(self, unsubmitted_job_nums) +
+            retry_job_nums_last
+        )
+
         # fill with unsubmitted jobs until maximum number of parallel jobs is reached
         for job_num in unsubmitted_job_nums:
             branches = self.job_data.unsubmitted_jobs[job_num]
@@ -867,7 +1372,7 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
 
             # mark job for submission only when n_parallel is not reached yet
             n = self.poll_data.n_active + len(submit_jobs)
-            if n < self.poll_data.n_parallel:
+            if n < n_parallel:
                 self.job_data.unsubmitted_jobs.pop(job_num, None)
                 submit_jobs[job_num] = sorted(branches)
 
@@ -907,6 +1412,9 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
             # set the job id in the job data
             job_data = self.job_data.jobs[job_num]
             job_data["job_id"] = job_id
+            if self._tracks_runtimes:
+                self._job_start_times[job_num] = (time.time(), False)
+            self._heartbeat_progress.pop(job_num, None)
             extra = self.get_extra_submission_data(data["job"], job_id, data["config"],
                 log=data.get("log"))
             job_data["extra"].update(extra)
@@ -961,8 +1469,16 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
         # get job kwargs for submission and merge with passed kwargs
         submit_kwargs = merge_dicts(job_man_kwargs, self._get_job_kwargs("submit"), kwargs)
 
-        # progress callback to inform the scheduler
-        def progress_callback(i, job_id):
+        # submit and process submission results as soon as they arrive
+        job_ids = [None] * len(job_files)
+        submitted = self.job_manager.iter_batch(
+            "submit",
+            job_files,
+            retries=3,
+            threads=task.submission_threads,
+            **submit_kwargs  # noqa
+        )
+        for n, (i, _, job_id) in enumerate(submitted):
             job_num = job_nums[i]
 
             # some job managers respond with a list of job ids per submission (e.g. htcondor, slurm)
@@ -971,25 +1487,17 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                 job_id = job_id[0]
 
             # set the job id early
+            job_ids[i] = job_id
             self.job_data.jobs[job_num]["job_id"] = job_id
 
             # log a message every 25 jobs
-            if i in (0, len(job_files) - 1) or (i + 1) % 25 == 0:
-                task.publish_message("submitted {}/{} job(s)".format(i + 1, len(job_files)))
+            if n in (0, len(job_files) - 1) or (n + 1) % 25 == 0:
+                task.publish_message("submitted {}/{} job(s)".format(n + 1, len(job_files)))
 
             # dump intermediate job data with a certain frequency
-            if dump_freq and (i + 1) % dump_freq == 0:
+            if dump_freq and (n + 1) % dump_freq == 0:
                 self.dump_job_data()
 
-        # submit
-        job_ids = self.job_manager.submit_batch(
-            job_files,
-            retries=3,
-            threads=task.submission_threads,
-            callback=progress_callback,
-            **submit_kwargs  # noqa
-        )
-
         return (
             job_ids,
             all_job_files,
@@ -1100,17 +1608,17 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                     active_jobs.append(job_num)
             self.poll_data.n_active = len(active_jobs) + len(unknown_jobs)
 
-            # query job states
+            # query job states, and process results as soon as they arrive
             job_ids = [self.job_data.jobs[job_num]["job_id"] for job_num in active_jobs]
-            if self.job_manager.job_grouping_query:
-                query_data = self.job_manager.query_group(job_ids, **query_kwargs)
-            else:
-                query_data = self.job_manager.query_batch(job_ids, **query_kwargs)
+            query_data = self.job_manager.iter_query(job_ids, **query_kwargs)
 
             # separate into actual states and errors that might have occured during the status query
             states_by_id = OrderedDict()
             errors = []
-            for job_num, (job_id, state_or_error) in zip(active_jobs, six.iteritems(query_data)):
+            for job_idx, job_id, state_or_error in query_data:
+                job_num = active_jobs[job_idx]
+                if state_or_error is None:
+                    state_or_error = Exception("no status query data for job {}".format(job_id))
                 if isinstance(state_or_error, Exception):
                     errors.append(state_or_error)
                     continue
@@ -1158,6 +1666,10 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                 # no errors occured, reset the fail counter
                 n_poll_fails = 0
 
+            # handle speculative copies of jobs which might update states
+            if self._speculative_jobs:
+                self._poll_speculative_jobs(states_by_id, query_kwargs)
+
             # handle active jobs
             for job_num in active_jobs:
                 # update job data with status info
@@ -1203,6 +1715,7 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                     continue
 
                 if data["status"] == self.job_manager.RUNNING:
+                    self._record_job_runtime(job_num, data["status"])
                     running_jobs.add(job_num)
                     task.forward_dashboard_event(self.dashboard, copy.deepcopy(data),
                         "status.running", job_num)
@@ -1214,6 +1727,8 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                         self.task.as_branch(b).complete()
                         for b in data["branches"]
                     ):
+                        self._record_job_runtime(job_num, data["status"])
+                        self._record_job_resources(job_num, self._read_branch_resources(job_num))
                         finished_jobs.add(job_num)
                         self._existing_branches |= set(data["branches"])
                         self.poll_data.n_active -= 1
@@ -1255,6 +1770,9 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
 
                 raise Exception("unknown job status '{}'".format(data["status"]))
 
+            # read heartbeats of running jobs
+            self._read_heartbeats(running_jobs)
+
             # gather some counts
             n_pending = len(pending_jobs)
             n_running = len(running_jobs)
@@ -1274,8 +1792,13 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
             task.publish_message(status_line)
             self.last_status_counts = counts
 
-            # inform the scheduler about the progress
-            task.publish_progress(100.0 * n_finished / n_jobs)
+            # inform the scheduler about the progress, based on branches when heartbeats are read
+            if self.heartbeat_directory is not None:
+                n_branches = sum(len(data["branches"]) for data in self.job_data.jobs.values())
+                n_done = len(self._get_existing_branches() | self._heartbeat_done_branches)
+                task.publish_progress(100.0 * min(n_done, n_branches) / max(n_branches, 1))
+            else:
+                task.publish_progress(100.0 * n_finished / n_jobs)
 
             # remove resources of finished and failed jobs
             for job_num in finished_jobs | failed_jobs:
@@ -1311,6 +1834,10 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
 
             # stop when finished
             if finished:
+                if self.job_data.resources:
+                    task.publish_message("resources of {} accounted branches: {}".format(
+                        self.job_data.resources["count"],
+                        ResourceMonitor.format_summary(self.job_data.resources)))
                 break
 
             # complain when failed
@@ -1338,6 +1865,10 @@ class BaseRemoteWorkflowProxy(BaseWorkflowProxy):
                 )
                 break
 
+            # submit speculative copies of straggling jobs
+            if self._speculative_execution and running_jobs:
+                self._submit_speculative_jobs(running_jobs)
+
             # trigger automatic resubmission and submission of unsubmitted jobs if necessary
             if retry_jobs or self.poll_data.n_active < self.poll_data.n_parallel:
                 self.submit({
@@ -1388,6 +1919,23 @@ class BaseRemoteWorkflow(BaseWorkflow):
         new ones. However, when *shuffle_jobs* is *True*, they might be submitted again earlier.
         Defaults to *False*.
 
+    .. py:classattribute:: scheduling_policy
+
+        type: string, :py:class:`law.workflow.scheduling.SchedulingPolicy`
+
+        The policy deciding the order in which unsubmitted jobs are submitted whenever free slots
+        are available, either as an instance, a class or the name of a registered policy such as
+        ``"fifo"``, ``"longest_first"``, ``"input_size"`` or ``"fair_share"``. When *None*, the
+        ``job_scheduling_policy`` option in the ``[job]`` config section is used. Defaults to
+        *None*.
+
+    .. py:classattribute:: speculative_min_finished
+
+        type: int
+
+        Minimum number of finished jobs whose runtimes are required to determine stragglers when
+        :py:attr:`speculative_factor` is set. Defaults to *5*.
+
     .. py:classattribute:: include_member_resources
 
         type: bool
@@ -1435,6 +1983,27 @@ class BaseRemoteWorkflow(BaseWorkflow):
         Maximum job walltime after which a job will be considered failed. Empty default value. The
         default unit is hours when a plain number is passed.
 
+    .. py:classattribute:: speculative_factor
+
+        type: :py:class:`luigi.FloatParameter`
+
+        When set, running jobs whose runtime exceeds this multiple of the median runtime of finished
+        jobs are considered stragglers and a copy of them is submitted as long as free slots are
+        available. The first one to finish wins and the other one is cancelled. As both jobs
+        process the same branches, tasks must write their outputs atomically, e.g. via
+        :py:meth:`law.target.file.FileSystemTarget.localize`. Empty default value.
+
+    .. py:classattribute:: target_job_duration
+
+        type: :py:class:`law.DurationParameter`
+
+        Target duration of jobs. When set and runtimes of branches are known from previous runs of
+        the same task family with the same significant parameters, branches are packed into jobs so
+        that their expected duration matches the target, superseding :py:attr:`tasks_per_job`.
+        Runtimes are reported by jobs and stored in the job data as well as in the
+        ``job_runtime_history_dir``. Retried jobs keep their branches. Empty default value. The
+        default unit is minutes when a plain number is passed.
+
     .. py:classattribute:: job_workers
 
         type: :py:class:`luigi.IntParameter`
@@ -1525,6 +2094,21 @@ class BaseRemoteWorkflow(BaseWorkflow):
         significant=False,
         description="maximum wall time; default unit is hours; default: infinite",
     )
+    speculative_factor = luigi.FloatParameter(
+        default=NO_FLOAT,
+        significant=False,
+        description="when set, running jobs whose runtime exceeds this multiple of the median "
+        "runtime of finished jobs are submitted again and the first one to finish wins; "
+        "default: empty",
+    )
+    target_job_duration = DurationParameter(
+        default=NO_FLOAT,
+        unit="m",
+        significant=False,
+        description="target duration of jobs used to pack branches into jobs based on runtimes "
+        "of previous runs, superseding --tasks-per-job when runtimes are known; default unit is "
+        "minutes; default: empty",
+    )
     job_workers = luigi.IntParameter(
         default=1,
         significant=False,
@@ -1565,11 +2149,14 @@ class BaseRemoteWorkflow(BaseWorkflow):
     align_polling_status_line = False
     append_retry_jobs = False
     include_member_resources = False
+    scheduling_policy = None
+    speculative_min_finished = 5
 
     exclude_index = True
 
     exclude_params_branch = {
         "retries", "tasks_per_job", "parallel_jobs", "no_poll", "submission_threads", "walltime",
+        "target_job_duration", "speculative_factor",
         "job_workers", "poll_interval", "poll_fails", "shuffle_jobs", "cancel_jobs", "cleanup_jobs",
         "ignore_submission", "transfer_logs",
     }
@@ -1623,6 +2210,17 @@ class BaseRemoteWorkflow(BaseWorkflow):
         """
         return None
 
+    def job_heartbeat_directory(self):
+        """
+        Hook to define the directory to which jobs periodically write heartbeat records containing
+        their completed and running branches and resource usage, which are read during polling to
+        report the progress per branch and to flag stalled jobs. Branches reported as completed are
+        not considered complete before their outputs exist. It can be either a local path on a
+        shared file system or a remote directory target associated to a named file system. Returns
+        *None* by default, disabling heartbeats.
+        """
+        return None
+
     def forward_dashboard_event(self, dashboard, job_data, event, job_num):
         """
         Hook to preprocess and publish dashboard events. By default, every event is passed to the
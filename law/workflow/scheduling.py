@@ -0,0 +1,415 @@
+# coding: utf-8
+
+"""
+Scheduling policies that decide the order in which remote workflows submit their jobs, and a
+persistent history of branch runtimes they can rely on.
+"""
+
+__all__ = [
+    "BranchRuntimeHistory", "SchedulingPolicy", "FIFOSchedulingPolicy",
+    "LongestFirstSchedulingPolicy", "InputSizeSchedulingPolicy", "FairShareSchedulingPolicy",
+    "get_scheduling_policy", "pack_branches",
+]
+
+
+import os
+import json
+import math
+import time
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+import six
+
+from law.config import Config
+from law.util import no_value, flatten, makedirs, SharedState, process_alive
+from law.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class BranchRuntimeHistory(object):
+    """
+    Persistent store of runtimes in seconds per branch of a task family, saved as a json file named
+    after *task_family* in *directory*, which defaults to the ``job_runtime_history_dir`` option in
+    the ``[job]`` config section. An optional *key*, such as a hash of the significant parameters of
+    a workflow, is appended to the file name so that runtimes of differently configured workflows
+    of the same family are stored separately. When runtimes of a branch are updated, the new value
+    is averaged with the previous one using exponential smoothing with a factor *alpha*.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, task_family, key=None, directory=None, alpha=0.5):
+        super(BranchRuntimeHistory, self).__init__()
+
+        if directory is None:
+            directory = Config.instance().get_expanded("job", "job_runtime_history_dir")
+
+        self.task_family = task_family
+        self.key = key
+        self.directory = directory and os.path.expandvars(os.path.expanduser(directory))
+        self.alpha = alpha
+
+        self.runtimes = {}
+        self.load()
+
+    @property
+    def path(self):
+        if not self.directory:
+            return None
+        name = self.task_family
+        if self.key:
+            name += "_{}".format(self.key)
+        return os.path.join(self.directory, "{}.json".format(name))
+
+    def load(self):
+        """
+        Loads runtimes from the history file if existing and returns them.
+        """
+        path = self.path
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                self.runtimes = {int(b): float(t) for b, t in six.iteritems(data["branches"])}
+            except Exception as e:
+                logger.warning("could not load branch runtime history from {}: {}".format(path, e))
+
+        return self.runtimes
+
+    def save(self):
+        """
+        Saves the current runtimes in the history file.
+        """
+        path = self.path
+        if not path:
+            return
+
+        data = {"task_family": self.task_family, "key": self.key, "branches": OrderedDict(
+            (str(b), round(t, 3)) for b, t in sorted(six.iteritems(self.runtimes))
+        )}
+
+        with self._lock:
+            makedirs(self.directory)
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=1)
+            os.rename(tmp_path, path)
+
+    def update(self, runtimes):
+        """
+        Updates the history with *runtimes*, a dictionary mapping branch numbers to runtimes in
+        seconds.
+        """
+        for branch, runtime in six.iteritems(runtimes):
+            if runtime is None or runtime < 0:
+                continue
+            prev = self.runtimes.get(branch)
+            if prev is not None:
+                runtime = self.alpha * runtime + (1.0 - self.alpha) * prev
+            self.runtimes[branch] = float(runtime)
+
+    def get(self, branch, default=None):
+        """
+        Returns the runtime of a *branch* or *default* when not known.
+        """
+        return self.runtimes.get(branch, default)
+
+    def mean(self):
+        """
+        Returns the mean runtime of all known branches or *None* if there are none.
+        """
+        if not self.runtimes:
+            return None
+        return sum(six.itervalues(self.runtimes)) / float(len(self.runtimes))
+
+
+def pack_branches(branches, runtimes, target_duration, default_runtime=None):
+    """
+    Packs *branches* into chunks whose summed runtimes, taken from the *runtimes* dictionary and
+    given in seconds, do not exceed *target_duration* seconds, except for chunks containing a
+    single branch. The order of *branches* is preserved so that chunks cover contiguous branches.
+    The runtime of branches missing in *runtimes* defaults to *default_runtime*, or to the mean of
+    all known runtimes when *None*. A list of lists is returned.
+    """
+    if default_runtime is None:
+        default_runtime = (sum(six.itervalues(runtimes)) / float(len(runtimes))) if runtimes else 0.0
+
+    chunks = []
+    chunk, duration = [], 0.0
+    for b in branches:
+        runtime = runtimes.get(b, default_runtime)
+        if chunk and duration + runtime > target_duration:
+            chunks.append(chunk)
+            chunk, duration = [], 0.0
+        chunk.append(b)
+        duration += runtime
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+class SchedulingPolicyRegister(type):
+
+    policies = OrderedDict()
+
+    def __new__(metacls, classname, bases, classdict):
+        cls = type.__new__(metacls, classname, bases, classdict)
+
+        if cls.name in metacls.policies:
+            raise ValueError("duplicate scheduling policy name '{}' for class {}".format(
+                cls.name, cls))
+
+        # store classes by name
+        if cls.name != "_base":
+            metacls.policies[cls.name] = cls
+            logger.debug("registered scheduling policy '{}'".format(cls.name))
+
+        return cls
+
+
+def get_scheduling_policy(policy=None):
+    """
+    Returns an instance of a :py:class:`SchedulingPolicy` given by *policy*, which can be either
+    an instance itself, a class or the name of a registered policy. When *None*, the name is taken
+    from the ``job_scheduling_policy`` option in the ``[job]`` config section.
+    """
+    if policy is None:
+        policy = Config.instance().get_expanded("job", "job_scheduling_policy")
+
+    if isinstance(policy, SchedulingPolicy):
+        return policy
+    if isinstance(policy, six.string_types):
+        if policy not in SchedulingPolicyRegister.policies:
+            raise ValueError("cannot find scheduling policy '{}'".format(policy))
+        policy = SchedulingPolicyRegister.policies[policy]
+    if isinstance(policy, type) and issubclass(policy, SchedulingPolicy):
+        return policy()
+
+    raise ValueError("invalid scheduling policy: {}".format(policy))
+
+
+class SchedulingPolicy(six.with_metaclass(SchedulingPolicyRegister, object)):
+    """
+    Base class of policies that decide which of the unsubmitted jobs of a remote workflow are
+    submitted next, and in which order. Subclasses are registered by their :py:attr:`name` and
+    should implement :py:meth:`order` and optionally :py:meth:`limit`.
+
+    .. py:classattribute:: name
+
+        type: string
+
+        The name under which the policy is registered.
+
+    .. py:classattribute:: uses_runtimes
+
+        type: bool
+
+        Whether the policy relies on branch runtimes, in which case remote workflows record them in
+        a :py:class:`BranchRuntimeHistory`.
+    """
+
+    name = "_base"
+
+    uses_runtimes = False
+
+    def order(self, proxy, job_nums):
+        """
+        Returns the *job_nums* of unsubmitted jobs of the workflow *proxy* in the order in which
+        they should be submitted. Jobs to be retried are not passed but always submitted before
+        (or after, depending on the *append_retry_jobs* attribute of the workflow) all others.
+        """
+        return list(job_nums)
+
+    def limit(self, proxy, n_free):
+        """
+        Returns the number of jobs that the workflow *proxy* is allowed to submit given the number
+        of free slots *n_free* with respect to its own maximum number of parallel jobs.
+        """
+        return n_free
+
+    def release(self, proxy):
+        """
+        Hook that is called when the workflow *proxy* stops submitting jobs.
+        """
+        return
+
+    def job_runtime(self, proxy, branches, mean=no_value):
+        """
+        Returns the expected runtime in seconds of a job covering *branches* of the workflow *proxy*
+        based on its runtime history, using the *mean* runtime for unknown branches. *None* is
+        returned when no runtimes are known at all. When ordering many jobs, the *mean* runtime
+        should be computed once and passed to avoid its computation per job.
+        """
+        history = proxy.runtime_history
+        if mean == no_value:
+            mean = history and history.mean()
+        if mean is None:
+            return None
+        return sum(history.get(b, mean) for b in branches)
+
+
+class FIFOSchedulingPolicy(SchedulingPolicy):
+    """
+    Default policy that submits jobs in the order of their job numbers, or shuffled, depending on
+    the *shuffle_jobs* parameter of the workflow.
+    """
+
+    name = "fifo"
+
+
+class LongestFirstSchedulingPolicy(SchedulingPolicy):
+    """
+    Policy that submits jobs with the longest expected runtime first, based on branch runtimes of
+    previous runs. Branches without a known runtime are assigned the mean runtime of all known
+    branches. When no runtimes are known at all, jobs keep their original order.
+    """
+
+    name = "longest_first"
+
+    uses_runtimes = True
+
+    def order(self, proxy, job_nums):
+        history = proxy.runtime_history
+        mean = history and history.mean()
+        if mean is None:
+            return list(job_nums)
+
+        runtimes = {
+            job_num: self.job_runtime(proxy, proxy.job_data.unsubmitted_jobs[job_num], mean=mean)
+            for job_num in job_nums
+        }
+        return sorted(job_nums, key=lambda job_num: -(runtimes[job_num] or -1.0))
+
+
+class InputSizeSchedulingPolicy(SchedulingPolicy):
+    """
+    Policy that submits jobs with the largest total size of existing input files first. Sizes are
+    determined once per branch and cached. Input targets are stat'ed concurrently using the number
+    of *submission_threads* of the workflow.
+    """
+
+    name = "input_size"
+
+    def __init__(self):
+        super(InputSizeSchedulingPolicy, self).__init__()
+
+        self._sizes = {}
+
+    @classmethod
+    def target_size(cls, target):
+        if not callable(getattr(target, "exists", None)):
+            return 0
+        try:
+            stat = target.exists(stat=True)
+        except TypeError:
+            return 0
+        return getattr(stat, "st_size", 0) or 0
+
+    def branch_input_sizes(self, proxy, branches):
+        """
+        Returns a dictionary mapping *branches* of the workflow *proxy* to the total size of their
+        existing inputs.
+        """
+        missing = [b for b in branches if b not in self._sizes]
+        if missing:
+            # create branch tasks and their inputs in this thread, only the stat calls that involve
+            # file system round trips are parallelized
+            targets = [
+                (b, t)
+                for b in missing
+                for t in flatten(proxy.task.as_branch(b).input())
+            ]
+            threads = min(getattr(proxy.task, "submission_threads", 1) or 1, len(targets))
+            if threads > 1:
+                pool = ThreadPool(threads)
+                try:
+                    sizes = pool.map(self.target_size, [t for _, t in targets])
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                sizes = [self.target_size(t) for _, t in targets]
+
+            for b in missing:
+                self._sizes[b] = 0
+            for (b, _), size in zip(targets, sizes):
+                self._sizes[b] += size
+
+        return {b: self._sizes[b] for b in branches}
+
+    def branch_input_size(self, proxy, branch):
+        """
+        Returns the total size of existing inputs of a *branch* of the workflow *proxy*.
+        """
+        return self.branch_input_sizes(proxy, [branch])[branch]
+
+    def order(self, proxy, job_nums):
+        sizes = self.branch_input_sizes(proxy, [
+            b
+            for job_num in job_nums
+            for b in proxy.job_data.unsubmitted_jobs[job_num]
+        ])
+        job_sizes = {
+            job_num: sum(sizes[b] for b in proxy.job_data.unsubmitted_jobs[job_num])
+            for job_num in job_nums
+        }
+        return sorted(job_nums, key=lambda job_num: -job_sizes[job_num])
+
+
+class FairShareSchedulingPolicy(SchedulingPolicy):
+    """
+    Policy that shares a number of job slots among all workflows that use this policy and run on
+    the same machine, in the same or in different processes, e.g. in the worker processes of
+    ``law run ... --workers N``. The number of slots is taken from the ``job_fair_share_slots``
+    option in the ``[job]`` config section and defaults to the maximum number of parallel jobs of
+    each workflow. Each workflow is allowed to occupy at most an equal share of the slots, and the
+    total number of active jobs of all workflows does not exceed the number of slots.
+
+    The numbers of active jobs per workflow are stored in a :py:class:`law.util.SharedState` file
+    at *path*, which defaults to the ``job_fair_share_file`` option in the ``[job]`` config section.
+    Entries of processes that are no longer alive are ignored.
+    """
+
+    name = "fair_share"
+
+    def __init__(self, path=None):
+        super(FairShareSchedulingPolicy, self).__init__()
+
+        if path is None:
+            cfg = Config.instance()
+            path = cfg.get_expanded("job", "job_fair_share_file", None) or \
+                os.path.join(cfg.get_expanded("job", "job_file_dir"), "law_fair_share.pkl")
+
+        self.state = SharedState(path)
+
+    @classmethod
+    def _key(cls, proxy):
+        return "{}_{}".format(os.getpid(), proxy.task.live_task_id)
+
+    def limit(self, proxy, n_free):
+        slots = Config.instance().get_expanded_int("job", "job_fair_share_slots", default=None)
+        if not slots:
+            slots = proxy.poll_data.n_parallel
+        if slots is None or slots >= proxy.n_parallel_max:
+            return n_free
+
+        n_active = proxy.poll_data.n_active
+        with self.state.locked() as data:
+            # drop entries of processes that died without releasing
+            for key, entry in list(data.items()):
+                if not process_alive(entry["pid"]):
+                    del data[key]
+            data[self._key(proxy)] = {"pid": os.getpid(), "n_active": n_active, "time": time.time()}
+            n_active_total = sum(entry["n_active"] for entry in six.itervalues(data))
+            share = int(math.ceil(float(slots) / len(data)))
+
+        return max(0, min(n_free, share - n_active, slots - n_active_total))
+
+    def release(self, proxy):
+        with self.state.locked() as data:
+            data.pop(self._key(proxy), None)
@@ -10,3 +10,12 @@ sys.path.append(base)
 
 # import all tests
 from .test_util import *  # noqa
+from .test_htcondor import *  # noqa
+from .test_workflow import *  # noqa
+from .test_task import *  # noqa
+from .test_job import *  # noqa
+from .test_scheduling import *  # noqa
+from .test_heartbeat import *  # noqa
+from .test_slurm import *  # noqa
+from .test_config import *  # noqa
+from .test_lsf import *  # noqa
@@ -0,0 +1,24 @@
+#!/usr/bin/env bash
+
+# Script to run the benchmark suite in quick mode, writing results to a json file.
+# Arguments:
+#   1. The benchmark command. Defaults to
+#      "python benchmarks/run.py --quick --output benchmark_results.json".
+
+action() {
+    local shell_is_zsh="$( [ -z "${ZSH_VERSION}" ] && echo "false" || echo "true" )"
+    local this_file="$( ${shell_is_zsh} && echo "${(%):-%x}" || echo "${BASH_SOURCE[0]}" )"
+    local this_dir="$( cd "$( dirname "${this_file}" )" && pwd )"
+    local repo_dir="$( dirname "${this_dir}" )"
+
+    # default benchmark command
+    local cmd="${1:-python benchmarks/run.py --quick --output benchmark_results.json}"
+
+    # execute it
+    echo "command: ${cmd}"
+    (
+        cd "${repo_dir}"
+        eval "${cmd}"
+    )
+}
+action "$@"
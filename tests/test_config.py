@@ -0,0 +1,111 @@
+# coding: utf-8
+
+__all__ = ["TestConfig"]
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from law.config import Config
+from law.util import patch_object
+
+
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_config(self, content=""):
+        path = os.path.join(self.tmp_dir, "law.cfg")
+        with open(path, "w") as f:
+            f.write(content)
+        cfg = Config(path, skip_defaults=True, skip_fallbacks=True, skip_includes=True,
+            skip_env_sync=True, skip_luigi_sync=True)
+
+        # start with an empty memo
+        cfg.invalidate_memo()
+        cfg._memo_counts.update(hits=0, misses=0, invalidations=0)
+
+        return cfg
+
+    def test_memo(self):
+        cfg = self.create_config("[a]\nx: 1\ny: 1,2\n")
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 1)
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 1)
+        stats = cfg.memo_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+        # split values are returned as copies
+        values = cfg.get_expanded("a", "y", split_csv=True)
+        values.append("3")
+        self.assertEqual(cfg.get_expanded("a", "y", split_csv=True), ["1", "2"])
+
+        # memoized lookups falling back to defaults return the default of each call
+        self.assertEqual(cfg.get_expanded("a", "z", "d1"), "d1")
+        self.assertEqual(cfg.get_expanded("a", "z", "d2"), "d2")
+
+    def test_memo_set(self):
+        cfg = self.create_config("[a]\nx: 1\nref: &::x\n")
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 1)
+        self.assertEqual(cfg.get_expanded_int("a", "ref"), 1)
+
+        # set, also affecting references
+        cfg.set("a", "x", 2)
+        self.assertEqual(cfg.memo_stats()["size"], 0)
+        self.assertEqual(cfg.memo_stats()["invalidations"], 1)
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 2)
+        self.assertEqual(cfg.get_expanded_int("a", "ref"), 2)
+
+        # update uses set
+        cfg.update({"a": {"x": 3}})
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 3)
+
+        # new sections
+        self.assertEqual(cfg.get_expanded("b", "y", "default"), "default")
+        cfg.update({"b": {"y": "value"}})
+        self.assertEqual(cfg.get_expanded("b", "y", "default"), "value")
+
+    def test_memo_remove_option(self):
+        cfg = self.create_config("[a]\nx: 1\n")
+        self.assertEqual(cfg.get_expanded_int("a", "x", 0), 1)
+        cfg.remove_option("a", "x")
+        self.assertEqual(cfg.get_expanded_int("a", "x", 0), 0)
+
+        cfg.set("a", "x", 5)
+        self.assertEqual(cfg.get_expanded_int("a", "x", 0), 5)
+        cfg.remove_section("a")
+        self.assertEqual(cfg.get_expanded_int("a", "x", 0), 0)
+
+    def test_memo_read(self):
+        cfg = self.create_config("[a]\nx: 1\n")
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 1)
+
+        path = os.path.join(self.tmp_dir, "other.cfg")
+        with open(path, "w") as f:
+            f.write("[a]\nx: 2\n")
+        cfg.read(path)
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 2)
+
+        cfg.include(path.replace("other", "missing"))
+        cfg.read_string("[a]\nx: 3\n")
+        self.assertEqual(cfg.get_expanded_int("a", "x"), 3)
+
+    def test_memo_env(self):
+        # values depending on environment variables are not memoized
+        cfg = self.create_config("[a]\nx: $LAW_TEST_CONFIG_VAR\n")
+        with patch_object(os, "environ", dict(os.environ, LAW_TEST_CONFIG_VAR="1")):
+            self.assertEqual(cfg.get_expanded("a", "x"), "1")
+        with patch_object(os, "environ", dict(os.environ, LAW_TEST_CONFIG_VAR="2")):
+            self.assertEqual(cfg.get_expanded("a", "x"), "2")
+
+    def test_no_memo(self):
+        cfg = self.create_config("[a]\nx: 1\n")
+        cfg.memoize = False
+        cfg.get_expanded("a", "x")
+        cfg.get_expanded("a", "x")
+        self.assertEqual(cfg.memo_stats()["size"], 0)
+        self.assertEqual(cfg.memo_stats()["hits"], 0)
@@ -0,0 +1,104 @@
+# coding: utf-8
+
+__all__ = ["TestHeartbeat"]
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import law
+from law.job.heartbeat import HeartbeatWriter, heartbeat_file_name
+from law.workflow.remote import BaseRemoteWorkflowProxy
+from law.util import DotDict, patch_object
+
+
+class FakeProxy(object):
+
+    _read_heartbeats = BaseRemoteWorkflowProxy.__dict__["_read_heartbeats"]
+
+    def __init__(self, directory, jobs):
+        super(FakeProxy, self).__init__()
+
+        self.heartbeat_directory = law.LocalDirectoryTarget(directory)
+        self.job_data = DotDict(jobs=jobs)
+        self.messages = []
+        self.task = DotDict(publish_message=self.messages.append)
+        self._heartbeat_progress = {}
+        self._heartbeat_done_branches = set()
+
+    def _record_job_resources(self, job_num, resources):
+        return
+
+
+class TestHeartbeat(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, branches, token, **kwargs):
+        name = heartbeat_file_name(branches, token)
+        record = dict({"token": token, "seq": 1, "time": 0.0, "status": "running"}, **kwargs)
+        with open(os.path.join(self.tmp_dir, name), "w") as f:
+            json.dump(record, f)
+
+    def test_writer(self):
+        writer = HeartbeatWriter(self.tmp_dir, [3, 4], token="abc", pid=os.getpid())
+        writer.write(writer.record())
+        writer.write(writer.record())
+
+        self.assertEqual(os.listdir(self.tmp_dir), ["heartbeat_3_abc.json"])
+        with open(os.path.join(self.tmp_dir, "heartbeat_3_abc.json"), "r") as f:
+            record = json.load(f)
+        self.assertEqual(record["token"], "abc")
+        self.assertEqual(record["seq"], 2)
+        self.assertEqual(record["branches"], [3, 4])
+
+    def test_read_heartbeats(self):
+        jobs = {
+            1: {"job_id": "1", "branches": [0, 1], "extra": {"heartbeat_token": "new"}},
+            2: {"job_id": "2", "branches": [2], "extra": {}},
+        }
+        proxy = FakeProxy(self.tmp_dir, jobs)
+
+        # files of previous submissions and of jobs without token are ignored, regardless of the
+        # time of the job's host
+        self.write([0, 1], "old", time=10.0 ** 10, done=[0])
+        self.write([2], None, done=[2])
+        proxy._read_heartbeats([1, 2])
+        self.assertNotIn("heartbeat", jobs[1]["extra"])
+        self.assertNotIn("heartbeat", jobs[2]["extra"])
+
+        # stalls are detected with the local clock when the sequence number does not advance, even
+        # if the time of the job's host is far off
+        now = [1000.0]
+        with patch_object(law.workflow.remote.time, "time", lambda: now[0]):
+            self.write([0, 1], "new", seq=1, done=[0])
+            proxy._read_heartbeats([1])
+            self.assertEqual(jobs[1]["extra"]["heartbeat"]["seq"], 1)
+            self.assertFalse(jobs[1]["extra"]["stalled"])
+            self.assertEqual(proxy._heartbeat_done_branches, {0})
+
+            now[0] += 500.0
+            self.write([0, 1], "new", seq=2)
+            proxy._read_heartbeats([1])
+            self.assertFalse(jobs[1]["extra"]["stalled"])
+
+            now[0] += 500.0
+            proxy._read_heartbeats([1])
+            self.assertFalse(jobs[1]["extra"]["stalled"])
+
+            now[0] += 200.0
+            proxy._read_heartbeats([1])
+            self.assertTrue(jobs[1]["extra"]["stalled"])
+            self.assertEqual(len(proxy.messages), 1)
+
+            # a new submission, e.g. of a speculative copy that is continued, writes its own file
+            jobs[1]["extra"]["heartbeat_token"] = "copy"
+            self.write([0, 1], "copy", seq=1)
+            proxy._read_heartbeats([1])
+            self.assertFalse(jobs[1]["extra"]["stalled"])
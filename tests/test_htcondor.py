@@ -0,0 +1,255 @@
+# coding: utf-8
+
+__all__ = ["TestHTCondorJobManager", "TestHTCondorBindingsJobManager"]
+
+import os
+import sys
+import shlex
+import shutil
+import tempfile
+import unittest
+from types import ModuleType
+
+import law.contrib.htcondor.job
+import law.contrib.htcondor.util
+from law.contrib.htcondor.job import HTCondorJobManager, HTCondorBindingsJobManager
+from law.util import patch_object
+
+
+class FakeSubmitResult(object):
+
+    def __init__(self, cluster_id, n_procs):
+        self._cluster_id = cluster_id
+        self._n_procs = n_procs
+
+    def cluster(self):
+        return self._cluster_id
+
+    def first_proc(self):
+        return 0
+
+    def num_procs(self):
+        return self._n_procs
+
+
+class FakeSubmit(dict):
+
+    def queue_with_itemdata(self, txn, count=1, itemdata=None):
+        items = list(itemdata) if itemdata is not None else [{}]
+        return txn.schedd.add_cluster(self, count * len(items))
+
+
+class FakeTransaction(object):
+
+    def __init__(self, schedd):
+        self.schedd = schedd
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return
+
+
+class FakeSchedd(object):
+    """
+    Stand-in for an htcondor schedd, keeping jobs in a queue and a history dict.
+    """
+
+    def __init__(self):
+        self.queue = {}
+        self.history_ads = {}
+        self.history_calls = 0
+        self.removed = []
+        self._next_cluster = 100
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def add_cluster(self, desc, n_procs):
+        cluster_id = self._next_cluster
+        self._next_cluster += 1
+        for proc_id in range(n_procs):
+            self.queue[(cluster_id, proc_id)] = {
+                "ClusterId": cluster_id,
+                "ProcId": proc_id,
+                "JobStatus": 1,
+            }
+        return FakeSubmitResult(cluster_id, n_procs)
+
+    def finish(self, cluster_id, proc_id, code=0):
+        ad = self.queue.pop((cluster_id, proc_id))
+        ad.update(JobStatus=4, ExitCode=code)
+        self.history_ads[(cluster_id, proc_id)] = ad
+
+    def _match(self, ads, constraint):
+        # evaluate the simple constraints built by the job manager
+        expr = constraint.replace("&&", "and").replace("||", "or")
+        for ad in list(ads.values()):
+            if eval(expr, {}, dict(ad)):
+                yield ad
+
+    def query(self, constraint="true", projection=None):
+        return list(self._match(self.queue, constraint))
+
+    def history(self, constraint, projection=None, match=-1):
+        self.history_calls += 1
+        return self._match(self.history_ads, constraint)
+
+    def act(self, action, job_ids):
+        self.removed.extend(job_ids)
+
+
+# recorded outputs of "condor_q/condor_history ... -af:jt JobStatus ExitCode ExitStatus HoldReason
+# RemoveReason"
+condor_q_af_output = """\
+200.0\t2\tundefined\tundefined\tundefined\tundefined
+200.3\t1\tundefined\tundefined\tundefined\tundefined
+"""
+
+condor_history_af_output = """\
+200.1\t4\t0\t0\tundefined\tundefined
+200.2\t4\t1\t0\tundefined\tundefined
+"""
+
+
+class TestHTCondorJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.cmds = []
+
+        with patch_object(law.contrib.htcondor.job, "get_htcondor_version", lambda: (9, 0, 0)):
+            self.manager = HTCondorJobManager(user="alice", query_mode="constraint",
+                constraint="LawTaskId == \"task\"")
+
+    def popen(self, cmd, **kwargs):
+        cmd = shlex.split(cmd)
+        self.cmds.append(cmd)
+        out = condor_q_af_output if cmd[0] == "condor_q" else condor_history_af_output
+        return 0, out, ""
+
+    def query_bulk(self, *args, **kwargs):
+        with patch_object(law.contrib.htcondor.job, "interruptable_popen", self.popen):
+            return self.manager.query_bulk(*args, **kwargs)
+
+    def test_query_bulk_constraint(self):
+        job_ids = ["200.0", "200.1", "200.2"]
+        data = self.query_bulk(self.manager.constraint, job_ids)
+        self.assertEqual(list(sorted(data)), job_ids)
+        self.assertEqual(data["200.0"]["status"], self.manager.RUNNING)
+        self.assertEqual(data["200.1"]["status"], self.manager.FINISHED)
+        self.assertEqual(data["200.2"]["status"], self.manager.FAILED)
+
+        # the queue query is restricted to the user
+        q_cmd, h_cmd = self.cmds
+        self.assertEqual(q_cmd[q_cmd.index("-constraint") + 1],
+            "(LawTaskId == \"task\") && Owner == \"alice\"")
+
+        # the history query is restricted to the missing jobs and the user, and limited
+        self.assertEqual(h_cmd[0], "condor_history")
+        self.assertEqual(h_cmd[h_cmd.index("-constraint") + 1],
+            "((ClusterId == 200 && (ProcId == 1 || ProcId == 2))) && Owner == \"alice\"")
+        self.assertEqual(h_cmd[h_cmd.index("-limit") + 1], "2")
+
+        # finished jobs are not queried again
+        self.query_bulk(self.manager.constraint, job_ids[1:])
+        self.assertEqual(len(self.cmds), 2)
+
+    def test_query_bulk_cluster(self):
+        self.manager.user = None
+        data = self.query_bulk("200", ["200.0", "200.3"])
+        self.assertEqual(data["200.3"]["status"], self.manager.PENDING)
+        self.assertEqual(len(self.cmds), 1)
+        self.assertEqual(self.cmds[0][:2], ["condor_q", "200"])
+
+        # explicit users are added to the constraint
+        self.query_bulk("200", ["200.0"], user="bob")
+        cmd = self.cmds[-1]
+        self.assertEqual(cmd[cmd.index("-constraint") + 1],
+            "(ClusterId == 200) && Owner == \"bob\"")
+
+
+class TestHTCondorBindingsJobManager(unittest.TestCase):
+
+    def setUp(self):
+        # fake htcondor module
+        htcondor = ModuleType("htcondor")
+        htcondor.Submit = FakeSubmit
+        htcondor.JobAction = type("JobAction", (object,), {"Remove": "Remove"})
+        htcondor.version = lambda: "$CondorVersion: 10.2.1 2023-01-01 BuildID: 1 PackageID: 1 $"
+        self._orig_htcondor = sys.modules.get("htcondor")
+        sys.modules["htcondor"] = htcondor
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.schedd = FakeSchedd()
+        self.manager = HTCondorBindingsJobManager(schedd=self.schedd)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        if self._orig_htcondor is None:
+            sys.modules.pop("htcondor", None)
+        else:
+            sys.modules["htcondor"] = self._orig_htcondor
+
+    def write_job_file(self, lines):
+        job_file = os.path.join(self.tmp_dir, "job.jdl")
+        with open(job_file, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return job_file
+
+    def test_version(self):
+        # the version is taken from the bindings without running condor_version
+        def popen(*args, **kwargs):
+            raise AssertionError("unexpected subprocess")
+
+        with patch_object(law.contrib.htcondor.util, "interruptable_popen", popen):
+            manager = HTCondorBindingsJobManager(schedd=self.schedd)
+        self.assertEqual(manager.htcondor_version, (10, 2, 1))
+        self.assertTrue(manager.htcondor_ge_v856)
+
+    def test_parse_job_file(self):
+        job_file = self.write_job_file([
+            "universe = vanilla",
+            "+LawTaskId = \"task\"",
+            "queue law_job_postfix, arguments from (",
+            "    _0To1, _0To1 log_0To1.txt",
+            "    _1To2, _1To2 log_1To2.txt",
+            ")",
+        ])
+        blocks = self.manager.parse_job_file(job_file)
+        self.assertEqual(len(blocks), 1)
+        desc, count, items = blocks[0]
+        self.assertEqual(desc["+LawTaskId"], "\"task\"")
+        self.assertEqual(count, 1)
+        self.assertEqual(items[1], {"law_job_postfix": "_1To2", "arguments": "_1To2 log_1To2.txt"})
+
+    def test_submit_query_cancel(self):
+        job_file = self.write_job_file([
+            "universe = vanilla",
+            "queue law_job_postfix, arguments from (",
+            "    _0To1, _0To1",
+            "    _1To2, _1To2",
+            "    _2To3, _2To3",
+            ")",
+        ])
+        job_ids = self.manager.submit(job_file, job_files=[job_file] * 3)
+        self.assertEqual(job_ids, ["100.0", "100.1", "100.2"])
+
+        # all pending
+        data = self.manager.query(job_ids)
+        self.assertEqual({d["status"] for d in data.values()}, {self.manager.PENDING})
+
+        # two jobs left the queue, the history is queried once per job
+        self.schedd.finish(100, 0)
+        self.schedd.finish(100, 1, code=2)
+        data = self.manager.query_bulk("100", job_ids)
+        self.assertEqual(data["100.0"]["status"], self.manager.FINISHED)
+        self.assertEqual(data["100.1"]["status"], self.manager.FAILED)
+        self.assertEqual(data["100.1"]["code"], 2)
+        self.assertEqual(data["100.2"]["status"], self.manager.PENDING)
+        self.assertEqual(self.schedd.history_calls, 1)
+        self.manager.query_bulk("100", job_ids[:2])
+        self.assertEqual(self.schedd.history_calls, 1)
+
+        self.manager.cancel(job_ids[2:])
+        self.assertEqual(self.schedd.removed, ["100.2"])
@@ -0,0 +1,127 @@
+# coding: utf-8
+
+__all__ = ["TestJobQueryBroker"]
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import multiprocessing
+import unittest
+
+from law.job.base import JobQueryBroker
+
+
+class QueryCounter(object):
+
+    def __init__(self, delay=0.0):
+        super(QueryCounter, self).__init__()
+
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, job_ids, **kwargs):
+        self.calls.append(list(job_ids))
+        time.sleep(self.delay)
+        return {job_id: {"job_id": job_id, "status": "running"} for job_id in job_ids}
+
+
+def query_in_process(directory, job_ids, delay, queue):
+    broker = JobQueryBroker("key", window=60.0, max_age=60.0, directory=directory)
+    query_func = QueryCounter(delay=delay)
+    data = broker.query(job_ids, query_func)
+    queue.put((sorted(data), query_func.calls))
+
+
+class TestJobQueryBroker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def broker(self, **kwargs):
+        kwargs.setdefault("window", 60.0)
+        kwargs.setdefault("max_age", 60.0)
+        return JobQueryBroker("key", directory=self.tmp_dir, **kwargs)
+
+    def test_cache(self):
+        query_func = QueryCounter()
+        broker = self.broker()
+
+        data = broker.query(["1", "2"], query_func)
+        self.assertEqual(list(data), ["1", "2"])
+        self.assertEqual(data["1"]["status"], "running")
+
+        # cached results are reused, missing ones are queried along with all registered ids
+        broker.query(["2", "1"], query_func)
+        self.assertEqual(query_func.calls, [["1", "2"]])
+        broker.query(["3"], query_func)
+        self.assertEqual(query_func.calls, [["1", "2"], ["3"]])
+
+        # results expire after max_age
+        broker = self.broker(max_age=0.1)
+        time.sleep(0.2)
+        broker.query(["1"], query_func)
+        self.assertEqual(sorted(query_func.calls[-1]), ["1", "2", "3"])
+
+    def test_no_cache(self):
+        query_func = QueryCounter()
+        broker = self.broker(max_age=0)
+        broker.query(["1"], query_func)
+        broker.query(["1"], query_func)
+        self.assertEqual(query_func.calls, [["1"], ["1"]])
+
+    def test_merge_threads(self):
+        # the second caller waits for the query of the first one, which covers its ids
+        broker = self.broker()
+        broker.query(["1", "2"], QueryCounter())
+
+        slow_func = QueryCounter(delay=0.3)
+        broker = self.broker(max_age=0.2)
+        time.sleep(0.25)
+        thread = threading.Thread(target=broker.query, args=(["1"], slow_func))
+        thread.start()
+        time.sleep(0.1)
+
+        other_func = QueryCounter()
+        data = broker.query(["2"], other_func)
+        thread.join()
+
+        self.assertEqual(data["2"]["status"], "running")
+        self.assertEqual(other_func.calls, [])
+        self.assertEqual(sorted(slow_func.calls[0]), ["1", "2"])
+
+    @unittest.skipIf(not hasattr(os, "fork"), "requires fork")
+    def test_merge_processes(self):
+        # register ids of a first process, then let a second one query them all
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        for job_ids in [["1", "2"], ["3"]]:
+            p = ctx.Process(target=query_in_process, args=(self.tmp_dir, job_ids, 0.0, queue))
+            p.start()
+            p.join()
+        results = [queue.get() for _ in range(2)]
+        self.assertEqual(results[0], (["1", "2"], [["1", "2"]]))
+        self.assertEqual(results[1], (["3"], [["3"]]))
+
+        # a third process finds all results without querying
+        p = ctx.Process(target=query_in_process, args=(self.tmp_dir, ["1", "3"], 0.0, queue))
+        p.start()
+        p.join()
+        self.assertEqual(queue.get(), (["1", "3"], []))
+
+    def test_interrupted_query(self):
+        def interrupt(job_ids, **kwargs):
+            raise KeyboardInterrupt
+
+        broker = self.broker()
+        with self.assertRaises(KeyboardInterrupt):
+            broker.query(["1"], interrupt)
+
+        # the ownership was released, so the next caller queries immediately
+        query_func = QueryCounter()
+        broker.query(["1"], query_func)
+        self.assertEqual(query_func.calls, [["1"]])
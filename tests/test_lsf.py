@@ -0,0 +1,68 @@
+# coding: utf-8
+
+__all__ = ["TestLSFJobManager"]
+
+import shlex
+import unittest
+
+import law.contrib.lsf.job
+from law.contrib.lsf.job import LSFJobManager
+from law.util import patch_object
+
+
+# recorded output of "bjobs -noheader 5001 5002[1] 5002[2] 5002[3] 5003", where the pending jobs
+# have no execution host yet and the parallel job lists additional hosts on a continuation line
+bjobs_output = """\
+5001    user    DONE  short      login01     node017     law_job    Feb  8 14:54
+5002    user    RUN   short      login01     node021     law_array[1] Feb  8 14:55
+5002    user    PEND  short      login01                 law_array[2] Feb  8 14:55
+5002    user    EXIT  short      login01     node022     law_array[3] Feb  8 14:55
+5003    user    RUN   long       login01     4*node030   law_par    Feb  8 15:01
+                                             4*node031
+"""
+
+# recorded output of "bjobs" of older versions without the -noheader option
+bjobs_output_header = """\
+JOBID   USER    STAT  QUEUE      FROM_HOST   EXEC_HOST   JOB_NAME   SUBMIT_TIME
+5004    user    PSUSP short      login01                 law_job    Feb  8 16:12
+"""
+
+
+class TestLSFJobManager(unittest.TestCase):
+
+    def setUp(self):
+        with patch_object(law.contrib.lsf.job, "get_lsf_version", lambda: (10, 1, 0)):
+            self.manager = LSFJobManager(queue="short")
+
+    def test_lsf_job_id(self):
+        self.assertEqual(LSFJobManager.lsf_job_id("5002_3"), "5002[3]")
+        self.assertEqual(LSFJobManager.lsf_job_id(5001), "5001")
+
+    def test_parse_query_output(self):
+        m = LSFJobManager
+        data = m.parse_query_output(bjobs_output)
+        self.assertEqual(sorted(data), ["5001", "5002_1", "5002_2", "5002_3", "5003"])
+        self.assertEqual(data["5001"]["status"], m.FINISHED)
+        self.assertEqual(data["5002_1"]["status"], m.RUNNING)
+        self.assertEqual(data["5002_2"]["status"], m.PENDING)
+        self.assertEqual(data["5002_3"]["status"], m.FAILED)
+        self.assertEqual(data["5003"]["status"], m.RUNNING)
+
+        data = m.parse_query_output(bjobs_output_header)
+        self.assertEqual(data["5004"]["status"], m.PENDING)
+
+    def test_query(self):
+        cmds = []
+
+        def popen(cmd, **kwargs):
+            cmds.append(shlex.split(cmd))
+            return 0, bjobs_output, ""
+
+        job_ids = ["5001", "5002_2", "5009"]
+        with patch_object(law.contrib.lsf.job, "interruptable_popen", popen):
+            data = self.manager.query(job_ids)
+
+        self.assertEqual(cmds, [["bjobs", "-noheader", "-q", "short", "5001", "5002[2]", "5009"]])
+        self.assertEqual(data["5002_2"]["status"], self.manager.PENDING)
+        self.assertEqual(data["5009"]["status"], self.manager.FAILED)
+        self.assertEqual(data["5009"]["error"], "job not found in query response")
@@ -0,0 +1,164 @@
+# coding: utf-8
+
+__all__ = ["TestSchedulingPolicies"]
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import law
+from law.util import DotDict
+from law.workflow.remote import BaseRemoteWorkflowProxy
+from law.workflow.scheduling import (
+    BranchRuntimeHistory, get_scheduling_policy, FIFOSchedulingPolicy,
+    LongestFirstSchedulingPolicy, InputSizeSchedulingPolicy, FairShareSchedulingPolicy,
+)
+
+
+class BranchTask(object):
+
+    def __init__(self, inputs):
+        super(BranchTask, self).__init__()
+
+        self.inputs = inputs
+
+    def input(self):
+        return self.inputs
+
+
+class WorkflowTask(object):
+
+    submission_threads = 4
+
+    def __init__(self, name, inputs=None):
+        super(WorkflowTask, self).__init__()
+
+        self.live_task_id = name
+        self.inputs = inputs or {}
+
+    def as_branch(self, branch):
+        return BranchTask(self.inputs.get(branch, []))
+
+
+def create_proxy(name="wf", jobs=None, inputs=None, runtimes=None, n_active=0, n_parallel=10):
+    history = None
+    if runtimes is not None:
+        history = BranchRuntimeHistory(name, directory="")
+        history.runtimes.update(runtimes)
+
+    return DotDict(
+        task=WorkflowTask(name, inputs=inputs),
+        job_data=DotDict(unsubmitted_jobs=jobs or {}),
+        poll_data=DotDict(n_active=n_active, n_parallel=n_parallel),
+        n_parallel_max=10 ** 6,
+        runtime_history=history,
+    )
+
+
+class TestSchedulingPolicies(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_runtime_history(self):
+        # runtimes of workflows with different significant parameters are stored separately
+        from .test_workflow import WorkflowTask
+        key = lambda task: BaseRemoteWorkflowProxy.runtime_history_key(DotDict(task=task))
+        self.assertEqual(key(WorkflowTask(name="a")), key(WorkflowTask(name="a", factor=2.0)))
+        self.assertNotEqual(key(WorkflowTask(name="a")), key(WorkflowTask(name="b")))
+
+        history = BranchRuntimeHistory("Task", key=key(WorkflowTask(name="a")),
+            directory=self.tmp_dir)
+        history.update({0: 10.0, 1: 20.0})
+        history.update({0: 20.0})
+        history.save()
+        self.assertEqual(os.listdir(self.tmp_dir), [os.path.basename(history.path)])
+        self.assertTrue(history.path.endswith("Task_{}.json".format(history.key)))
+
+        self.assertEqual(BranchRuntimeHistory("Task", key=history.key,
+            directory=self.tmp_dir).runtimes, {0: 15.0, 1: 20.0})
+        self.assertEqual(BranchRuntimeHistory("Task", directory=self.tmp_dir).runtimes, {})
+
+    def test_get_policy(self):
+        self.assertIsInstance(get_scheduling_policy("fifo"), FIFOSchedulingPolicy)
+        self.assertIsInstance(get_scheduling_policy(LongestFirstSchedulingPolicy),
+            LongestFirstSchedulingPolicy)
+        with self.assertRaises(ValueError):
+            get_scheduling_policy("unknown")
+
+    def test_fifo(self):
+        policy = FIFOSchedulingPolicy()
+        proxy = create_proxy()
+        self.assertEqual(policy.order(proxy, [3, 1, 2]), [3, 1, 2])
+        self.assertEqual(policy.limit(proxy, 5), 5)
+
+    def test_longest_first(self):
+        policy = LongestFirstSchedulingPolicy()
+        jobs = {1: [0, 1], 2: [2], 3: [3], 4: [4]}
+
+        # no runtimes known at all, keep the order
+        proxy = create_proxy(jobs=jobs, runtimes={})
+        self.assertEqual(policy.order(proxy, [1, 2, 3, 4]), [1, 2, 3, 4])
+
+        # branch 4 is unknown and gets the mean runtime of 20
+        proxy = create_proxy(jobs=jobs, runtimes={0: 5.0, 1: 10.0, 2: 50.0, 3: 15.0})
+        self.assertEqual(policy.job_runtime(proxy, [4]), 20.0)
+        # jobs 1 and 3 have equal runtimes and keep their order
+        self.assertEqual(policy.order(proxy, [1, 2, 3, 4]), [2, 4, 1, 3])
+        self.assertEqual(policy.limit(proxy, 5), 5)
+
+    def test_input_size(self):
+        def create_file(name, size):
+            target = law.LocalFileTarget(os.path.join(self.tmp_dir, name))
+            target.dump("x" * size, formatter="text")
+            return target
+
+        inputs = {
+            0: [create_file("a", 10), create_file("b", 20)],
+            1: {"x": create_file("c", 100), "missing": law.LocalFileTarget("/no/such/file")},
+            2: [],
+            3: [create_file("d", 50)],
+        }
+        jobs = {1: [0], 2: [1], 3: [2, 3], 4: [2]}
+
+        policy = InputSizeSchedulingPolicy()
+        proxy = create_proxy(jobs=jobs, inputs=inputs)
+        self.assertEqual(policy.order(proxy, [1, 2, 3, 4]), [2, 3, 1, 4])
+        self.assertEqual(policy.branch_input_sizes(proxy, [0, 1, 2, 3]),
+            {0: 30, 1: 100, 2: 0, 3: 50})
+        self.assertEqual(policy.limit(proxy, 5), 5)
+
+        # sizes are cached
+        proxy.task.inputs = {}
+        self.assertEqual(policy.branch_input_size(proxy, 1), 100)
+
+    def test_fair_share(self):
+        path = os.path.join(self.tmp_dir, "fair_share.pkl")
+        policy1 = FairShareSchedulingPolicy(path=path)
+        policy2 = FairShareSchedulingPolicy(path=path)
+
+        # a single workflow can use all slots
+        proxy1 = create_proxy(name="wf1", n_active=2)
+        self.assertEqual(policy1.order(proxy1, [2, 1]), [2, 1])
+        self.assertEqual(policy1.limit(proxy1, 8), 8)
+        self.assertEqual(policy1.limit(proxy1, 20), 8)
+
+        # a second workflow, e.g. in a different process, gets half of the slots
+        proxy2 = create_proxy(name="wf2", n_active=0)
+        self.assertEqual(policy2.limit(proxy2, 10), 5)
+        proxy1.poll_data.n_active = 8
+        self.assertEqual(policy1.limit(proxy1, 2), 0)
+        self.assertEqual(policy2.limit(proxy2, 10), 2)
+
+        # released workflows no longer count
+        policy1.release(proxy1)
+        self.assertEqual(policy2.limit(proxy2, 10), 10)
+
+        # entries of dead processes are dropped
+        with policy1.state.locked() as data:
+            data["dead"] = {"pid": 2 ** 22 + 1, "n_active": 10, "time": 0}
+        self.assertEqual(policy2.limit(proxy2, 10), 10)
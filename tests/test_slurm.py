@@ -0,0 +1,169 @@
+# coding: utf-8
+
+__all__ = ["TestSlurmJobManager"]
+
+import unittest
+
+from law.contrib.slurm.job import SlurmJobManager
+
+
+# recorded outputs of "squeue --me --json", reduced to the relevant fields
+
+# slurm 21.08, plain values
+squeue_json_21 = """{
+  "meta": {"Slurm": {"version": {"major": 21, "micro": 8, "minor": 8}}},
+  "jobs": [
+    {
+      "job_id": 101,
+      "job_state": "RUNNING",
+      "array_job_id": 0,
+      "array_task_id": null,
+      "array_task_string": ""
+    },
+    {
+      "job_id": 103,
+      "job_state": "PENDING",
+      "array_job_id": 102,
+      "array_task_id": null,
+      "array_task_string": "5-10,12%2"
+    },
+    {
+      "job_id": 104,
+      "job_state": "COMPLETING",
+      "array_job_id": 102,
+      "array_task_id": 3,
+      "array_task_string": ""
+    }
+  ]
+}"""
+
+# slurm 23.02, states as lists and numbers as dictionaries
+squeue_json_23 = """{
+  "meta": {"slurm": {"version": {"major": 23, "micro": 4, "minor": 2}}},
+  "jobs": [
+    {
+      "job_id": 201,
+      "job_state": ["RUNNING"],
+      "array_job_id": {"set": true, "infinite": false, "number": 0},
+      "array_task_id": {"set": false, "infinite": false, "number": 0},
+      "array_task_string": ""
+    },
+    {
+      "job_id": 203,
+      "job_state": ["PENDING"],
+      "array_job_id": {"set": true, "infinite": false, "number": 202},
+      "array_task_id": {"set": false, "infinite": false, "number": 0},
+      "array_task_string": "1-7:3"
+    },
+    {
+      "job_id": 204,
+      "job_state": ["RUNNING", "COMPLETING"],
+      "array_job_id": {"set": true, "infinite": false, "number": 202},
+      "array_task_id": {"set": true, "infinite": false, "number": 0},
+      "array_task_string": ""
+    }
+  ]
+}"""
+
+# recorded outputs of "sacct --json", reduced to the relevant fields
+
+# slurm 21.08
+sacct_json_21 = """{
+  "jobs": [
+    {
+      "job_id": 301,
+      "state": {"current": "COMPLETED", "reason": "None"},
+      "exit_code": {"status": "SUCCESS", "return_code": 0},
+      "array": {"job_id": 0, "task_id": null, "task": null}
+    },
+    {
+      "job_id": 303,
+      "state": {"current": "COMPLETED", "reason": "None"},
+      "exit_code": {"status": "FAILED", "return_code": 2},
+      "array": {"job_id": 302, "task_id": 1, "task": null}
+    }
+  ]
+}"""
+
+# slurm 23.02
+sacct_json_23 = """{
+  "jobs": [
+    {
+      "job_id": 401,
+      "state": {"current": ["TIMEOUT"], "reason": "None"},
+      "exit_code": {
+        "status": ["SIGNALED"],
+        "return_code": {"set": false, "infinite": false, "number": 0}
+      },
+      "array": {
+        "job_id": {"set": true, "infinite": false, "number": 0},
+        "task_id": {"set": false, "infinite": false, "number": 0},
+        "task": ""
+      }
+    },
+    {
+      "job_id": 403,
+      "state": {"current": ["CANCELLED"], "reason": "Dependency"},
+      "exit_code": {
+        "status": ["SUCCESS"],
+        "return_code": {"set": true, "infinite": false, "number": 0}
+      },
+      "array": {
+        "job_id": {"set": true, "infinite": false, "number": 402},
+        "task_id": {"set": false, "infinite": false, "number": 0},
+        "task": "0-1"
+      }
+    }
+  ]
+}"""
+
+
+class TestSlurmJobManager(unittest.TestCase):
+
+    def test_json_job_ids(self):
+        ids = SlurmJobManager._json_job_ids
+        self.assertEqual(ids(12), [12])
+        self.assertEqual(ids({"set": True, "number": 12}, {"set": True, "number": 0}), [12])
+        self.assertEqual(ids(13, 12, 4), ["12_4"])
+        self.assertEqual(ids(13, 12, None, "5-10,12%2"),
+            ["12_5", "12_6", "12_7", "12_8", "12_9", "12_10", "12_12"])
+        self.assertEqual(ids(13, 12, {"set": False, "number": 0}, "1-7:3"),
+            ["12_1", "12_4", "12_7"])
+        self.assertEqual(ids(13, 12, None, "3"), ["12_3"])
+        self.assertEqual(ids(13, 12, None, ""), [])
+
+    def test_parse_squeue_json(self):
+        m = SlurmJobManager
+        data = m.parse_squeue_json(squeue_json_21)
+        self.assertEqual(sorted(data, key=str), [101] + ["102_{}".format(i) for i in
+            [10, 12, 3, 5, 6, 7, 8, 9]])
+        self.assertEqual(data[101]["status"], m.RUNNING)
+        self.assertEqual(data["102_12"]["status"], m.PENDING)
+        self.assertEqual(data["102_3"]["status"], m.RUNNING)
+
+        data = m.parse_squeue_json(squeue_json_23)
+        self.assertEqual(sorted(data, key=str), [201, "202_0", "202_1", "202_4", "202_7"])
+        self.assertEqual(data[201]["status"], m.RUNNING)
+        self.assertEqual(data["202_4"]["status"], m.PENDING)
+        self.assertEqual(data["202_0"]["status"], m.RUNNING)
+
+        self.assertEqual(m.parse_squeue_json(""), {})
+
+    def test_parse_sacct_json(self):
+        m = SlurmJobManager
+        data = m.parse_sacct_json(sacct_json_21)
+        self.assertEqual(sorted(data, key=str), [301, "302_1"])
+        self.assertEqual(data[301]["status"], m.FINISHED)
+        self.assertEqual(data[301]["code"], 0)
+        self.assertIsNone(data[301]["error"])
+        self.assertEqual(data["302_1"]["status"], m.FAILED)
+        self.assertEqual(data["302_1"]["code"], 2)
+        self.assertIn("non-zero exit code 2", data["302_1"]["error"])
+
+        data = m.parse_sacct_json(sacct_json_23)
+        self.assertEqual(sorted(data, key=str), [401, "402_0", "402_1"])
+        self.assertEqual(data[401]["status"], m.FAILED)
+        self.assertEqual(data[401]["code"], 0)
+        self.assertEqual(data[401]["error"], "TIMEOUT")
+        self.assertEqual(data["402_1"]["status"], m.FAILED)
+        self.assertEqual(data["402_1"]["error"], "Dependency")
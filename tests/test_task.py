@@ -0,0 +1,92 @@
+# coding: utf-8
+
+__all__ = ["TestTask"]
+
+import sys
+import unittest
+from collections import Counter
+
+import luigi
+import six
+
+import law
+from law.task.base import DependencyGraph
+from law.task.interactive import print_task_output
+
+
+# diamond-shaped graph with paths of different lengths to "x": r -> [a, c], a -> b -> x, c -> x
+graph_edges = {
+    "r": ["a", "c"],
+    "a": ["b"],
+    "b": ["x"],
+    "c": ["x"],
+    "x": ["y"],
+    "y": [],
+}
+
+requires_calls = Counter()
+
+
+class GraphTask(law.Task):
+
+    node = luigi.Parameter(default="r")
+
+    def requires(self):
+        requires_calls[self.node] += 1
+        return [GraphTask(node=node) for node in graph_edges[self.node]]
+
+    def output(self):
+        return law.LocalFileTarget("/tmp/law_test_graph_{}.txt".format(self.node))
+
+    def run(self):
+        return
+
+
+class TestTask(unittest.TestCase):
+
+    def setUp(self):
+        requires_calls.clear()
+
+    def test_dependency_graph_memoization(self):
+        graph = DependencyGraph(GraphTask()).build()
+        self.assertEqual(len(graph), len(graph_edges))
+        self.assertEqual(set(requires_calls.values()), {1})
+
+        # walking the built graph does not evaluate requirements again
+        nodes = [dep.node for dep, _, _ in GraphTask().walk_deps(graph=graph)]
+        self.assertEqual(nodes, ["r", "a", "c", "b", "x", "x", "y", "y"])
+        self.assertEqual(set(requires_calls.values()), {1})
+
+    def test_dependency_graph_max_depth(self):
+        graph = DependencyGraph(GraphTask()).build(max_depth=1)
+        self.assertEqual(len(graph), 3)
+        self.assertNotIn(GraphTask(node="b"), graph)
+
+    def test_walk_unique(self):
+        walk = lambda **kwargs: [
+            (dep.node, depth)
+            for dep, _, depth in GraphTask().walk_deps(order="pre", **kwargs)
+        ]
+
+        # tasks are only traversed again when reached on a shorter path
+        self.assertEqual(walk(unique=True), [
+            ("r", 0), ("a", 1), ("b", 2), ("x", 3), ("y", 4), ("c", 1), ("x", 2), ("y", 3),
+        ])
+        self.assertEqual(walk(unique=True, max_depth=1), [("r", 0), ("a", 1), ("c", 1)])
+
+        # with a depth limit, tasks first reached on a long path are traversed again on shorter ones
+        nodes = set(node for node, _ in walk(unique=True, max_depth=3))
+        self.assertEqual(nodes, set(node for node, _ in walk(max_depth=3)))
+        self.assertIn("y", nodes)
+
+    def test_print_task_output_diamond(self):
+        stdout = sys.stdout
+        sys.stdout = out = six.StringIO()
+        try:
+            print_task_output(GraphTask(), 3, scheme=False)
+        finally:
+            sys.stdout = stdout
+
+        lines = [line for line in out.getvalue().split("\n") if line.startswith("/")]
+        nodes = [line.rsplit("_", 1)[-1].split(".")[0] for line in lines]
+        self.assertEqual(nodes, ["r", "a", "b", "x", "c", "y"])
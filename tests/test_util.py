@@ -2,6 +2,9 @@
 
 __all__ = ["TestUtil"]
 
+import os
+import sys
+import subprocess
 import unittest
 
 import law
@@ -42,3 +45,114 @@ class TestUtil(unittest.TestCase):
             law.util.brace_expand(r"A\{1,2\}B"),
             [r"A\{1,2\}B"],
         )
+
+    def test_range_expand(self):
+        self.assertEqual(law.util.range_expand("5:8"), [5, 6, 7])
+        self.assertEqual(law.util.range_expand((6, 9)), [6, 7, 8])
+        self.assertEqual(law.util.range_expand("5:8", include_end=True), [5, 6, 7, 8])
+        self.assertEqual(law.util.range_expand(["5:8", "10"]), [5, 6, 7, 10])
+        self.assertEqual(law.util.range_expand(["7:10", "3:8", "8"]), [7, 8, 9, 3, 4, 5, 6])
+        self.assertEqual(
+            law.util.range_expand(["5:8", "10:"], max_value=12, include_end=True),
+            [5, 6, 7, 8, 10, 11, 12],
+        )
+        self.assertEqual(law.util.range_expand([":4", "2"], min_value=1, max_value=3), [1, 2])
+        with self.assertRaises(Exception):
+            law.util.range_expand(["5:8", "10:"])
+
+    def test_range_join(self):
+        self.assertEqual(law.util.range_join([1, 2, 3, 5]), [(1, 4), (5,)])
+        self.assertEqual(law.util.range_join([1, 2, 3, 5], include_end=True), [(1, 3), (5,)])
+        self.assertEqual(law.util.range_join([9, "8", 7, 1, 5, 3, 2, 2]), [(1, 4), (5,), (7, 10)])
+        self.assertEqual(law.util.range_join([1, 2, 3, 5, 7, 8, 9], to_str=True), "1:4,5,7:10")
+        self.assertEqual(law.util.range_join(range(3, 10), to_str=True), "3:10")
+        self.assertEqual(law.util.range_join(range(4, 5)), [(4,)])
+
+    def test_branch_range_set(self):
+        BranchRangeSet = law.util.BranchRangeSet
+
+        s = BranchRangeSet.from_ranges([(0, 5), (7,), (4, 6)])
+        self.assertEqual(s.intervals, ((0, 6), (7, 8)))
+        self.assertEqual(len(s), 7)
+        self.assertEqual(list(s), [0, 1, 2, 3, 4, 5, 7])
+        self.assertEqual((s.min(), s.max()), (0, 7))
+        self.assertIn(5, s)
+        self.assertNotIn(6, s)
+        self.assertEqual(s.to_ranges(), [(0, 6), (7,)])
+        self.assertEqual(s, BranchRangeSet.from_numbers([7, 5, 4, 3, 2, 1, 0, 0]))
+        self.assertEqual(BranchRangeSet.from_numbers(range(3, 9)).intervals, ((3, 9),))
+
+        t = BranchRangeSet([(2, 4), (5, 10)])
+        self.assertEqual((s | t).intervals, ((0, 10),))
+        self.assertEqual((s & t).intervals, ((2, 4), (5, 6), (7, 8)))
+        self.assertEqual((s - t).intervals, ((0, 2), (4, 5)))
+        self.assertEqual((t - s).intervals, ((6, 7), (8, 10)))
+        self.assertFalse(BranchRangeSet())
+
+        # large sets are not materialized
+        big = BranchRangeSet([(0, 10 ** 12)]) - BranchRangeSet([(10, 20)])
+        self.assertEqual(len(big), 10 ** 12 - 10)
+        self.assertEqual(big.to_ranges(), [(0, 10), (20, 10 ** 12)])
+
+    def test_prefetch_map(self):
+        seq = list(range(20))
+        square = lambda x: x ** 2
+
+        for prefetch in [0, 1, 4]:
+            self.assertEqual(
+                list(law.util.prefetch_map(square, seq, prefetch=prefetch)),
+                [x ** 2 for x in seq],
+            )
+        self.assertEqual(
+            list(law.util.prefetch_map(square, seq, prefetch=4, size=lambda r: 1, max_size=2)),
+            [x ** 2 for x in seq],
+        )
+
+        def fail(x):
+            if x == 3:
+                raise ValueError(x)
+            return x
+
+        with self.assertRaises(ValueError):
+            list(law.util.prefetch_map(fail, seq, prefetch=2))
+
+    def test_resource_monitor(self):
+        with law.util.ResourceMonitor(interval=0.01) as mon:
+            data = [bytearray(1024) for _ in range(1000)]
+            sum(i * i for i in range(100000))
+        del data
+
+        summary = mon.summary
+        self.assertGreater(summary["wall_time"], 0)
+        self.assertGreaterEqual(summary["samples"], 2)
+        self.assertGreater(summary["max_rss"], 0)
+        self.assertIsInstance(law.util.ResourceMonitor.format_summary(summary), str)
+
+        agg = law.util.aggregate_resources([summary, None, summary])
+        self.assertEqual(agg["count"], 2)
+        self.assertEqual(agg["max_rss"], summary["max_rss"])
+        self.assertAlmostEqual(agg["wall_time"], 2 * summary["wall_time"], places=3)
+        self.assertIsNone(law.util.aggregate_resources([]))
+
+        # incremental totals
+        other = dict(summary, max_rss=summary["max_rss"] + 1, wall_time=1.0)
+        totals = law.util.ResourceTotals([summary, other])
+        self.assertEqual(totals.summary(), law.util.aggregate_resources([summary, other]))
+        totals.remove(other)
+        self.assertEqual(totals.summary(), law.util.aggregate_resources([summary]))
+        totals.remove(summary)
+        self.assertIsNone(totals.summary())
+
+    def test_lazy_namespace(self):
+        # check in a fresh interpreter that submodule paths resolve after a plain "import law"
+        paths = [
+            "law.util", "law.target.local", "law.target.collection", "law.task.base",
+            "law.workflow.base", "law.workflow.remote", "law.job.base", "law.job.dashboard",
+            "law.sandbox.base", "law.sandbox.bash", "law.sandbox.venv",
+        ]
+        code = "import law; " + "; ".join(paths)
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(law.__file__)))
+        p = subprocess.Popen([sys.executable, "-c", code], cwd=cwd, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        out, err = p.communicate()
+        self.assertEqual(p.returncode, 0, err.decode("utf-8"))
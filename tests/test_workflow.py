@@ -0,0 +1,113 @@
+# coding: utf-8
+
+__all__ = ["TestWorkflow"]
+
+import unittest
+
+import luigi
+
+import law
+from law.util import patch_object
+
+
+class WorkflowTask(law.LocalWorkflow):
+
+    n = luigi.IntParameter(default=5)
+    name = luigi.Parameter(default="test")
+    factor = luigi.FloatParameter(default=1.0, significant=False)
+    tags = law.CSVParameter(default=("a", "b"))
+
+    def create_branch_map(self):
+        return list(range(self.n))
+
+    def output(self):
+        return law.LocalFileTarget("/tmp/law_test_workflow_{}.txt".format(self.branch))
+
+    def run(self):
+        return
+
+
+class BranchDependentWorkflowTask(WorkflowTask):
+
+    tag = luigi.Parameter(default="")
+
+    @classmethod
+    def modify_param_values(cls, params):
+        params = super(BranchDependentWorkflowTask, cls).modify_param_values(params)
+        if params.get("branch", -1) >= 0:
+            params["tag"] = "b{}".format(params["branch"])
+        return params
+
+
+class TestWorkflow(unittest.TestCase):
+
+    def setUp(self):
+        luigi.task_register.Register.clear_instance_cache()
+
+    def tearDown(self):
+        luigi.task_register.Register.clear_instance_cache()
+
+    def test_make_branch_tasks(self):
+        wf = WorkflowTask(name="bulk", factor=2.0)
+        branch_tasks = wf.make_branch_tasks()
+        self.assertEqual(list(branch_tasks.keys()), list(range(5)))
+
+        # tasks are stored in the instance cache and reused by as_branch
+        for b, task in branch_tasks.items():
+            self.assertIs(wf.as_branch(b), task)
+            self.assertIs(WorkflowTask(name="bulk", factor=2.0, branch=b), task)
+
+        # compare against tasks created separately after clearing the instance cache
+        luigi.task_register.Register.clear_instance_cache()
+        wf = WorkflowTask(name="bulk", factor=2.0)
+        for b, task in branch_tasks.items():
+            ref = wf.as_branch(b)
+            self.assertIsNot(ref, task)
+            self.assertEqual(task.task_id, ref.task_id)
+            self.assertEqual(hash(task), hash(ref))
+            self.assertEqual(task.param_kwargs, ref.param_kwargs)
+            self.assertEqual(task.to_str_params(), ref.to_str_params())
+            self.assertEqual(sorted(vars(task)), sorted(vars(ref)))
+            self.assertIs(task._workflow_task.__class__, ref._workflow_task.__class__)
+
+    def test_make_branch_tasks_bulk(self):
+        # parameters are resolved by luigi only for the first branch task
+        calls = []
+        orig = luigi.Task.__dict__["get_param_values"]
+
+        def get_param_values(cls, params, args, kwargs):
+            values = orig.__func__(cls, params, args, kwargs)
+            calls.append(dict(values)["branch"])
+            return values
+
+        wf = WorkflowTask(n=100, name="count")
+        with patch_object(luigi.Task, "get_param_values", classmethod(get_param_values),
+                orig=orig):
+            branch_tasks = wf.make_branch_tasks()
+        self.assertEqual(len(branch_tasks), 100)
+        self.assertEqual(set(calls), {0})
+
+        luigi.task_register.Register.clear_instance_cache()
+        wf = WorkflowTask(n=100, name="count")
+        for b, task in branch_tasks.items():
+            ref = wf.as_branch(b)
+            self.assertEqual(task.branch, b)
+            self.assertEqual(task.task_id, ref.task_id)
+            self.assertEqual(task.param_kwargs, ref.param_kwargs)
+
+    def test_make_branch_tasks_subset(self):
+        wf = WorkflowTask()
+        branch_tasks = wf.make_branch_tasks([3, 1, 3])
+        self.assertEqual(list(branch_tasks.keys()), [3, 1])
+        self.assertEqual(branch_tasks[1].branch, 1)
+        self.assertIs(branch_tasks[1].as_workflow(), wf)
+
+    def test_make_branch_tasks_modified_params(self):
+        wf = BranchDependentWorkflowTask(n=4)
+        branch_tasks = wf.make_branch_tasks()
+        self.assertEqual([t.tag for t in branch_tasks.values()], ["b0", "b1", "b2", "b3"])
+
+        luigi.task_register.Register.clear_instance_cache()
+        wf = BranchDependentWorkflowTask(n=4)
+        for b, task in branch_tasks.items():
+            self.assertEqual(task.task_id, wf.as_branch(b).task_id)